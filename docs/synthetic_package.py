@@ -0,0 +1,23 @@
+"""Synthetic package used by the timing scripts.
+
+Every module imports one other module, and every function calls the function with the same name in that module,
+such that the call graph forms a binary tree of modules.
+"""
+
+from pathlib import Path
+
+
+def generate_package(root: Path, name: str, n_modules: int, n_funcs: int) -> None:
+    package = root / name
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    for module_idx in range(n_modules):
+        write_module(package, name, module_idx, n_funcs)
+
+
+def write_module(package: Path, name: str, module_idx: int, n_funcs: int, offset: int = 0) -> None:
+    lines = [] if module_idx == 0 else [f"import {name}.module{(module_idx - 1) // 2} as base\n\n"]
+    for func_idx in range(n_funcs):
+        call = "x" if module_idx == 0 else f"base.func{func_idx}(x)"
+        lines.append(f"\ndef func{func_idx}(x):\n    return {call} + {func_idx + offset}\n\n")
+    (package / f"module{module_idx}.py").write_text("".join(lines))
@@ -1,3 +1,4 @@
+import hashlib
 from pathlib import Path
 from statistics import mean, stdev
 from timeit import repeat
@@ -22,6 +23,16 @@ for n in n_records:
     df = pd.DataFrame([fake.profile() for _ in range(n)])
     df.to_csv(data_file, index=False)
 
+
+def hash_file_8kb_reads(file_path: str) -> str:
+    """The previous implementation of `hash_file_full`: 8KB reads in a Python loop"""
+    sha256_hash = hashlib.sha256()
+    with Path(file_path).open("rb") as fb:
+        for byte_block in iter(lambda: fb.read(8192), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+
 # Repeat the function this number of times
 number = 10
 repeats = 3
@@ -32,6 +43,12 @@ for n in n_records:
 
     print(f"{n} records, {data_file.stat().st_size} bytes")
 
+    measurements0 = repeat(
+        f'hash_file_8kb_reads("data_{n}.csv")',
+        globals={"hash_file_8kb_reads": hash_file_8kb_reads},
+        number=number,
+        repeat=repeats,
+    )
     measurements1 = repeat(
         f'hash_file_full("data_{n}.csv")',
         setup="from pycodehash.hashing import hash_file_full",
@@ -44,7 +61,25 @@ for n in n_records:
         number=number,
         repeat=repeats,
     )
-    print("full hash 8KB reads", mean(measurements1) * 1000, "ms +/-", stdev(measurements1) * 1000, "ms 1x")
+    size_mb = data_file.stat().st_size / 1e6
+    print(
+        "full hash 8KB reads",
+        mean(measurements0) * 1000,
+        "ms +/-",
+        stdev(measurements0) * 1000,
+        "ms",
+        round(size_mb * number / mean(measurements0)),
+        "MB/s",
+    )
+    print(
+        "full hash",
+        mean(measurements1) * 1000,
+        "ms +/-",
+        stdev(measurements1) * 1000,
+        "ms",
+        round(size_mb * number / mean(measurements1)),
+        "MB/s 1x",
+    )
     print(
         "approximate hash",
         mean(measurements2) * 1000,
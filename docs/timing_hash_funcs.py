@@ -0,0 +1,43 @@
+"""Speedup of `FunctionHasher.hash_funcs` versus the number of worker processes.
+
+A synthetic package is generated in a temporary directory, in which every function calls
+a function from another module. The script prints the wall time per number of workers.
+By default the number of workers is doubled up to the number of cores, alternatively pass them
+as arguments, e.g. `python timing_hash_funcs.py 1 2 4 8`.
+"""
+
+import importlib
+import os
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from pycodehash import FunctionHasher
+from synthetic_package import generate_package
+
+n_modules = 20
+n_funcs = 10
+
+
+with tempfile.TemporaryDirectory() as tmp_dir:
+    generate_package(Path(tmp_dir), "synthetic", n_modules, n_funcs)
+    sys.path.insert(0, tmp_dir)
+    funcs = [
+        getattr(importlib.import_module(f"synthetic.module{module_idx}"), f"func{func_idx}")
+        for module_idx in range(n_modules)
+        for func_idx in range(n_funcs)
+    ]
+
+    workers = [int(arg) for arg in sys.argv[1:]] or [1]
+    while len(sys.argv) == 1 and workers[-1] * 2 <= (os.cpu_count() or 1):
+        workers.append(workers[-1] * 2)
+
+    print(f"{len(funcs)} functions, {os.cpu_count()} cores")
+    baseline = None
+    for n_workers in workers:
+        start = perf_counter()
+        FunctionHasher().hash_funcs(funcs, workers=n_workers)
+        elapsed = perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{n_workers} worker(s): {elapsed:.2f}s, speedup {baseline / elapsed:.2f}x")
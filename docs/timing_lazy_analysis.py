@@ -0,0 +1,32 @@
+"""Start-up latency of hashing a single function with eager and lazy analysis.
+
+A synthetic package is generated in a temporary directory, in which every module imports one
+other module, such that a function only (transitively) calls functions in a handful of modules.
+The number of modules can be passed as argument, e.g. `python timing_lazy_analysis.py 2000`.
+"""
+
+import importlib
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from pycodehash import FunctionHasher
+from synthetic_package import generate_package
+
+n_modules = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+n_funcs = 10
+
+
+with tempfile.TemporaryDirectory() as tmp_dir:
+    generate_package(Path(tmp_dir), "synthetic", n_modules, n_funcs)
+    sys.path.insert(0, tmp_dir)
+    func = importlib.import_module(f"synthetic.module{n_modules - 1}").func0
+
+    print(f"{n_modules} modules")
+    for lazy_analysis in (False, True):
+        start = perf_counter()
+        fh = FunctionHasher(lazy_analysis=lazy_analysis)
+        fh.hash_func(func)
+        elapsed = perf_counter() - start
+        print(f"lazy_analysis={lazy_analysis}: {elapsed:.2f}s, {len(fh.func_store.store)} functions hashed")
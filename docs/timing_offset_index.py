@@ -0,0 +1,50 @@
+"""Call-site offset lookups with a linear token scan versus the `OffsetIndex`.
+
+A synthetic module of about 10,000 lines with thousands of calls is generated. The script prints
+the time to find the text range of every call by scanning all tokens (the previous fallback in
+`get_func_call_location`) and by building and querying the offset index of the module.
+The token scan is timed on a sample of the calls and extrapolated, as it takes minutes otherwise.
+"""
+
+from __future__ import annotations
+
+import ast
+from time import perf_counter
+
+import asttokens
+from pycodehash.python_function.stores import OffsetIndex
+
+n_funcs = 2000
+n_sample = 300
+
+code = "".join(
+    f"def func{idx}(x):\n    y = func{max(idx - 1, 0)}(x) + len(str(x))\n    return y\n\n\n" for idx in range(n_funcs)
+)
+tree = ast.parse(code)
+tokens = asttokens.ASTTokens(code, parse=False, tree=tree).tokens
+calls = [node for node in ast.walk(tree) if isinstance(node, ast.Call)]
+print(f"{len(code.splitlines())} lines, {len(tokens)} tokens, {len(calls)} calls")
+
+
+def scan_text_range(node: ast.Call) -> tuple[int, int]:
+    start = end = None
+    for token in tokens:
+        if token.start == (node.lineno, node.col_offset):
+            start = token.startpos
+        if token.end == (node.end_lineno, node.end_col_offset):
+            end = token.endpos
+    if start is not None and end is not None:
+        return start, end
+    return 0, 0
+
+
+start_time = perf_counter()
+scanned = [scan_text_range(node) for node in calls[:n_sample]]
+elapsed = perf_counter() - start_time
+print(f"token scan: {elapsed:.2f}s for {n_sample} calls, {elapsed * len(calls) / n_sample:.2f}s extrapolated")
+
+start_time = perf_counter()
+offsets = OffsetIndex(code, tokens)
+indexed = [offsets.get_text_range(node) for node in calls]
+print(f"offset index: {perf_counter() - start_time:.4f}s (including building the index)")
+assert scanned == indexed[:n_sample]
@@ -0,0 +1,51 @@
+"""Hashing a directory of SQL files sequentially versus in a process pool.
+
+A synthetic corpus of SQL files is generated in a temporary directory. The script prints the time
+to hash all files in the current process and with a pool of worker processes (one per CPU core),
+and to hash the unchanged files again with a warm persistent cache.
+The number of files can be passed as argument, e.g. `python timing_sql.py 5000`.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from pycodehash.cache import LRUSQLiteCache
+from pycodehash.sql import SQLHasher
+
+n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+workers = os.cpu_count() or 1
+
+
+def generate_corpus(root: Path) -> None:
+    for idx in range(n_files):
+        query = (
+            f"-- query {idx}\n"
+            f"SELECT a.id, a.value + {idx} AS value, COUNT(*) AS n\n"
+            f"FROM schema{idx % 10}.table{idx} AS a\n"
+            f"JOIN schema{idx % 10}.table{idx + 1} AS b ON a.id = b.id\n"
+            f"WHERE a.value > {idx} AND b.name LIKE 'name%'\n"
+            "GROUP BY a.id, a.value\n"
+        )
+        (root / f"query{idx}.sql").write_text(query)
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        generate_corpus(Path(tmp_dir))
+        print(f"{n_files} files, {workers} CPU cores")
+
+        sh = SQLHasher()
+        for n_workers in (None, workers):
+            start = perf_counter()
+            hashes, errors = sh.hash_directory(tmp_dir, workers=n_workers)
+            elapsed = perf_counter() - start
+            print(f"workers={n_workers}: {elapsed:.2f}s, {len(hashes)} hashed, {len(errors)} errors")
+
+        sh = SQLHasher(cache=LRUSQLiteCache(Path(tmp_dir) / "cache" / "sql.sqlite"))
+        sh.hash_directory(tmp_dir)
+        start = perf_counter()
+        hashes, _ = sh.hash_directory(tmp_dir)
+        print(f"warm cache: {perf_counter() - start:.2f}s, {len(hashes)} hashed")
@@ -0,0 +1,36 @@
+"""Cold versus warm package initialization with a persistent `work_dir`.
+
+A synthetic package is generated in a temporary directory. The script prints the time to prepare
+and analyze the package without a work directory, the first time with a work directory (cold),
+again without changes (warm) and after changing a single module (warm, one module changed).
+The number of modules can be passed as argument, e.g. `python timing_work_dir.py 500`.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from pycodehash import FunctionHasher
+from synthetic_package import generate_package, write_module
+
+n_modules = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+n_funcs = 10
+
+
+def initialize(**kwargs) -> float:
+    start = perf_counter()
+    FunctionHasher(**kwargs).project_store.add_project("synthetic")
+    return perf_counter() - start
+
+
+with tempfile.TemporaryDirectory() as src_dir, tempfile.TemporaryDirectory() as work_dir:
+    generate_package(Path(src_dir), "synthetic", n_modules, n_funcs)
+    sys.path.insert(0, src_dir)
+
+    print(f"{n_modules} modules")
+    print(f"temporary directory: {initialize():.2f}s")
+    print(f"work_dir (cold): {initialize(work_dir=work_dir):.2f}s")
+    print(f"work_dir (warm): {initialize(work_dir=work_dir):.2f}s")
+    write_module(Path(src_dir) / "synthetic", "synthetic", n_modules // 2, n_funcs, offset=1)
+    print(f"work_dir (warm, one module changed): {initialize(work_dir=work_dir):.2f}s")
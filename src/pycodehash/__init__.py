@@ -5,14 +5,18 @@ from pycodehash.python_function import (
     TypeHintStripper,
     WhitespaceNormalizer,
 )
+from pycodehash.python_function.cache import FunctionHashCache
 from pycodehash.python_function.hashing import FunctionHasher
+from pycodehash.python_function.materializer import ProjectMaterializer
 from pycodehash.version import __version__
 
 __all__ = [
     "DecoratorStripper",
     "DocstringStripper",
+    "FunctionHashCache",
     "FunctionHasher",
     "FunctionStripper",
+    "ProjectMaterializer",
     "TypeHintStripper",
     "WhitespaceNormalizer",
     "__version__",
@@ -0,0 +1,5 @@
+import sys
+
+from pycodehash.cli import main
+
+sys.exit(main())
@@ -0,0 +1,187 @@
+"""Persistent key-value cache backed by SQLite"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from pycodehash.hashing import hash_string
+from pycodehash.version import __version__
+
+
+def _describe(obj: Any) -> str:
+    """Deterministic string representation of (nested) configuration objects"""
+    if isinstance(obj, (list, tuple)):
+        return "[" + ", ".join(_describe(item) for item in obj) + "]"
+    if isinstance(obj, dict):
+        return "{" + ", ".join(f"{key!r}: {_describe(value)}" for key, value in sorted(obj.items())) + "}"
+    if hasattr(obj, "__dict__") and not isinstance(obj, type):
+        attributes = ", ".join(
+            f"{key}={_describe(value)}" for key, value in sorted(vars(obj).items()) if not key.startswith("_")
+        )
+        return f"{type(obj).__module__}.{type(obj).__qualname__}({attributes})"
+    return repr(obj)
+
+
+def fingerprint(*config: Any) -> str:
+    """Hash of the pycodehash version and a configuration, e.g. a list of processors
+
+    Objects are described by their class and public attributes, so two equally configured
+    processor instances result in the same fingerprint.
+
+    Args:
+        config: objects that influence the cached values
+
+    Returns:
+        SHA256 hash string
+    """
+    return hash_string("\n".join([__version__, *(_describe(item) for item in config)]))
+
+
+class SQLiteCache:
+    """Persistent string-to-string store in a single SQLite table.
+
+    The database is created on first use. SQLite takes care of locking, so the
+    same cache file can be shared between processes. Within a process the
+    connection is guarded by a lock and can be shared between threads.
+    """
+
+    COLUMNS = "key TEXT PRIMARY KEY, value TEXT NOT NULL"
+
+    def __init__(self, path: str | Path, table: str = "cache"):
+        """Initialise the cache.
+
+        Args:
+            path: location of the SQLite database file
+            table: name of the table that holds the entries
+        """
+        self.path = Path(path)
+        self.table = table
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._connection.execute(f"CREATE TABLE IF NOT EXISTS {table} ({self.COLUMNS})")
+
+    def __getstate__(self) -> dict[str, Any]:
+        # the connection is re-opened when unpickled, e.g. in the worker processes of a process pool
+        return {"path": self.path, "table": self.table}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        # the state holds the arguments of `__init__`, see `__getstate__`
+        type(self).__init__(self, **state)
+
+    def get(self, key: str, default: str | None = None) -> str | None:
+        with self._lock:
+            row = self._connection.execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def __getitem__(self, key: str) -> str:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: str) -> None:
+        with self._lock:
+            self._connection.execute(f"REPLACE INTO {self.table} (key, value) VALUES (?, ?)", (key, value))
+
+    def __delitem__(self, key: str) -> None:
+        with self._lock:
+            self._connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute(f"DELETE FROM {self.table}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class LRUSQLiteCache(SQLiteCache):
+    """`SQLiteCache` that holds at most `max_entries`, evicting the least recently used entries.
+
+    To keep lookups cheap, the access times are written in batches, and the cache is trimmed
+    after every `max_entries // 10` insertions. Hence, the bound is approximate.
+    """
+
+    COLUMNS = "key TEXT PRIMARY KEY, value TEXT NOT NULL, accessed INTEGER NOT NULL"
+    # number of retrieved entries after which the access times are written
+    FLUSH_SIZE = 1000
+
+    def __init__(self, path: str | Path, table: str = "lru_cache", max_entries: int = 100_000):
+        """Initialise the cache.
+
+        Args:
+            path: location of the SQLite database file
+            table: name of the table that holds the entries
+            max_entries: the maximum number of entries
+        """
+        super().__init__(path, table=table)
+        self.max_entries = max_entries
+        self._accessed: dict[str, int] = {}
+        self._insertions = 0
+        self._connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed)")
+
+    def get(self, key: str, default: str | None = None) -> str | None:
+        value = super().get(key, default)
+        if value is not default:
+            with self._lock:
+                self._accessed[key] = time.time_ns()
+                flush = len(self._accessed) >= self.FLUSH_SIZE
+            if flush:
+                self.flush()
+        return value
+
+    def __setitem__(self, key: str, value: str) -> None:
+        with self._lock:
+            self._connection.execute(
+                f"REPLACE INTO {self.table} (key, value, accessed) VALUES (?, ?, ?)", (key, value, time.time_ns())
+            )
+            self._accessed.pop(key, None)
+            self._insertions += 1
+            evict = self._insertions >= max(1, self.max_entries // 10)
+        if evict:
+            self.evict()
+
+    def flush(self) -> None:
+        """Write the access times of the entries that were retrieved"""
+        with self._lock:
+            accessed, self._accessed = self._accessed, {}
+            if not accessed:
+                return
+            # a single transaction
+            with self._connection:
+                self._connection.execute("BEGIN")
+                self._connection.executemany(
+                    f"UPDATE {self.table} SET accessed = MAX(accessed, ?) WHERE key = ?",
+                    [(access_time, key) for key, access_time in accessed.items()],
+                )
+
+    def evict(self) -> None:
+        """Remove the least recently used entries in excess of `max_entries`"""
+        self.flush()
+        with self._lock:
+            self._insertions = 0
+            self._connection.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def close(self) -> None:
+        self.flush()
+        super().close()
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {**super().__getstate__(), "max_entries": self.max_entries}
@@ -0,0 +1,240 @@
+"""Command-line interface of pycodehash.
+
+The hashing commands accept any number of targets, as arguments or one per line on stdin, and share a single
+hasher. Every result is written as a line of JSON as soon as it is ready, e.g.:
+
+    {"target": "tliba.etl:combine_random_samples", "hash": "d02be820..."}
+    {"target": "missing.sql", "error": "FileNotFoundError: ..."}
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import logging
+import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+
+def _read_targets(targets: list[str]) -> Iterator[str]:
+    """The targets given as arguments, or read from stdin when there are none or for `-`"""
+    for target in targets or ["-"]:
+        if target == "-":
+            yield from (line.strip() for line in sys.stdin if line.strip())
+        else:
+            yield target
+
+
+def _try_hash(hash_target: Callable[[str], str], target: str) -> dict[str, Any]:
+    try:
+        return {"target": target, "hash": hash_target(target)}
+    except Exception as e:  # noqa: BLE001
+        return {"target": target, "error": f"{type(e).__name__}: {e}"}
+
+
+def _hash_targets(hash_target: Callable[[str], str], targets: Iterable[str], jobs: int) -> Iterator[dict[str, Any]]:
+    """Hash the targets, in a pool of threads when `jobs` is larger than one, in the order in which they finish
+
+    The targets are read as they are needed, at most `2 * jobs` targets are pending at a time.
+    """
+    if jobs <= 1:
+        for target in targets:
+            yield _try_hash(hash_target, target)
+        return
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        pending: set[Future[dict[str, Any]]] = set()
+        for target in targets:
+            pending.add(executor.submit(_try_hash, hash_target, target))
+            # only block on the pool when it is full, otherwise yield the results that are ready
+            done, pending = wait(pending, timeout=None if len(pending) >= 2 * jobs else 0, return_when=FIRST_COMPLETED)
+            yield from (future.result() for future in done)
+        for future in as_completed(pending):
+            yield future.result()
+
+
+def _hash_with_daemon(socket_path: str, kind: str, targets: Iterable[str], **options: Any) -> Iterator[dict[str, Any]]:
+    """Forward the targets to a running `pycodehash serve`"""
+    from pycodehash.daemon import HashingClient  # noqa: PLC0415
+
+    with HashingClient(socket_path) as client:
+        for target in targets:
+            # the daemon may run in another working directory
+            resolved = target if kind == "func" else str(Path(target).absolute())
+            [result] = client.hash([{"kind": kind, "target": resolved, **options}])
+            yield {"target": target, **result}
+
+
+def _func(args: argparse.Namespace, targets: Iterable[str]) -> Iterator[dict[str, Any]]:
+    from pycodehash import FunctionHashCache, FunctionHasher  # noqa: PLC0415
+    from pycodehash.python_function.cache import resolve_func_key  # noqa: PLC0415
+
+    for path in reversed(["."] if args.path is None else args.path):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    if args.socket is not None:
+        return _hash_with_daemon(args.socket, "func", targets)
+
+    hasher = FunctionHasher(
+        packages=args.packages,
+        cache=None if args.cache is None else FunctionHashCache(args.cache),
+        work_dir=args.work_dir,
+        lazy_analysis=args.lazy_analysis,
+        thread_safe=args.jobs > 1,
+    )
+    return _hash_targets(lambda target: hasher.hash_func(resolve_func_key(target)), targets, args.jobs)
+
+
+def _sql(args: argparse.Namespace, targets: Iterable[str]) -> Iterator[dict[str, Any]]:
+    if args.socket is not None:
+        return _hash_with_daemon(args.socket, "sql", targets)
+
+    from pycodehash.cache import LRUSQLiteCache  # noqa: PLC0415
+    from pycodehash.sql import SQLHasher  # noqa: PLC0415
+
+    hasher = SQLHasher(
+        dialect=args.dialect,
+        default_db=args.default_db,
+        cache=None if args.cache is None else LRUSQLiteCache(args.cache),
+    )
+    # parsing is CPU-bound, hence the files are hashed in a pool of processes
+    results = hasher.iter_hash_files(targets, workers=args.jobs if args.jobs > 1 else None)
+    return (
+        {"target": target, "hash": query_hash} if error is None else {"target": target, "error": error}
+        for target, query_hash, error in results
+    )
+
+
+def _local(kind: str) -> Callable[[argparse.Namespace, Iterable[str]], Iterator[dict[str, Any]]]:
+    def run(args: argparse.Namespace, targets: Iterable[str]) -> Iterator[dict[str, Any]]:
+        if args.socket is not None:
+            return _hash_with_daemon(args.socket, kind, targets, content=args.content)
+
+        from pycodehash.datasets.local import DATASET_HASHERS  # noqa: PLC0415
+
+        hasher = DATASET_HASHERS[kind][args.content]()
+        return _hash_targets(hasher.compute_hash, targets, args.jobs)
+
+    return run
+
+
+def _s3(args: argparse.Namespace, targets: Iterable[str]) -> Iterator[dict[str, Any]]:
+    from pycodehash.datasets._s3_client import new_s3_client  # noqa: PLC0415
+    from pycodehash.datasets.s3 import S3Hash  # noqa: PLC0415
+
+    # the client is shared by the threads
+    hasher = S3Hash(new_s3_client(max_pool_connections=max(args.jobs, 10)))
+    return _hash_targets(hasher.compute_hash, targets, args.jobs)
+
+
+def _deps(args: argparse.Namespace, targets: Iterable[str]) -> Iterator[dict[str, Any]]:
+    from pycodehash.dependency import PythonDependencyHash  # noqa: PLC0415
+
+    hasher = PythonDependencyHash()
+
+    def hash_dependency(dependency: str) -> str:
+        # `PythonDependencyHash` only hashes imported packages
+        importlib.import_module(dependency)
+        return hasher.compute_hash([dependency], add_python_version=args.python_version)
+
+    return _hash_targets(hash_dependency, targets, args.jobs)
+
+
+def _serve(args: argparse.Namespace) -> int:
+    # Unix domain sockets are not available on every platform, the daemon is only imported when it is used
+    from pycodehash.daemon import DEFAULT_SOCKET_PATH, serve  # noqa: PLC0415
+
+    serve(
+        args.socket or DEFAULT_SOCKET_PATH,
+        packages=args.packages,
+        work_dir=args.work_dir,
+        lazy_analysis=args.lazy_analysis,
+        sql_dialect=args.dialect,
+    )
+    return 0
+
+
+def _add_hash_command(  # noqa: PLR0913
+    subparsers: Any,
+    name: str,
+    help_text: str,
+    command: Callable[[argparse.Namespace, Iterable[str]], Iterator[dict[str, Any]]],
+    target_help: str,
+    *,
+    daemon: bool = True,
+) -> argparse.ArgumentParser:
+    parser = subparsers.add_parser(name, help=help_text)
+    parser.add_argument("targets", nargs="*", help=f"{target_help}, read from stdin (one per line) if omitted or `-`")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of targets that are hashed concurrently")
+    if daemon:
+        parser.add_argument("--socket", help="forward the targets to the daemon listening on this socket")
+    parser.set_defaults(func=_hash_command, command=command)
+    return parser
+
+
+def _hash_command(args: argparse.Namespace) -> int:
+    """Run a hashing command, writing the results as JSON lines to stdout.
+
+    Returns:
+        exit code 1 if one of the targets could not be hashed, 0 otherwise
+    """
+    failed = False
+    for result in args.command(args, _read_targets(args.targets)):
+        failed = failed or "error" in result
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+    return int(failed)
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="pycodehash", description="Hash Python functions, SQL and datasets.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log progress to stderr")
+    subparsers = parser.add_subparsers(dest="command_name", required=True)
+
+    func = _add_hash_command(subparsers, "func", "hash Python functions", _func, "functions as `module:qualname`")
+    func.add_argument("--path", action="append", help="directory to import the functions from (default: `.`)")
+    func.add_argument("--packages", nargs="*", help="packages to trace, by default the package of each function")
+    func.add_argument("--cache", help="path of a persistent cache of function hashes")
+    func.add_argument("--work-dir", help="persistent directory for the prepared package sources")
+    func.add_argument("--lazy-analysis", action="store_true", help="only analyze the modules that are traced")
+
+    sql = _add_hash_command(subparsers, "sql", "hash SQL files", _sql, "paths of SQL files")
+    sql.add_argument("--dialect", default="ansi", help="SQLFluff dialect of the SQL files")
+    sql.add_argument("--default-db", help="default database, which is omitted from the table references")
+    sql.add_argument("--cache", help="path of a persistent cache of query hashes")
+
+    for kind, help_text in [("file", "hash local files"), ("dir", "hash local directories")]:
+        local = _add_hash_command(subparsers, kind, help_text, _local(kind), f"paths of {help_text.split()[-1]}")
+        local.add_argument("--content", action="store_true", help="hash the contents instead of the metadata")
+
+    _add_hash_command(subparsers, "s3", "hash files or prefixes on S3", _s3, "paths `s3://bucket/key`", daemon=False)
+
+    deps = _add_hash_command(
+        subparsers, "deps", "hash the versions of Python dependencies", _deps, "package names", daemon=False
+    )
+    deps.add_argument("--python-version", action="store_true", help="include the Python version")
+
+    serve = subparsers.add_parser(
+        "serve", help="run a daemon that keeps the analysis of the packages warm, listening on a Unix socket"
+    )
+    serve.add_argument("--socket", help="path of the Unix domain socket, by default `.pycodehash.sock`")
+    serve.add_argument("--packages", nargs="*", help="packages to trace, by default the package of each function")
+    serve.add_argument("--work-dir", help="persistent directory for the prepared package sources")
+    serve.add_argument("--lazy-analysis", action="store_true", help="only analyze the modules that are traced")
+    serve.add_argument("--dialect", default="ansi", help="SQLFluff dialect of the SQL files")
+    serve.set_defaults(func=_serve)
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Entry point of the `pycodehash` command
+
+    Returns:
+        the exit code
+    """
+    args = get_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    return args.func(args)
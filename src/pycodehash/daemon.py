@@ -0,0 +1,252 @@
+"""Long-running hashing service that keeps the analysis of the traced packages warm.
+
+The service listens on a Unix domain socket. Every message is a line of JSON with a batch of requests,
+which is answered by a line of JSON with a result per request:
+
+    {"requests": [{"kind": "func", "target": "tliba.etl:combine_random_samples"}, {"kind": "sql", "target": "q.sql"}]}
+    {"results": [{"hash": "d02be820..."}, {"error": "FileNotFoundError: ..."}]}
+
+A connection can be used for any number of messages.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import errno
+import importlib
+import json
+import logging
+import socket
+import socketserver
+import sys
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable
+
+from pycodehash.datasets.local import DATASET_HASHERS
+from pycodehash.python_function.cache import resolve_func_key
+from pycodehash.python_function.hashing import FunctionHasher
+from pycodehash.python_function.watcher import SourceWatcher
+
+if TYPE_CHECKING:
+    from pycodehash.sql import SQLHasher
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET_PATH = ".pycodehash.sock"
+
+
+def _reload_module(path: str) -> None:
+    """Reload the imported module of a source file, such that functions that were added can be resolved"""
+    for module in list(sys.modules.values()):
+        if getattr(module, "__file__", None) == path:
+            try:
+                importlib.reload(module)
+            except Exception:  # noqa: BLE001
+                logger.warning("Could not reload %s", module.__name__, exc_info=True)
+
+
+class HashingService:
+    """Answers hashing requests with a single, warm, `FunctionHasher`, `SQLHasher` and dataset hashers.
+
+    Before every batch of requests, the hashes that depend on changed source files of the traced packages
+    are invalidated, see `FunctionHasher.invalidate`.
+    """
+
+    def __init__(
+        self,
+        packages: list[str] | None = None,
+        work_dir: str | Path | None = None,
+        lazy_analysis: bool = False,
+        sql_dialect: str = "ansi",
+    ):
+        """Initialise the service.
+
+        Args:
+            packages: packages to trace, see `FunctionHasher`
+            work_dir: persistent directory for the prepared package sources, see `FunctionHasher`
+            lazy_analysis: if True, only the traced modules are analyzed, see `FunctionHasher`
+            sql_dialect: SQLFluff dialect of the SQL files
+        """
+        self.sql_dialect = sql_dialect
+        self.function_hasher = FunctionHasher(
+            packages=packages, work_dir=work_dir, lazy_analysis=lazy_analysis, thread_safe=True
+        )
+        self.watcher = SourceWatcher(self.function_hasher)
+        self._sql_hasher: SQLHasher | None = None
+        self._sql_lock = threading.Lock()
+
+    @property
+    def sql_hasher(self) -> SQLHasher:
+        if self._sql_hasher is None:
+            # optional dependency
+            from pycodehash.sql import SQLHasher  # noqa: PLC0415
+
+            self._sql_hasher = SQLHasher(dialect=self.sql_dialect)
+        return self._sql_hasher
+
+    def handle(self, requests: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Answer a batch of requests.
+
+        Args:
+            requests: requests with a `kind` (`func`, `sql`, `file` or `dir`), a `target` (`module:qualname` or
+                path) and, for datasets, optionally `content` to hash the contents of the files
+
+        Returns:
+            for every request, either the `hash` or the `error`
+        """
+        self.check_sources()
+        results = [self._try_hash(request) for request in requests]
+        # watch the packages that were initialized
+        self.watcher.snapshot()
+        return results
+
+    def _try_hash(self, request: dict[str, Any]) -> dict[str, Any]:
+        try:
+            return {"hash": self.hash(request)}
+        except Exception as e:  # noqa: BLE001
+            return {"error": f"{type(e).__name__}: {e}"}
+
+    def hash(self, request: dict[str, Any]) -> str:
+        """Answer a single request, see `handle`.
+
+        Raises:
+            ValueError: when the kind of request is unknown
+        """
+        kind = request.get("kind")
+        target = request.get("target")
+        if not isinstance(target, str):
+            msg = f"Expected a `target` string, got {target!r}."
+            raise ValueError(msg)
+        if kind == "func":
+            return self.function_hasher.hash_func(resolve_func_key(target))
+        if kind == "sql":
+            # the lexer and parser of SQLFluff are not shared between threads
+            with self._sql_lock:
+                return self.sql_hasher.hash_file(target)
+        if kind in DATASET_HASHERS:
+            return DATASET_HASHERS[kind][bool(request.get("content", False))]().compute_hash(target)
+        msg = f"Unknown kind of request {kind!r}, expected one of `func`, `sql`, {', '.join(DATASET_HASHERS)}."
+        raise ValueError(msg)
+
+    def check_sources(self) -> list[str]:
+        """Invalidate the hashes that depend on changed source files of the traced packages.
+
+        Returns:
+            the paths of the source files that were added, removed or modified
+        """
+        changed = self.watcher.poll()
+        for path in changed:
+            _reload_module(path)
+        return changed
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: HashingServer
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            response: dict[str, Any]
+            try:
+                message = json.loads(line)
+                response = {"results": self.server.service.handle(message["requests"])}
+            except (ValueError, KeyError, TypeError) as e:
+                response = {"error": f"Invalid message: {e}"}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class HashingServer(socketserver.ThreadingUnixStreamServer):
+    """Serves a `HashingService` on a Unix domain socket, with a thread per connection"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str | Path, service: HashingService):
+        """Bind the server.
+
+        Args:
+            socket_path: path of the socket, a stale socket file is replaced
+            service: the service that answers the requests
+
+        Raises:
+            OSError: when another server is already serving on the socket
+        """
+        self.service = service
+        self.socket_path = Path(socket_path)
+        if self.socket_path.is_socket():
+            self._remove_stale_socket()
+        super().__init__(str(self.socket_path), _RequestHandler)
+
+    def _remove_stale_socket(self) -> None:
+        """Remove the socket file, unless a server still accepts connections on it"""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(str(self.socket_path))
+            except ConnectionRefusedError:
+                self.socket_path.unlink()
+                return
+        msg = f"A server is already serving on {self.socket_path}."
+        raise OSError(errno.EADDRINUSE, msg)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+
+
+def serve(socket_path: str | Path = DEFAULT_SOCKET_PATH, **kwargs: Any) -> None:
+    """Run a hashing service until interrupted.
+
+    Args:
+        socket_path: path of the Unix domain socket
+        kwargs: the configuration of the `HashingService`
+    """
+    with HashingServer(socket_path, HashingService(**kwargs)) as server:
+        logger.info("Listening on %s", socket_path)
+        with contextlib.suppress(KeyboardInterrupt):
+            server.serve_forever()
+
+
+class HashingClient:
+    """Client of a `HashingServer`, which keeps a connection open for subsequent requests"""
+
+    def __init__(self, socket_path: str | Path = DEFAULT_SOCKET_PATH, timeout: float | None = None):
+        """Connect to the server.
+
+        Args:
+            socket_path: path of the Unix domain socket of the server
+            timeout: in seconds, for each request
+        """
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(str(socket_path))
+        self._file = self._socket.makefile("rwb")
+
+    def hash(self, requests: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Send a batch of requests, see `HashingService.handle`.
+
+        Raises:
+            ValueError: when the server could not read the message
+
+        Returns:
+            for every request, either the `hash` or the `error`
+        """
+        self._file.write(json.dumps({"requests": requests}).encode("utf-8") + b"\n")
+        self._file.flush()
+        response = json.loads(self._file.readline())
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response["results"]
+
+    def hash_funcs(self, func_keys: Iterable[str]) -> list[dict[str, Any]]:
+        """Hash functions by their `module:qualname`"""
+        return self.hash([{"kind": "func", "target": func_key} for func_key in func_keys])
+
+    def close(self) -> None:
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self) -> HashingClient:
+        return self
+
+    def __exit__(self, _: Any, __: Any, ___: Any) -> None:
+        self.close()
@@ -1,6 +1,24 @@
 """Embarrassingly fast approximate hashes for specific datasets"""
 
 from pycodehash.datasets.approximate_hasher import ApproximateHasher, PartitionedApproximateHasher
-from pycodehash.datasets.local import LocalDirectoryHash, LocalFileHash, LocalFilesHash
+from pycodehash.datasets.local import (
+    IncrementalDirectoryHash,
+    LocalDirectoryContentHash,
+    LocalDirectoryHash,
+    LocalFileContentHash,
+    LocalFileHash,
+    LocalFilesHash,
+    MerkleNode,
+)
 
-__all__ = ["LocalFileHash", "LocalFilesHash", "LocalDirectoryHash", "ApproximateHasher", "PartitionedApproximateHasher"]
+__all__ = [
+    "LocalFileHash",
+    "LocalFilesHash",
+    "LocalDirectoryHash",
+    "LocalFileContentHash",
+    "LocalDirectoryContentHash",
+    "MerkleNode",
+    "IncrementalDirectoryHash",
+    "ApproximateHasher",
+    "PartitionedApproximateHasher",
+]
@@ -7,6 +7,7 @@ from copy import deepcopy
 from typing import Any
 
 import boto3
+from botocore.config import Config
 
 
 def _from_env_var(*args, default: dict[str, Any] | None = None):
@@ -20,7 +21,9 @@ class S3ClientFactory:
     def __init__(self, credentials: dict[str, Any] | None = None):
         self.creds = deepcopy(credentials)
 
-    def new(self, clean: bool = False, credentials: dict[str, Any] | None = None) -> boto3.client.S3:
+    def new(
+        self, clean: bool = False, credentials: dict[str, Any] | None = None, max_pool_connections: int | None = None
+    ) -> boto3.client.S3:
         creds = deepcopy(credentials) if credentials else self.creds
         if creds is None or clean:
             # revert to default AWS environment variables, for endpoint, region, session, access.
@@ -32,15 +35,22 @@ class S3ClientFactory:
                 "aws_session_token": _from_env_var("AWS_SESSION_TOKEN"),
             }
             creds = self.creds
+        if max_pool_connections is not None:
+            # boto3 clients are thread-safe, a single client can be shared by this many threads
+            return boto3.client("s3", config=Config(max_pool_connections=max_pool_connections), **creds)
         return boto3.client("s3", **creds)
 
-    def __call__(self, clean: bool = False, credentials: dict[str, Any] | None = None) -> boto3.Session.client:
-        return self.new(clean=clean, credentials=credentials)
+    def __call__(
+        self, clean: bool = False, credentials: dict[str, Any] | None = None, max_pool_connections: int | None = None
+    ) -> boto3.Session.client:
+        return self.new(clean=clean, credentials=credentials, max_pool_connections=max_pool_connections)
 
 
 _s3_client = S3ClientFactory()
 
 
-def new_s3_client(clean: bool = False, credentials: dict[str, Any] | None = None) -> boto3.client.S3:
+def new_s3_client(
+    clean: bool = False, credentials: dict[str, Any] | None = None, max_pool_connections: int | None = None
+) -> boto3.client.S3:
     """Get new connection to S3."""
-    return _s3_client(clean=clean, credentials=credentials)
+    return _s3_client(clean=clean, credentials=credentials, max_pool_connections=max_pool_connections)
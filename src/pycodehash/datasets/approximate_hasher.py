@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
+import asyncio
+import functools
 from abc import ABC, abstractmethod
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
 from typing import Any
 
 from pycodehash.hashing import hash_string
@@ -30,25 +33,51 @@ class ApproximateHasher(ABC):
     def collect_metadata(self, *args, **kwargs) -> dict[str, Any]:
         """Collect metadata used for hashing"""
 
-    def compute_hash(self, *args, **kwargs) -> str:
-        metadata = self.collect_metadata(*args, **kwargs)
+    def hash_metadata(self, metadata: dict[str, Any]) -> str:
+        """Compute the hash from the collected metadata"""
         if self.METADATA is not None:
             metadata = {key: value for key, value in metadata.items() if key in self.METADATA}
         inlined_metadata = inline_metadata(metadata)
         return hash_string(inlined_metadata)
 
+    def compute_hash(self, *args, **kwargs) -> str:
+        return self.hash_metadata(self.collect_metadata(*args, **kwargs))
+
+    async def acollect_metadata(self, *args, **kwargs) -> dict[str, Any]:
+        """Collect metadata without blocking the event loop, by running `collect_metadata` in the default executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.collect_metadata, *args, **kwargs))
+
+    async def acompute_hash(self, *args, **kwargs) -> str:
+        """Async counterpart of `compute_hash`"""
+        return self.hash_metadata(await self.acollect_metadata(*args, **kwargs))
+
 
 class PartitionedApproximateHasher(ApproximateHasher):
     """Compute the hash of multiple objects"""
 
-    def __init__(self, hasher: ApproximateHasher):
+    def __init__(self, hasher: ApproximateHasher, max_workers: int | None = None):
+        """Initialization of PartitionedApproximateHasher
+
+        Args:
+            hasher: hasher for the individual partitions
+            max_workers: if set, the partitions are hashed concurrently in a thread pool of this size.
+                Collecting metadata is typically I/O bound (e.g. `stat` calls on network file systems).
+                For `acompute_hash`, this limits the number of partitions that are hashed concurrently.
+        """
         self.hasher = hasher
+        self.max_workers = max_workers
 
     @abstractmethod
-    def collect_partitions(self, *args, **kwargs) -> list[str] | dict[str, str]:
-        """Collect partitions (key, value) or list of keys for hashing"""
+    def collect_partitions(self, *args, **kwargs) -> list[str] | dict[str, Any]:
+        """Collect partitions (key, value) or list of keys for hashing, the values are passed to the hasher"""
 
     def _hash_partitions(self, partitions: list[str] | dict[str, Any]):
+        if self.max_workers is not None:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = self._submit_partitions(partitions, executor)
+                return self._collect_results(futures)
+
         if isinstance(partitions, list):
             partitions = dict(zip(partitions, partitions))
 
@@ -59,6 +88,49 @@ class PartitionedApproximateHasher(ApproximateHasher):
             for partition_key, partition_value in partitions.items()
         }
 
+    def _submit_partitions(self, partitions: list[str] | dict[str, Any], executor: Executor) -> dict[str, Any]:
+        """Submit the hashing of all (nested) partitions, before waiting for any result."""
+        if isinstance(partitions, list):
+            partitions = dict(zip(partitions, partitions))
+
+        return {
+            partition_key: executor.submit(self.hasher.compute_hash, partition_value)
+            if not isinstance(partition_value, dict)
+            else self._submit_partitions(partition_value, executor)
+            for partition_key, partition_value in partitions.items()
+        }
+
+    def _collect_results(self, futures: dict[str, Future | dict]) -> dict[str, Any]:
+        return {
+            partition_key: future.result() if isinstance(future, Future) else self._collect_results(future)
+            for partition_key, future in futures.items()
+        }
+
     def collect_metadata(self, *args, **kwargs) -> dict[str, Any]:
         partitions = self.collect_partitions(*args, **kwargs)
         return self._hash_partitions(partitions)
+
+    async def _ahash_partitions(
+        self, partitions: list[str] | dict[str, Any], semaphore: asyncio.Semaphore | None = None
+    ) -> dict[str, Any]:
+        """Async counterpart of `_hash_partitions`, all (nested) partitions are gathered at once."""
+        if semaphore is None and self.max_workers is not None:
+            semaphore = asyncio.Semaphore(self.max_workers)
+        if isinstance(partitions, list):
+            partitions = dict(zip(partitions, partitions))
+
+        async def hash_partition(partition_value: Any) -> Any:
+            if isinstance(partition_value, dict):
+                return await self._ahash_partitions(partition_value, semaphore)
+            if semaphore is None:
+                return await self.hasher.acompute_hash(partition_value)
+            async with semaphore:
+                return await self.hasher.acompute_hash(partition_value)
+
+        hashes = await asyncio.gather(*map(hash_partition, partitions.values()))
+        return dict(zip(partitions.keys(), hashes))
+
+    async def acollect_metadata(self, *args, **kwargs) -> dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        partitions = await loop.run_in_executor(None, functools.partial(self.collect_partitions, *args, **kwargs))
+        return await self._ahash_partitions(partitions)
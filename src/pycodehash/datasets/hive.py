@@ -1,9 +1,15 @@
 from __future__ import annotations
 
 import logging
+from dataclasses import dataclass
+from functools import reduce
 from typing import TYPE_CHECKING, Any
+from urllib.parse import unquote
 
 import pyspark
+from py4j.protocol import Py4JError, Py4JJavaError
+from pyspark.sql import DataFrame
+from pyspark.sql import functions as F  # noqa: N812
 
 if hasattr(pyspark, "errors"):
     from pyspark.errors.exceptions.captured import AnalysisException
@@ -14,11 +20,30 @@ else:
 if TYPE_CHECKING:
     from pyspark.sql import SparkSession
 
-from pycodehash.datasets.approximate_hasher import ApproximateHasher
+from pycodehash.datasets.approximate_hasher import ApproximateHasher, PartitionedApproximateHasher
 
 logger = logging.getLogger(__name__)
 
 
+# table metadata that is used for hashing, as reported by `DESCRIBE FORMATTED`
+TABLE_METADATA = ["Created Time", "Statistics"]
+_PARTITION_INFORMATION = "# Partition Information"
+
+
+def _describe(spark: SparkSession, query: str, keys: list[str]) -> DataFrame:
+    """Run a `DESCRIBE` query, filtered on the rows of interest on the Spark side (without pandas)"""
+    return spark.sql(query).filter(F.col("col_name").isin(keys)).select("col_name", "data_type")
+
+
+def _warn_partitioned(table_name: str) -> None:
+    logger.warning(
+        "The Hive table %s is partitioned. "
+        "It is recommended to hash each partition to deal with incremental load, "
+        "see `PartitionedHiveTableHash`.",
+        table_name,
+    )
+
+
 class HiveTableHash(ApproximateHasher):
     """Fast approximate hash for spark hive tables"""
 
@@ -28,22 +53,213 @@ class HiveTableHash(ApproximateHasher):
 
     def collect_metadata(self, table_name: str) -> dict[str, Any]:
         try:
-            data = self.spark.sql(f"DESCRIBE FORMATTED {table_name}").toPandas()
+            rows = _describe(
+                self.spark, f"DESCRIBE FORMATTED {table_name}", [*TABLE_METADATA, _PARTITION_INFORMATION]
+            ).collect()
         except AnalysisException:
             logger.error("Could not get table metadata")
             return {}
 
-        # DataFrame logging for debugging
-        logger.debug("%s", data)
+        # logging for debugging
+        logger.debug("%s", rows)
+
+        metadata = {row["col_name"]: row["data_type"] for row in rows}
+        if metadata.pop(_PARTITION_INFORMATION, None) is not None:
+            _warn_partitioned(table_name)
+        return metadata
+
+
+class HiveTablesHash(PartitionedApproximateHasher):
+    """Fast approximate hash for a list of spark hive tables, of which the metadata is collected at once"""
+
+    def __init__(self, spark: SparkSession):
+        super().__init__(HiveTableHash(spark))
+        self.spark = spark
+
+    @staticmethod
+    def collect_partitions(table_names: list[str]) -> list[str]:
+        return table_names
+
+    def _describe_table(self, table_name: str) -> DataFrame | None:
+        keys = [*TABLE_METADATA, _PARTITION_INFORMATION]
+        try:
+            df = _describe(self.spark, f"DESCRIBE FORMATTED {table_name}", keys)
+        except AnalysisException:
+            logger.error("Could not get table metadata of %s", table_name)
+            return None
+        return df.withColumn("table_name", F.lit(table_name))
+
+    def collect_metadata(self, table_names: list[str]) -> dict[str, Any]:
+        """Collect the hash of every table, with a single `collect` of the union of the `DESCRIBE` results
+
+        Tables of which the metadata cannot be described get the hash of empty metadata, as in `HiveTableHash`.
+        """
+        described = [df for df in (self._describe_table(table_name) for table_name in table_names) if df is not None]
+
+        metadata: dict[str, dict[str, Any]] = {table_name: {} for table_name in table_names}
+        if described:
+            for row in reduce(DataFrame.union, described).collect():
+                metadata[row["table_name"]][row["col_name"]] = row["data_type"]
+
+        for table_name, table_metadata in metadata.items():
+            if table_metadata.pop(_PARTITION_INFORMATION, None) is not None:
+                _warn_partitioned(table_name)
+        return {
+            table_name: self.hasher.hash_metadata(table_metadata) for table_name, table_metadata in metadata.items()
+        }
+
+
+# partition metadata that is used for hashing, as reported by `DESCRIBE FORMATTED ... PARTITION`
+# (the parameters include the time of the last write, the statistics are only present if they were computed)
+PARTITION_METADATA = ["Created Time", "Partition Parameters", "Partition Statistics"]
+
+
+def _partition_name(spec: dict[str, str]) -> str:
+    return "/".join(f"{column}={value}" for column, value in spec.items())
+
+
+def _escape(value: str) -> str:
+    """Escape the characters of a partition value that have a meaning in a partition path"""
+    return value.replace("%", "%25").replace("/", "%2F").replace("=", "%3D")
+
+
+def _partition_clause(spec: dict[str, str]) -> str:
+    values = ", ".join(
+        "{}='{}'".format(column, value.replace("\\", "\\\\").replace("'", "\\'")) for column, value in spec.items()
+    )
+    return f"PARTITION ({values})"
+
+
+@dataclass(frozen=True)
+class HivePartition:
+    """Partition of a Hive table, with its metadata if it was fetched from the catalog already"""
+
+    table_name: str
+    spec: tuple[tuple[str, str], ...]
+    metadata: tuple[tuple[str, str], ...] | None = None
+
+    @property
+    def name(self) -> str:
+        return _partition_name(dict(self.spec))
+
+
+class HivePartitionHash(ApproximateHasher):
+    """Fast approximate hash for a partition of a spark hive table"""
+
+    METADATA = PARTITION_METADATA
+
+    def __init__(self, spark: SparkSession):
+        self.spark = spark
+        super().__init__()
+
+    def collect_metadata(self, partition: HivePartition) -> dict[str, Any]:
+        if partition.metadata is not None:
+            return dict(partition.metadata)
+
+        query = f"DESCRIBE FORMATTED {partition.table_name} {_partition_clause(dict(partition.spec))}"
+        try:
+            rows = _describe(self.spark, query, PARTITION_METADATA).collect()
+        except AnalysisException:
+            logger.error("Could not get partition metadata")
+            return {}
+        return {row["col_name"]: row["data_type"] for row in rows}
+
+
+class PartitionedHiveTableHash(PartitionedApproximateHasher):
+    """Fast approximate hash per partition of a spark hive table
+
+    The metadata of all partitions is fetched with a single call to the catalog of the Spark session.
+    When the catalog cannot be accessed (e.g. with Spark Connect), the partitions are listed with
+    `SHOW PARTITIONS` and described one by one instead.
+    """
+
+    def __init__(self, spark: SparkSession, max_workers: int | None = None):
+        """Initialization of PartitionedHiveTableHash
+
+        Args:
+            spark: the spark session
+            max_workers: if set, partitions that are described one by one are queried concurrently
+        """
+        super().__init__(HivePartitionHash(spark), max_workers=max_workers)
+        self.spark = spark
+
+    def collect_partitions(
+        self,
+        table_name: str,
+        partial_spec: dict[str, str] | None = None,
+        start: str | None = None,
+        end: str | None = None,
+    ) -> dict[str, HivePartition]:
+        """Collect the partitions of a table
+
+        Args:
+            table_name: name of the table, optionally with database
+            partial_spec: only the partitions matching these partition values, e.g. `{"country": "NL"}`
+            start: only the partitions with a name (e.g. `date=2024-01-01`) from this value (inclusive)
+            end: only the partitions with a name up to this value (exclusive)
+
+        Returns:
+            the partitions by name, sorted
+        """
+        try:
+            partitions = self._list_catalog_partitions(table_name, partial_spec)
+        except Py4JJavaError:
+            # raised by the catalog, e.g. when the table does not exist
+            raise
+        except (AttributeError, Py4JError):
+            logger.warning("Catalog of the Spark session is not available, using SHOW PARTITIONS", exc_info=True)
+            partitions = self._show_partitions(table_name, partial_spec)
+
+        return {
+            partition.name: partition
+            for partition in sorted(partitions, key=lambda partition: partition.name)
+            if (start is None or partition.name >= start) and (end is None or partition.name < end)
+        }
+
+    def _list_catalog_partitions(self, table_name: str, partial_spec: dict[str, str] | None) -> list[HivePartition]:
+        """List the partitions with their metadata, with a single call to the session catalog via the JVM"""
+        jvm = self.spark._jvm  # noqa: SLF001
+        if jvm is None:
+            msg = "The Spark session has no JVM"
+            raise AttributeError(msg)
+        session_state = self.spark._jsparkSession.sessionState()  # noqa: SLF001
+        converters = jvm.scala.collection.JavaConverters
+        table = session_state.sqlParser().parseTableIdentifier(table_name)
+        catalog = session_state.catalog()
+        columns = converters.seqAsJavaListConverter(catalog.getTableMetadata(table).partitionColumnNames()).asJava()
+
+        spec = jvm.scala.Option.empty()
+        if partial_spec:
+            fragment = _partition_name({column: _escape(value) for column, value in partial_spec.items()})
+            spec = jvm.scala.Some(
+                jvm.org.apache.spark.sql.execution.datasources.PartitioningUtils.parsePathFragment(fragment)
+            )
 
-        if not data[data["col_name"] == "# Partition Information"].empty:
-            logger.warning(
-                "The Hive table is partitioned. "
-                "It is recommended to hash each partition to deal with incremental load."
+        partitions = []
+        for partition in converters.seqAsJavaListConverter(catalog.listPartitions(table, spec)).asJava():
+            values = dict(converters.mapAsJavaMapConverter(partition.spec()).asJava())
+            # same keys as `DESCRIBE FORMATTED ... PARTITION`
+            metadata = dict(converters.mapAsJavaMapConverter(partition.toLinkedHashMap()).asJava())
+            partitions.append(
+                HivePartition(
+                    table_name,
+                    tuple((column, values[column]) for column in columns),
+                    tuple((key, metadata[key]) for key in PARTITION_METADATA if key in metadata),
+                )
             )
+        return partitions
 
-        # Select relevant columns
-        data = data[data["col_name"].isin(["Created Time", "Statistics"])]
+    def _show_partitions(self, table_name: str, partial_spec: dict[str, str] | None) -> list[HivePartition]:
+        """List the partitions with `SHOW PARTITIONS`, their metadata is collected per partition"""
+        query = f"SHOW PARTITIONS {table_name}"
+        if partial_spec:
+            query += f" {_partition_clause(partial_spec)}"
 
-        # Convert to dict
-        return data.set_index("col_name").to_dict()["data_type"]
+        partitions = []
+        for row in self.spark.sql(query).collect():
+            spec = []
+            for value in row[0].split("/"):
+                column, column_value = value.split("=", 1)
+                spec.append((unquote(column), unquote(column_value)))
+            partitions.append(HivePartition(table_name, tuple(spec)))
+        return partitions
@@ -1,10 +1,21 @@
 from __future__ import annotations
 
+import asyncio
+import os
+import stat
+import struct
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
+from operator import attrgetter, itemgetter
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator, NamedTuple
 
-from pycodehash.datasets.approximate_hasher import ApproximateHasher, PartitionedApproximateHasher
+from pycodehash.datasets.approximate_hasher import ApproximateHasher, PartitionedApproximateHasher, inline_metadata
+from pycodehash.hashing import hash_file_full, hash_string
+
+# same default as `concurrent.futures.ThreadPoolExecutor`
+DEFAULT_MAX_WORKERS = min(32, (os.cpu_count() or 1) + 4)
 
 
 class LocalFileHash(ApproximateHasher):
@@ -15,35 +26,333 @@ class LocalFileHash(ApproximateHasher):
     METADATA = ["size"]
 
     @staticmethod
-    def collect_metadata(path: str | Path) -> dict[str, Any]:
-        path = Path(path)
-        if path.is_dir():
+    def collect_metadata(path: str | Path | os.DirEntry) -> dict[str, Any]:
+        """Collect the metadata with a single `stat` call.
+
+        Args:
+            path: path to the file, or a `DirEntry` from `os.scandir` to reuse its cached `stat` result
+        """
+        file_stat = path.stat() if isinstance(path, os.DirEntry) else Path(path).stat()
+        if stat.S_ISDIR(file_stat.st_mode):
             msg = "Directories not supported. Please use `LocalDirectoryHash`"
             raise TypeError(msg)
 
-        last_modified = datetime.fromtimestamp(path.stat().st_mtime)
-        file_size = path.stat().st_size
+        last_modified = datetime.fromtimestamp(file_stat.st_mtime)
+        file_size = file_stat.st_size
 
         return {"last_modified": last_modified, "size": file_size}
 
 
+def _scan_files(path: str | Path, prefix: str = "") -> Iterator[tuple[str, os.DirEntry]]:
+    """Recursively find the files in a directory with `os.scandir`, without following symlinked directories.
+
+    Yields:
+        path relative to the directory and the `DirEntry` of each file
+    """
+    with os.scandir(path) as entries:
+        for entry in entries:
+            relative_path = f"{prefix}{entry.name}"
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scan_files(entry.path, f"{relative_path}{os.sep}")
+            elif entry.is_file():
+                yield relative_path, entry
+
+
 class LocalDirectoryHash(PartitionedApproximateHasher):
     """Recursively find files in the provided directory and compute the hash for each of the files."""
 
-    def __init__(self):
-        super().__init__(LocalFileHash())
+    def __init__(self, max_workers: int | None = None):
+        """Initialization of LocalDirectoryHash
+
+        Args:
+            max_workers: if set, the files are stat-ed concurrently in a thread pool of this size
+        """
+        super().__init__(LocalFileHash(), max_workers=max_workers)
 
     @staticmethod
-    def collect_partitions(path: Path) -> dict[str, str]:
-        return {
-            str(file_path.relative_to(path)): str(file_path) for file_path in path.rglob("*") if file_path.is_file()
-        }
+    def collect_partitions(path: str | Path) -> dict[str, str]:
+        return {relative_path: entry.path for relative_path, entry in sorted(_scan_files(path), key=itemgetter(0))}
+
+    @staticmethod
+    def _scan_partitions(path: str | Path) -> dict[str, os.DirEntry]:
+        # the directory entries are hashed directly, such that the file type and stat are obtained from the scan
+        return dict(sorted(_scan_files(path), key=itemgetter(0)))
+
+    def collect_metadata(self, path: str | Path) -> dict[str, Any]:
+        return self._hash_partitions(self._scan_partitions(path))
+
+    async def acollect_metadata(self, path: str | Path) -> dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        partitions = await loop.run_in_executor(None, self._scan_partitions, path)
+        return await self._ahash_partitions(partitions)
 
 
 class LocalFilesHash(PartitionedApproximateHasher):
-    def __init__(self):
-        super().__init__(LocalFileHash())
+    def __init__(self, max_workers: int | None = None):
+        """Initialization of LocalFilesHash
+
+        Args:
+            max_workers: if set, the files are stat-ed concurrently in a thread pool of this size
+        """
+        super().__init__(LocalFileHash(), max_workers=max_workers)
 
     @staticmethod
     def collect_partitions(files: list[str] | dict[str, str]) -> list[str] | dict[str, str]:
         return files
+
+
+class LocalFileContentHash(ApproximateHasher):
+    """Exact hash of the contents of a local file"""
+
+    @staticmethod
+    def collect_metadata(path: str | Path | os.DirEntry) -> dict[str, Any]:
+        return {"hash": hash_file_full(os.fspath(path))}
+
+    @staticmethod
+    def hash_metadata(metadata: dict[str, Any]) -> str:
+        return metadata["hash"]
+
+
+@dataclass
+class MerkleNode:
+    """Node of a Merkle tree of a directory.
+
+    Files are leaves, with the SHA256 hash of their contents as digest. The digest of a directory is the
+    hash of the names and digests of its children, such that a change anywhere in the tree changes the
+    digest of all directories containing it.
+    """
+
+    digest: str
+    children: dict[str, MerkleNode] | None = field(default=None)
+
+    @property
+    def is_dir(self) -> bool:
+        return self.children is not None
+
+    @classmethod
+    def from_hashes(cls, hashes: dict[str, Any]) -> MerkleNode:
+        """Build the tree from nested dictionaries of file hashes, as returned by `LocalDirectoryContentHash`"""
+        children = {
+            name: cls.from_hashes(value) if isinstance(value, dict) else cls(value) for name, value in hashes.items()
+        }
+        # directories get a trailing separator, to distinguish them from files
+        inlined = inline_metadata({f"{name}/" if node.is_dir else name: node.digest for name, node in children.items()})
+        return cls(hash_string(inlined), children)
+
+    def diff(self, other: MerkleNode, prefix: str = "") -> list[str]:
+        """Find the paths that differ between two trees.
+
+        Subtrees with equal digests are skipped. Files and directories that were added, removed or changed
+        type are reported as a whole, for changed files only the file itself is reported.
+
+        Args:
+            other: the tree to compare to
+            prefix: prefix for the returned paths
+
+        Returns:
+            sorted list of the changed paths, relative to this tree
+        """
+        if self.digest == other.digest:
+            return []
+        children, other_children = self.children, other.children
+        if children is None or other_children is None:
+            return [prefix.rstrip("/")]
+
+        changed = []
+        for name in sorted(children.keys() | other_children.keys()):
+            if name not in children or name not in other_children:
+                changed.append(f"{prefix}{name}")
+            else:
+                changed += children[name].diff(other_children[name], f"{prefix}{name}/")
+        return changed
+
+
+def _scan_tree(path: str | Path) -> dict[str, Any]:
+    """Nested dictionaries of the `DirEntry` of each file, per subdirectory, without following symlinked directories"""
+    tree: dict[str, dict[str, Any] | os.DirEntry] = {}
+    with os.scandir(path) as entries:
+        for entry in sorted(entries, key=attrgetter("name")):
+            if entry.is_dir(follow_symlinks=False):
+                tree[entry.name] = _scan_tree(entry.path)
+            elif entry.is_file():
+                tree[entry.name] = entry
+    return tree
+
+
+class LocalDirectoryContentHash(PartitionedApproximateHasher):
+    """Exact hash of a directory, based on the contents of all files in it.
+
+    Drop-in replacement for `LocalDirectoryHash` when metadata is not reliable enough. The files are read
+    concurrently, and the hash is the root digest of the Merkle tree of the directory (see `collect_tree`).
+    """
+
+    def __init__(self, max_workers: int | None = DEFAULT_MAX_WORKERS):
+        """Initialization of LocalDirectoryContentHash
+
+        Args:
+            max_workers: number of threads reading files, set to None to read the files sequentially
+        """
+        super().__init__(LocalFileContentHash(), max_workers=max_workers)
+
+    @staticmethod
+    def collect_partitions(path: str | Path) -> dict[str, Any]:
+        """Collect the files per subdirectory, as nested dictionaries"""
+
+        def to_paths(tree: dict[str, Any]) -> dict[str, Any]:
+            return {name: to_paths(value) if isinstance(value, dict) else value.path for name, value in tree.items()}
+
+        return to_paths(_scan_tree(path))
+
+    def collect_metadata(self, path: str | Path) -> dict[str, Any]:
+        """Nested dictionaries with the content hash of every file, per subdirectory"""
+        return self._hash_partitions(_scan_tree(path))
+
+    async def acollect_metadata(self, path: str | Path) -> dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        return await self._ahash_partitions(await loop.run_in_executor(None, _scan_tree, path))
+
+    def collect_tree(self, path: str | Path) -> MerkleNode:
+        """Compute the Merkle tree of the directory, use `MerkleNode.diff` to find out what changed"""
+        return MerkleNode.from_hashes(self.collect_metadata(path))
+
+    @staticmethod
+    def hash_metadata(metadata: dict[str, Any]) -> str:
+        return MerkleNode.from_hashes(metadata).digest
+
+
+# manifest file: header (magic, version, content flag, scan time in ns, number of entries),
+# followed by one record (size, mtime_ns, inode, length of the path) + path + digest per file
+_MANIFEST_MAGIC = b"PCHM"
+_MANIFEST_HEADER = struct.Struct("<4sBBqQ")
+_MANIFEST_RECORD = struct.Struct("<QqQH")
+_DIGEST_SIZE = 32
+# files modified less than this before the scan are re-hashed on the next call (cf. "racy git")
+_RACY_MARGIN_NS = 2_000_000_000
+
+
+class ManifestEntry(NamedTuple):
+    """The stat result and hash of a file in the manifest"""
+
+    size: int
+    mtime_ns: int
+    inode: int
+    digest: str
+
+
+def read_manifest(manifest_path: str | Path, content: bool) -> dict[str, ManifestEntry]:
+    """Read a manifest written by `write_manifest`.
+
+    Entries modified shortly before (or after) the scan that produced the manifest are dropped: their
+    modification time cannot distinguish them from later changes within the resolution of the file system
+    clock.
+
+    Args:
+        manifest_path: path to the manifest
+        content: whether the hashes in the manifest should be content hashes
+
+    Returns:
+        mapping of relative path to manifest entry, empty if the manifest does not exist,
+        is invalid, or was written for the other hashing mode
+    """
+    try:
+        data = Path(manifest_path).read_bytes()
+        magic, version, is_content, scan_ns, n_entries = _MANIFEST_HEADER.unpack_from(data)
+    except (OSError, struct.error):
+        return {}
+    if magic != _MANIFEST_MAGIC or version != 1 or bool(is_content) != content:
+        return {}
+
+    entries: dict[str, ManifestEntry] = {}
+    offset = _MANIFEST_HEADER.size
+    try:
+        for _ in range(n_entries):
+            size, mtime_ns, inode, path_length = _MANIFEST_RECORD.unpack_from(data, offset)
+            offset += _MANIFEST_RECORD.size
+            relative_path = data[offset : offset + path_length].decode("utf-8", "surrogateescape")
+            offset += path_length
+            digest = data[offset : offset + _DIGEST_SIZE].hex()
+            offset += _DIGEST_SIZE
+            if mtime_ns < scan_ns - _RACY_MARGIN_NS:
+                entries[relative_path] = ManifestEntry(size, mtime_ns, inode, digest)
+    except struct.error:
+        return {}
+    return entries
+
+
+def write_manifest(manifest_path: str | Path, entries: dict[str, ManifestEntry], content: bool, scan_ns: int) -> None:
+    """Atomically write the manifest entry of each file to a compact binary manifest
+
+    Args:
+        manifest_path: path to the manifest
+        entries: mapping of relative path to manifest entry
+        content: whether the hashes are content hashes
+        scan_ns: time at which the directory scan started, see `read_manifest`
+    """
+    chunks = [_MANIFEST_HEADER.pack(_MANIFEST_MAGIC, 1, content, scan_ns, len(entries))]
+    for relative_path, (size, mtime_ns, inode, digest) in entries.items():
+        encoded_path = relative_path.encode("utf-8", "surrogateescape")
+        chunks += [_MANIFEST_RECORD.pack(size, mtime_ns, inode, len(encoded_path)), encoded_path, bytes.fromhex(digest)]
+
+    path = Path(manifest_path)
+    temp_path = path.with_name(f"{path.name}.tmp")
+    temp_path.write_bytes(b"".join(chunks))
+    temp_path.replace(path)
+
+
+class IncrementalDirectoryHash(PartitionedApproximateHasher):
+    """Hash of a directory that only re-hashes the files that changed since the previous call.
+
+    The size, modification time, inode and hash of every file are persisted in a manifest. Files of which
+    the `stat` result did not change reuse the hash from the manifest. The hash is the same as that of a
+    full recompute: `LocalDirectoryHash` or, with `content=True`, the content hashes of the files.
+    """
+
+    def __init__(self, manifest_path: str | Path, content: bool = False, max_workers: int | None = None):
+        """Initialization of IncrementalDirectoryHash
+
+        Args:
+            manifest_path: path to the manifest, which is created if it does not exist
+            content: hash the contents of the changed files (`hash_file_full`) instead of their metadata
+            max_workers: if set, the changed files are hashed concurrently in a thread pool of this size
+        """
+        super().__init__(LocalFileContentHash() if content else LocalFileHash(), max_workers=max_workers)
+        self.manifest_path = manifest_path
+        self.content = content
+
+    @staticmethod
+    def collect_partitions(path: str | Path) -> dict[str, str]:
+        return LocalDirectoryHash.collect_partitions(path)
+
+    async def acollect_metadata(self, path: str | Path) -> dict[str, Any]:
+        # the manifest is read and written as a whole, the scan runs in a single call in the executor
+        return await ApproximateHasher.acollect_metadata(self, path)
+
+    def collect_metadata(self, path: str | Path) -> dict[str, Any]:
+        manifest = read_manifest(self.manifest_path, self.content)
+        scan_ns = time.time_ns()
+
+        entries: dict[str, ManifestEntry] = {}
+        changed: dict[str, os.DirEntry] = {}
+        stat_keys: dict[str, tuple[int, int, int]] = {}
+        for relative_path, entry in sorted(_scan_files(path), key=itemgetter(0)):
+            file_stat = entry.stat()
+            stat_key = (file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino)
+            previous = manifest.get(relative_path)
+            if previous is not None and previous[:3] == stat_key:
+                entries[relative_path] = previous
+            else:
+                stat_keys[relative_path] = stat_key
+                changed[relative_path] = entry
+
+        for relative_path, digest in self._hash_partitions(changed).items():
+            entries[relative_path] = ManifestEntry(*stat_keys[relative_path], digest)
+        entries = dict(sorted(entries.items()))
+        write_manifest(self.manifest_path, entries, self.content, scan_ns)
+        return {relative_path: entry.digest for relative_path, entry in entries.items()}
+
+
+# local dataset hashers by kind, and by whether the contents of the files are hashed
+DATASET_HASHERS: dict[str, dict[bool, type[ApproximateHasher]]] = {
+    "file": {False: LocalFileHash, True: LocalFileContentHash},
+    "dir": {False: LocalDirectoryHash, True: LocalDirectoryContentHash},
+}
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import operator
-from typing import Any
+from typing import Any, Iterator
 from urllib.parse import urlparse
 
 from pycodehash.datasets._s3_client import new_s3_client
-from pycodehash.datasets.approximate_hasher import ApproximateHasher
+from pycodehash.datasets.approximate_hasher import ApproximateHasher, PartitionedApproximateHasher
+
+# number of concurrent requests of `S3FilesHash` and `S3DirectoryHash` by default
+DEFAULT_MAX_WORKERS = 16
 
 
 def s3path_to_bucket_key(s3_file_path: str) -> tuple[str, str]:
@@ -19,6 +22,22 @@ def s3path_to_bucket_key(s3_file_path: str) -> tuple[str, str]:
     return bucket, key
 
 
+def list_objects(s3_client: Any, bucket: str, prefix: str, **kwargs) -> Iterator[dict[str, Any]]:
+    """Iterate over the pages of `list_objects_v2`, following the continuation tokens.
+
+    Args:
+        s3_client: boto3 s3 client
+        bucket: name of the bucket
+        prefix: key prefix
+        kwargs: passed on to `list_objects_v2`, e.g. `Delimiter`
+
+    Yields:
+        the response per page (of at most 1000 objects)
+    """
+    paginator = s3_client.get_paginator("list_objects_v2")
+    yield from paginator.paginate(Bucket=bucket, Prefix=prefix, **kwargs)
+
+
 class S3Hash(ApproximateHasher):
     def __init__(self, s3_client: Any | None = None, credentials: dict[str, Any] | None = None):
         """Initialization of S3Hash
@@ -51,18 +70,96 @@ class S3Hash(ApproximateHasher):
         """
         if s3_file_path is not None:
             bucket, key = s3path_to_bucket_key(s3_file_path=s3_file_path)
-        assert None not in {bucket, key}
+        assert bucket is not None and key is not None
 
         # The list_objects_v2() method in s3 client object will fetch the metadata (headers) of a given object
         # stored in the s3 bucket. (Not the object itself.) If key is a directory, it will retrieve all objects in the
         # directory in alphabetic order. Per object: ETag (md5 hash), size, last modification data, and storage class.
-        response = self.s3_client.list_objects_v2(Bucket=bucket, Prefix=key)
-        files = response["Contents"]
-
-        for file in files:
-            # clean up the ETag hash, remove unnecessary quotes.
-            file["ETag"] = file["ETag"].strip('"')
+        # The objects are listed in pages of at most 1000.
+        files = [file for page in list_objects(self.s3_client, bucket, key) for file in page.get("Contents", [])]
 
-        return {
-            f"__file{idx}__ETag": file["ETag"] for idx, file in enumerate(sorted(files, key=operator.itemgetter("Key")))
+        # clean up the ETag hash, remove unnecessary quotes.
+        metadata: dict[str, Any] = {
+            f"__file{idx}__ETag": file["ETag"].strip('"')
+            for idx, file in enumerate(sorted(files, key=operator.itemgetter("Key")))
         }
+        if not metadata:
+            msg = f"No objects found in bucket {bucket} with prefix {key}"
+            raise FileNotFoundError(msg)
+        return metadata
+
+
+class S3FilesHash(PartitionedApproximateHasher):
+    """Hash a list of s3 paths (files or prefixes) concurrently, with a single client"""
+
+    def __init__(
+        self,
+        s3_client: Any | None = None,
+        credentials: dict[str, Any] | None = None,
+        max_workers: int | None = DEFAULT_MAX_WORKERS,
+    ):
+        """Initialization of S3FilesHash
+
+        Args:
+            s3_client: boto3 s3 client, shared by all threads
+            credentials: credentials in case s3 client is not provided
+            max_workers: number of concurrent requests, set to None to list the partitions sequentially
+        """
+        if s3_client is None:
+            s3_client = new_s3_client(credentials=credentials, max_pool_connections=max_workers)
+        super().__init__(S3Hash(s3_client=s3_client), max_workers=max_workers)
+
+    @staticmethod
+    def collect_partitions(s3_file_paths: list[str] | dict[str, str]) -> list[str] | dict[str, str]:
+        return s3_file_paths
+
+
+class S3DirectoryHash(PartitionedApproximateHasher):
+    """Hash every sub-prefix and object directly under a prefix separately
+
+    For example, for `s3://bucket/table/` with objects under `s3://bucket/table/date=2024-01-01/` etc., there is
+    one partition per date.
+    """
+
+    def __init__(
+        self,
+        s3_client: Any | None = None,
+        credentials: dict[str, Any] | None = None,
+        max_workers: int | None = DEFAULT_MAX_WORKERS,
+    ):
+        """Initialization of S3DirectoryHash
+
+        Args:
+            s3_client: boto3 s3 client, shared by all threads
+            credentials: credentials in case s3 client is not provided
+            max_workers: number of concurrent requests, set to None to list the partitions sequentially
+        """
+        if s3_client is None:
+            s3_client = new_s3_client(credentials=credentials, max_pool_connections=max_workers)
+        super().__init__(S3Hash(s3_client=s3_client), max_workers=max_workers)
+        self.s3_client = s3_client
+
+    def collect_partitions(self, s3_file_path: str, delimiter: str = "/") -> dict[str, str]:
+        """Collect the sub-prefixes and objects one level below the prefix
+
+        Args:
+            s3_file_path: s3 path of the prefix, a trailing delimiter is added if it is missing
+            delimiter: delimiter of the levels in the keys
+
+        Returns:
+            mapping of the name of the partition to its s3 path
+        """
+        bucket, prefix = s3path_to_bucket_key(s3_file_path)
+        if prefix and not prefix.endswith(delimiter):
+            prefix += delimiter
+
+        partitions = {}
+        for page in list_objects(self.s3_client, bucket, prefix, Delimiter=delimiter):
+            keys = [common_prefix["Prefix"] for common_prefix in page.get("CommonPrefixes", [])]
+            keys += [file["Key"] for file in page.get("Contents", [])]
+            # skip the "directory marker" object of the prefix itself
+            for partition_key in keys:
+                if partition_key == prefix:
+                    continue
+                partitions[partition_key[len(prefix) :].rstrip(delimiter)] = f"s3://{bucket}/{partition_key}"
+        return dict(sorted(partitions.items()))
@@ -1,7 +1,19 @@
 from __future__ import annotations
 
 import hashlib
+import mmap
+import os
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from io import FileIO
+
+# files of at least this size are memory-mapped by `hash_file_full`
+MMAP_THRESHOLD = 16 * 1024 * 1024
+# bounds of the block size of `hash_file_full`, which is adapted to the file size
+MIN_BLOCK_SIZE = 64 * 1024
+MAX_BLOCK_SIZE = 1024 * 1024
 
 
 def hash_string(input_string: str) -> str:
@@ -16,15 +28,24 @@ def hash_string(input_string: str) -> str:
     return hashlib.sha256(input_string.encode("utf-8")).hexdigest()
 
 
-def hash_file_full(file_path: str | Path, block_size: int = 8192) -> str:
+def _hash_file_blocks(fb: FileIO, sha256_hash: Any, block_size: int) -> None:
+    """Update a hash with the contents of a file, read into a single reused buffer."""
+    buffer = bytearray(block_size)
+    view = memoryview(buffer)
+    while n_bytes := fb.readinto(buffer):
+        sha256_hash.update(view[:n_bytes])
+
+
+def hash_file_full(file_path: str | Path, block_size: int | None = None) -> str:
     """Find SHA256 hash string of a local file
 
-    Function capable of handling large files, loops over file blocks.
-    https://www.quickprogrammingtips.com/python/how-to-calculate-sha256-hash-of-a-file-in-python.html
+    Function capable of handling large files. By default, large files are memory-mapped and hashed at once,
+    other files are read in blocks (using `hashlib.file_digest` when available), with the block size
+    adapted to the file size.
 
     Args:
         file_path: path to the file to hash
-        block_size: read and update hash string in blocks (default: 8K)
+        block_size: read and update hash string in blocks of this size, instead of the default strategy
 
     Returns:
         SHA256 hash
@@ -32,8 +53,25 @@ def hash_file_full(file_path: str | Path, block_size: int = 8192) -> str:
     path = Path(file_path)
 
     sha256_hash = hashlib.sha256()
-    with path.open("rb") as fb:
-        # Read and update hash string value in blocks
-        for byte_block in iter(lambda: fb.read(block_size), b""):
-            sha256_hash.update(byte_block)
+    with path.open("rb", buffering=0) as fb:
+        if block_size is not None:
+            _hash_file_blocks(fb, sha256_hash, block_size)
+            return sha256_hash.hexdigest()
+
+        size = os.fstat(fb.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            try:
+                with mmap.mmap(fb.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    sha256_hash.update(mapped)
+                return sha256_hash.hexdigest()
+            except (OSError, ValueError):
+                # e.g. files that do not support memory mapping
+                sha256_hash = hashlib.sha256()
+                fb.seek(0)
+
+        if hasattr(hashlib, "file_digest"):
+            # unbuffered files may return None from `readinto`, which does not occur for regular files
+            return hashlib.file_digest(fb, "sha256").hexdigest()  # type: ignore[arg-type]
+
+        _hash_file_blocks(fb, sha256_hash, min(max(size, MIN_BLOCK_SIZE), MAX_BLOCK_SIZE))
     return sha256_hash.hexdigest()
@@ -0,0 +1,219 @@
+"""Persistent cache of function hashes that survives between processes."""
+
+from __future__ import annotations
+
+import ast
+import importlib
+import json
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from types import BuiltinFunctionType
+from typing import TYPE_CHECKING, Any, Iterable
+
+from pycodehash.cache import SQLiteCache
+from pycodehash.hashing import hash_file_full
+
+if TYPE_CHECKING:
+    from types import FunctionType
+
+
+@dataclass
+class CachedFunction:
+    """Cache entry of a hashed function.
+
+    Attributes:
+        hash: the function hash
+        ir: the intermediate representation of the function
+        dependencies: content hash of every source file that the hash depends on, None for files that did not exist
+    """
+
+    hash: str
+    ir: str
+    dependencies: dict[str, str | None] = field(default_factory=dict)
+
+
+def get_func_key(func: FunctionType) -> str | None:
+    """Key that identifies a function across processes.
+
+    Returns:
+        `module:qualname` or None when the function cannot be uniquely identified, e.g. lambdas and local functions
+    """
+    if isinstance(func, BuiltinFunctionType):
+        return None
+    module = getattr(func, "__module__", None)
+    qualname = getattr(func, "__qualname__", None)
+    if module is None or qualname is None or "<" in qualname:
+        return None
+    return f"{module}:{qualname}"
+
+
+def resolve_func_key(func_key: str) -> FunctionType:
+    """Import the function that is identified by a key, the inverse of `get_func_key`.
+
+    Args:
+        func_key: `module:qualname`, e.g. `tliba.etl:combine_random_samples`
+
+    Raises:
+        ValueError: when the key is not of the form `module:qualname`
+        ImportError: when the module cannot be imported
+        AttributeError: when the module has no such function
+
+    Returns:
+        the function
+    """
+    module_name, sep, qualname = func_key.partition(":")
+    if not sep or not module_name or not qualname:
+        msg = f"Expected `module:qualname`, got `{func_key}`."
+        raise ValueError(msg)
+    obj: Any = importlib.import_module(module_name)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+def _module_parts(path: Path, root: Path) -> list[str]:
+    parts = list(path.relative_to(root.parent).with_suffix("").parts)
+    if parts[-1] == "__init__":
+        parts.pop()
+    return parts
+
+
+def _resolve_module(name: str, roots: Iterable[Path]) -> Path | None:
+    parts = name.split(".")
+    for root in roots:
+        if parts[0] != root.name:
+            continue
+        base = root.parent.joinpath(*parts)
+        for candidate in (base.with_suffix(".py"), base / "__init__.py"):
+            if candidate.is_file():
+                return candidate
+    return None
+
+
+def _imported_modules(path: Path, roots: list[Path]) -> set[Path]:
+    """Source files of the first-party modules that are imported by a module
+
+    Args:
+        path: path to the module source
+        roots: source roots of the first-party packages
+
+    Returns:
+        set of paths of the imported modules that are part of `roots`
+    """
+    root = next((root for root in roots if root in path.parents), None)
+    if root is None:
+        return set()
+    try:
+        tree = ast.parse(path.read_text(encoding="utf-8"))
+    except (SyntaxError, UnicodeDecodeError):
+        return set()
+
+    parts = _module_parts(path, root)
+    package = parts if path.name == "__init__.py" else parts[:-1]
+
+    names: set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = package[: len(package) - node.level + 1] if node.level > 0 else []
+            module = ".".join([*base, *(node.module.split(".") if node.module else [])])
+            names.add(module)
+            names.update(f"{module}.{alias.name}" for alias in node.names if alias.name != "*")
+
+    return {resolved for name in names if name and (resolved := _resolve_module(name, roots)) is not None}
+
+
+def collect_dependencies(paths: Iterable[Path], roots: list[Path]) -> set[Path]:
+    """Collect the source files together with the first-party modules they (transitively) import
+
+    Call tracing resolves names through import statements, e.g. re-exports in an `__init__.py`,
+    hence these modules influence the function hash as well.
+
+    Args:
+        paths: the source files that contain the function and its callees
+        roots: source roots of the first-party packages
+
+    Returns:
+        set of paths
+    """
+    todo = [Path(path) for path in paths]
+    seen: set[Path] = set()
+    while todo:
+        path = todo.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        todo.extend(_imported_modules(path, roots) - seen)
+    return seen
+
+
+class FunctionHashCache(SQLiteCache):
+    """Persistent cache for `FunctionHasher.hash_func`.
+
+    Entries are keyed by the function name and the fingerprint of the hasher configuration
+    (processors, traced packages and pycodehash version). Each entry records the content hash
+    of the function's module and of the modules of all (transitive) callees. An entry is only
+    valid when none of these files changed, so a change in a callee invalidates all its callers.
+    A valid entry is returned without initializing or analyzing any project.
+    """
+
+    def __init__(self, path: str | Path):
+        """Initialise the cache.
+
+        Args:
+            path: location of the SQLite database file, created if it does not exist
+        """
+        super().__init__(path, table="functions")
+        self._digests: dict[tuple[str, int, int], str] = {}
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"path": self.path}
+
+    def digest(self, path: str | Path) -> str | None:
+        """Content hash of a file, memoized on the modification time and size of the file.
+
+        Returns:
+            SHA256 hash or None when the file does not exist
+        """
+        try:
+            stat = Path(path).stat()
+        except OSError:
+            return None
+        key = (str(path), stat.st_mtime_ns, stat.st_size)
+        if key not in self._digests:
+            self._digests[key] = hash_file_full(path)
+        return self._digests[key]
+
+    def lookup(self, config: str, func_key: str) -> CachedFunction | None:
+        """Retrieve a valid cache entry.
+
+        Args:
+            config: fingerprint of the hasher configuration
+            func_key: key of the function, see `get_func_key`
+
+        Returns:
+            The cache entry or None if there is no entry or it is outdated
+        """
+        value = self.get(f"{config}:{func_key}")
+        if value is None:
+            return None
+        entry = CachedFunction(**json.loads(value))
+        for path, digest in entry.dependencies.items():
+            if self.digest(path) != digest:
+                return None
+        return entry
+
+    def store(self, config: str, func_key: str, function_hash: str, ir: str, dependencies: Iterable[Path]) -> None:
+        """Add or replace a cache entry.
+
+        Args:
+            config: fingerprint of the hasher configuration
+            func_key: key of the function, see `get_func_key`
+            function_hash: the function hash
+            ir: the intermediate representation of the function
+            dependencies: the source files the hash depends on
+        """
+        digests = {str(path): self.digest(path) for path in sorted(dependencies)}
+        entry = CachedFunction(hash=function_hash, ir=ir, dependencies=digests)
+        self[f"{config}:{func_key}"] = json.dumps(asdict(entry))
@@ -0,0 +1,65 @@
+"""Condensation of call graphs into strongly connected components."""
+
+from __future__ import annotations
+
+from typing import Hashable, Iterable, Mapping, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+
+def strongly_connected_components(graph: Mapping[K, Iterable[K]]) -> list[list[K]]:
+    """Find the strongly connected components of a directed graph with Tarjan's algorithm.
+
+    The depth-first search uses an explicit stack, so deep call chains do not hit the recursion limit.
+    The runtime is linear in the number of nodes and edges.
+
+    Args:
+        graph: the successors of every node, successors that are not a node of the graph are ignored
+
+    Returns:
+        the components in reverse topological order: a component comes after all components it has edges to.
+        The nodes of a component are in the order in which they were discovered.
+    """
+    index: dict[K, int] = {}
+    low_link: dict[K, int] = {}
+    on_stack: set[K] = set()
+    stack: list[K] = []
+    # position of the nodes on the stack
+    position: dict[K, int] = {}
+    components: list[list[K]] = []
+
+    for root in graph:
+        if root in index:
+            continue
+        index[root] = low_link[root] = len(index)
+        position[root] = len(stack)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph[root]))]
+        while work:
+            node, successors = work[-1]
+            for successor in successors:
+                if successor not in graph:
+                    continue
+                if successor not in index:
+                    index[successor] = low_link[successor] = len(index)
+                    position[successor] = len(stack)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(graph[successor])))
+                    break
+                if successor in on_stack:
+                    low_link[node] = min(low_link[node], index[successor])
+            else:
+                # all successors are visited
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low_link[parent] = min(low_link[parent], low_link[node])
+                if low_link[node] == index[node]:
+                    # the node is the root of a component, which consists of the nodes above it on the stack
+                    component = stack[position[node] :]
+                    del stack[position[node] :]
+                    on_stack.difference_update(component)
+                    components.append(component)
+    return components
@@ -2,11 +2,20 @@
 
 from __future__ import annotations
 
+import copy
+import inspect
+import re
 import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
 from types import BuiltinFunctionType, FunctionType
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
 
+from pycodehash.cache import fingerprint
 from pycodehash.hashing import hash_string
 from pycodehash.python_function import (
     DocstringStripper,
@@ -18,11 +27,28 @@ from pycodehash.python_function import (
     TypeHintStripper,
     WhitespaceNormalizer,
 )
-from pycodehash.python_function.stores import FunctionCallStore, FunctionStore, ModuleStore, ProjectStore
+from pycodehash.python_function.cache import (
+    CachedFunction,
+    FunctionHashCache,
+    _imported_modules,
+    collect_dependencies,
+    get_func_key,
+)
+from pycodehash.python_function.call_graph import strongly_connected_components
+from pycodehash.python_function.materializer import ProjectMaterializer
+from pycodehash.python_function.stores import (
+    FunctionCallStore,
+    FunctionStore,
+    ModuleStore,
+    ProjectStore,
+    _item_to_key,
+    location_from_key,
+)
 from pycodehash.python_function.tracing import get_func_def_location, get_func_node_from_location
 from pycodehash.python_function.transfomers import HashCallNameTransformer
 from pycodehash.python_function.unparse import _unparse
 from pycodehash.python_function.utils import get_func_name
+from pycodehash.python_function.watcher import SourceWatcher
 
 if TYPE_CHECKING:
     from ast import NodeTransformer
@@ -30,6 +56,85 @@ if TYPE_CHECKING:
     from rope.base.project import Project
     from rope.contrib.findit import Location
 
+# reference to a called function in the intermediate representation
+_CALL_REFERENCE = re.compile(r"c_([0-9a-f]{64})")
+
+
+@dataclass
+class _PendingFunction:
+    """Function of which the source is collected, but that is not yet hashed"""
+
+    location: Location
+    project: Project
+    placeholder: str
+    source: str = ""
+
+
+@dataclass
+class _HashingState:
+    """State of `FunctionHasher.hash_location` while hashing a function and its callees, per thread"""
+
+    pending: dict[tuple[str, int, int, int], _PendingFunction] = field(default_factory=dict)
+    placeholders: dict[str, tuple[str, int, int, int]] = field(default_factory=dict)
+    worklist: list[tuple[str, int, int, int]] = field(default_factory=list)
+    collecting: bool = False
+
+
+class _ReadWriteLock:
+    """Lock that is shared by readers and exclusive for a writer.
+
+    A thread that holds the lock for reading can acquire it for reading again. Waiting writers take precedence
+    over new readers.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._waiting_writers = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        depth = getattr(self._local, "depth", 0)
+        if depth == 0:
+            with self._condition:
+                while self._writing or self._waiting_writers:
+                    self._condition.wait()
+                self._readers += 1
+        self._local.depth = depth + 1
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+            if depth == 0:
+                with self._condition:
+                    self._readers -= 1
+                    if self._readers == 0:
+                        self._condition.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+
+def _new_rope_lock(thread_safe: bool) -> AbstractContextManager[Any]:
+    """Lock around the use of rope, which is not thread-safe, or a no-op when the hasher is used by a single thread"""
+    if thread_safe:
+        return threading.RLock()
+    return nullcontext()
+
 
 class FunctionHasher:
     """Function hashing algorithm.
@@ -49,6 +154,9 @@ class FunctionHasher:
         source_postprocessors: list of transformations to be applied to the source representation after
             the AST processors
         func_ir_store: container that store the intermediate representations of functions
+        cache: optional persistent cache of function hashes
+        batch_postprocessing: if True, the source post-processors are applied to all functions at once
+        thread_safe: if True, the hasher can be used from multiple threads
     """
 
     func_store: FunctionStore
@@ -58,16 +166,25 @@ class FunctionHasher:
     ast_transformers: list[NodeTransformer]
     source_postprocessors: list[SourceProcessor]
     func_ir_store: FunctionStore
+    cache: FunctionHashCache | None
+    batch_postprocessing: bool
+    thread_safe: bool
     use_tempdir: bool
     _data_path: Path | None
 
-    def __init__(
+    def __init__(  # noqa: PLR0913, PLR0917
         self,
         packages: list[str] | None = None,
         source_preprocessors: list[ProjectSourceProcessor] | None = None,
         ast_transformers: list[NodeTransformer] | None = None,
         source_postprocessors: list[SourceProcessor] | None = None,
         use_tempdir: bool = True,
+        cache: FunctionHashCache | None = None,
+        batch_postprocessing: bool = False,
+        materializer: ProjectMaterializer | None = None,
+        work_dir: str | Path | None = None,
+        lazy_analysis: bool = False,
+        thread_safe: bool = False,
     ):
         """Initialise the class.
 
@@ -83,20 +200,50 @@ class FunctionHasher:
             source_postprocessors: list of transformations to be applied to the source representation after
                 the AST processors. By default this is: `[WhitespaceNormalizer()]`
             use_tempdir: if True, copies project files to a temporary directory before processing (default: True)
+            cache: persistent cache of function hashes. `hash_func` returns valid cache entries without
+                initializing the project, which makes repeated runs on unchanged code fast.
+            batch_postprocessing: if True, the source postprocessors are applied once to all functions that are
+                traced from the hashed function, rather than per function. For the `RuffProcessor` this means a
+                single invocation of `ruff` instead of one per function. The hashes are identical.
+            materializer: prepares the package sources in the temporary directory. By default the entire package
+                tree is copied, a `ProjectMaterializer` only copies (or links) the Python sources.
+            work_dir: persistent directory for the prepared package sources and rope's object database, replaces
+                the temporary directory. Subsequent runs with the same directory only prepare and analyze the modules
+                that changed. Uses a `ProjectMaterializer` when none is given. Should not be shared between
+                concurrently running processes.
+            lazy_analysis: if True, rope only analyzes the modules that are traced, on demand, rather than all
+                modules of a package when it is initialized. Reduces the start-up time for hashing a few functions
+                in a large package.
+            thread_safe: if True, `hash_func` can be called from multiple threads. The threads take turns in
+                tracing with rope, while post-processing, cache lookups and the initialization of different
+                packages run concurrently. When multiple threads hash the same function, one of them computes the
+                hash and the others wait for it. The hashes are identical.
 
         """
-        if use_tempdir:
+        if work_dir is not None:
+            self._temp_dir = None
+            self._data_path = Path(work_dir).absolute()
+            self._data_path.mkdir(parents=True, exist_ok=True)
+            materializer = materializer or ProjectMaterializer()
+        elif use_tempdir:
             temp_dir = tempfile.TemporaryDirectory()
             self._temp_dir = temp_dir
             self._data_path = Path(temp_dir.name)
         else:
+            self._temp_dir = None
             self._data_path = None
 
         self.func_store = FunctionStore()
         self.module_store = ModuleStore()
         self.source_preprocessors = source_preprocessors or [RuffProjectProcessor()]
 
-        self.project_store = ProjectStore(self._data_path, self.source_preprocessors)
+        self.project_store = ProjectStore(
+            self._data_path,
+            self.source_preprocessors,
+            materializer,
+            incremental=work_dir is not None,
+            lazy=lazy_analysis,
+        )
         if packages is not None:
             for pkg in packages:
                 self.project_store.add_project(pkg)
@@ -108,10 +255,39 @@ class FunctionHasher:
         self.func_ir_store = FunctionStore()
         # stores the location(s) of the calls in a given function definition
         self.func_call_store = FunctionCallStore()
+        self.cache = cache
+        self.batch_postprocessing = batch_postprocessing
+        self.thread_safe = thread_safe
+        # the state of `hash_location` is per thread, rope is only used by one thread at a time in thread-safe mode
+        self._local = threading.local()
+        self._rope_lock = _new_rope_lock(thread_safe)
+        # hashing holds this lock shared and `invalidate` exclusively, such that hashes that are computed from
+        # outdated sources are not stored after the invalidation (which may run in a watcher thread)
+        self._stores_lock = _ReadWriteLock()
+        # events of the functions that are being hashed, by location key
+        self._in_flight: dict[tuple[str, int, int, int], threading.Event] = {}
+        self._in_flight_lock = threading.Lock()
+        # the first-party modules that are imported by a prepared module, by path, see `invalidate`
+        self._imports: dict[str, set[str]] = {}
+        # the configuration determines the hash, so it is part of the cache key
+        self._config = fingerprint(
+            sorted(packages or []),
+            self.source_preprocessors,
+            self.ast_transformers,
+            self.source_postprocessors,
+            materializer,
+        )
 
     def hash_location(self, location: Location, project: Project) -> str:
         """Hash a location (~text range) of Python code
 
+        The hashing is done in three steps. First, the sources of the function and all functions it (transitively)
+        calls are collected with a worklist, where calls are represented by a placeholder. Then the sources are
+        post-processed, per function or, in batch post-processing mode, all at once. Finally, the call graph is
+        condensed into strongly connected components that are hashed in reverse topological order, where the
+        placeholders are substituted with the hashes of the called functions. (Mutually) recursive functions form
+        a component that is hashed as a unit.
+
         Args:
             location: rope Location
             project: rope Project
@@ -119,12 +295,81 @@ class FunctionHasher:
         Returns:
             function_hash: hash string based on the location
         """
+        with self._stores_lock.read():
+            return self._hash_location(location, project)
+
+    def _hash_location(self, location: Location, project: Project) -> str:
         # check if the location was already hashed, if so return
         if location in self.func_store:
             return self.func_store[location]
 
-        # get the code for the function
-        src_node = get_func_node_from_location(location, project)
+        state = self._state
+        key = _item_to_key(location)
+        if key in state.pending:
+            return state.pending[key].placeholder
+
+        if state.collecting:
+            # called while collecting the sources of the callers, the source of this function is collected later
+            state.worklist.append(key)
+            return self._add_pending(key, location, project).placeholder
+
+        with self._claim(key) if self.thread_safe else nullcontext():
+            # another thread may have hashed the function in the meantime
+            if location in self.func_store:
+                return self.func_store[location]
+
+            self._add_pending(key, location, project)
+            try:
+                state.collecting = True
+                state.worklist.append(key)
+                with self._rope_lock:
+                    while state.worklist:
+                        item = state.pending[state.worklist.pop()]
+                        item.source = self._get_source(item.location, item.project)
+                self._resolve_pending()
+            finally:
+                state.collecting = False
+                state.worklist.clear()
+                state.pending.clear()
+                state.placeholders.clear()
+            return self.func_store[location]
+
+    @property
+    def _state(self) -> _HashingState:
+        state = getattr(self._local, "state", None)
+        if state is None:
+            state = self._local.state = _HashingState()
+        return state
+
+    def _add_pending(self, key: tuple[str, int, int, int], location: Location, project: Project) -> _PendingFunction:
+        state = self._state
+        # placeholders have the same length as hashes to not influence the formatting
+        pending = _PendingFunction(location=location, project=project, placeholder=f"{len(state.pending):064x}")
+        state.pending[key] = pending
+        state.placeholders[pending.placeholder] = key
+        return pending
+
+    @contextmanager
+    def _claim(self, key: tuple[str, int, int, int]) -> Iterator[None]:
+        """Claim the hashing of a function, waiting while another thread hashes it (in thread-safe mode)."""
+        while True:
+            with self._in_flight_lock:
+                event = self._in_flight.get(key)
+                if event is None:
+                    event = self._in_flight[key] = threading.Event()
+                    break
+            event.wait()
+        try:
+            yield
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[key]
+            event.set()
+
+    def _get_source(self, location: Location, project: Project) -> str:
+        """Source of the function at a location, after replacing the calls and applying the AST transformers."""
+        # get the code for the function, the transformers modify a copy as rope reuses the module AST
+        src_node = copy.deepcopy(get_func_node_from_location(location, project))
 
         # replace names of _tracked_ calls
         src_node = HashCallNameTransformer(self, location).visit(src_node)
@@ -133,16 +378,84 @@ class FunctionHasher:
         for ast_transformer in self.ast_transformers:
             src_node = ast_transformer.visit(src_node)
 
-        prc_src = _unparse(src_node)
+        return _unparse(src_node)
 
-        # postprocessing of the lines
+    def _resolve_pending(self) -> None:
+        """Post-process the collected sources and compute their hashes per strongly connected component."""
+        state = self._state
+        pending = list(state.pending.values())
+        sources = [item.source for item in pending]
         for source_postprocessor in self.source_postprocessors:
-            prc_src = source_postprocessor.transform(prc_src)
-
-        function_hash = hash_string(prc_src)
-        self.func_ir_store[location] = prc_src
-        self.func_store[location] = function_hash
-        return function_hash
+            if self.batch_postprocessing:
+                sources = source_postprocessor.transform_batch(sources)
+            else:
+                sources = [source_postprocessor.transform(source) for source in sources]
+        for item, source in zip(pending, sources):
+            item.source = source
+
+        graph = {key: self._get_callees(item.source) for key, item in state.pending.items()}
+        for component in strongly_connected_components(graph):
+            self._hash_component(component, graph)
+
+    def _get_callees(self, source: str) -> list[tuple[str, int, int, int]]:
+        """Keys of the pending functions that are referenced by a placeholder in a source"""
+        state = self._state
+        return [
+            state.placeholders[reference]
+            for reference in _CALL_REFERENCE.findall(source)
+            if reference in state.placeholders
+        ]
+
+    def _hash_component(
+        self,
+        component: list[tuple[str, int, int, int]],
+        graph: dict[tuple[str, int, int, int], list[tuple[str, int, int, int]]],
+    ) -> None:
+        """Hash a strongly connected component of the call graph, of which all callees outside are hashed.
+
+        The hash of a function that is not recursive is the hash of its source, with the calls replaced by the
+        hashes of the called functions. The functions in a recursive component refer to each other by a label
+        instead. The labels are assigned in the order of the sources with the labels masked, and then of the
+        locations, so the hashes do not depend on which function of the component is hashed first. The IR of a
+        function consists of its source followed by those of the other functions in the component.
+        """
+        state = self._state
+        members = set(component)
+
+        def substitute(match: re.Match, labels: dict[tuple[str, int, int, int], str] | None = None) -> str:
+            callee = state.placeholders.get(match.group(1))
+            if callee is None:
+                return match.group(0)
+            if callee in members:
+                return match.group(0) if labels is None else f"c_{labels[callee]}"
+            return f"c_{self.func_store[state.pending[callee].location]}"
+
+        sources = {key: _CALL_REFERENCE.sub(substitute, state.pending[key].source) for key in component}
+        if len(component) == 1 and component[0] not in graph[component[0]]:
+            irs = sources
+        else:
+            masked = {
+                key: _CALL_REFERENCE.sub(partial(substitute, labels=dict.fromkeys(members, "")), sources[key])
+                for key in component
+            }
+            order = sorted(component, key=lambda key: (masked[key], key))
+            labels = {key: f"{idx:064x}" for idx, key in enumerate(order)}
+            labeled = {key: _CALL_REFERENCE.sub(partial(substitute, labels=labels), sources[key]) for key in order}
+            irs = {
+                key: "\n\n".join([labeled[key], *(labeled[other] for other in order if other != key)]) for key in order
+            }
+
+        for key, prc_src in irs.items():
+            location = state.pending[key].location
+            self.func_ir_store[location] = prc_src
+            self.func_store[location] = hash_string(prc_src)
+
+    @staticmethod
+    def _check_has_source(func: FunctionType) -> None:
+        # exit path for when we cannot hash the source
+        if isinstance(func, BuiltinFunctionType):
+            msg = f"builtin function `{get_func_name(func)}` cannot be hashed as there is no Python source code."
+            raise TypeError(msg)
 
     def _get_location_and_project(self, func: FunctionType) -> tuple[Location, Project]:
         """Hash a Python function.
@@ -158,21 +471,56 @@ class FunctionHasher:
             location, project: the location of the function definition and the project it belongs to
 
         """
-        # exit path for when we cannot hash the source
-        if isinstance(func, BuiltinFunctionType):
-            msg = f"builtin function `{get_func_name(func)}` cannot be hashed as there is no Python source code."
-            raise TypeError(msg)
+        self._check_has_source(func)
 
         project = self.project_store.get_or_create_for_func(func)
 
         # get the location (~text range) from the function using the project
-        location = get_func_def_location(func, project)
+        with self._rope_lock:
+            location = get_func_def_location(func, project, self.project_store.get_definition_index(project))
         if location is None:
             msg = f"Source code for function `{get_func_name(func)}` could not be found or does not exist."
             raise ValueError(msg)
 
         return location, project
 
+    def _lookup_cache_entry(self, func: FunctionType) -> CachedFunction | None:
+        cache = self.cache
+        func_key = None if cache is None else get_func_key(func)
+        if cache is None or func_key is None:
+            return None
+        return cache.lookup(self._config, func_key)
+
+    def _lookup_cache(self, func: FunctionType) -> str | None:
+        entry = self._lookup_cache_entry(func)
+        return None if entry is None else entry.hash
+
+    def _store_in_cache(self, func: FunctionType, location: Location) -> None:
+        cache = self.cache
+        func_key = None if cache is None else get_func_key(func)
+        if cache is None or func_key is None:
+            return
+        dependencies = self._get_source_dependencies(func, location)
+        cache.store(self._config, func_key, self.func_store[location], self.func_ir_store[location], dependencies)
+
+    def _get_source_dependencies(self, func: FunctionType, location: Location) -> set[Path]:
+        """The original source files that determine the hash of a function.
+
+        Args:
+            func: the Python function
+            location: the location of the function definition
+
+        Returns:
+            paths of the modules of the function and its (transitive) callees, and the modules they import
+        """
+        with self._rope_lock:
+            reachable = self.func_call_store.get_reachable_keys(location)
+        paths = {self.project_store.get_source_path(path) for path, *_ in reachable}
+        source_file = inspect.getsourcefile(func)
+        if source_file is not None:
+            paths.add(Path(source_file).absolute())
+        return collect_dependencies(paths, list(self.project_store.source_roots.values()))
+
     def hash_func(self, func: FunctionType) -> str:
         """Hash a Python function.
 
@@ -187,7 +535,117 @@ class FunctionHasher:
             The hash of the function
 
         """
-        return self.hash_location(*self._get_location_and_project(func))
+        function_hash = self._lookup_cache(func)
+        if function_hash is not None:
+            return function_hash
+
+        with self._stores_lock.read():
+            location, project = self._get_location_and_project(func)
+            function_hash = self.hash_location(location, project)
+            self._store_in_cache(func, location)
+        return function_hash
+
+    def hash_funcs(self, funcs: Iterable[FunctionType], workers: int | None = None) -> list[str]:
+        """Hash multiple Python functions, optionally using a pool of worker processes.
+
+        The packages of all functions are initialized before any function is hashed. Calls into other packages
+        are only resolved in initialized packages, hence the hashes are those of `hash_func` on a hasher that was
+        created with `packages` extended by the packages of all functions, in the order in which they occur.
+        Each worker process analyzes the prepared projects once and hashes groups of functions from the same
+        package. The entries that the workers add to their function, IR and call stores are merged into the
+        stores of this hasher.
+        The hasher is passed to the workers once and the functions are passed by reference (their module and
+        qualified name). This relies on the "fork" start method of `multiprocessing` (the default on Linux), with
+        which the workers inherit the imported modules and `sys.path` of this process; lambdas and local
+        functions are hashed in this process.
+
+        Args:
+            funcs: the Python functions
+            workers: the number of worker processes. By default the functions are hashed in this process.
+
+        Raises:
+            TypeError: when one of `funcs` is a `BuiltinFunctionType` as these do not have accessible source code
+            ValueError: when the source code for a function cannot be found but it is not a `BuiltinFunctionType`
+
+        Returns:
+            The hashes of the functions, in the order of `funcs`
+        """
+        funcs = list(funcs)
+        hashes: list[str | None] = [self._lookup_cache(func) for func in funcs]
+        with self._stores_lock.read():
+            self._hash_uncached_funcs(funcs, hashes, workers)
+        return hashes  # type: ignore[return-value]
+
+    def _hash_uncached_funcs(self, funcs: list[FunctionType], hashes: list[str | None], workers: int | None) -> None:
+        # group the functions that are not cached by package
+        groups: dict[str, list[int]] = {}
+        for idx, func in enumerate(funcs):
+            if hashes[idx] is not None:
+                continue
+            self._check_has_source(func)
+            pkg = self.project_store.get_package_for_func(func)
+            self.project_store.materialize(pkg)
+            groups.setdefault(pkg, []).append(idx)
+
+        if workers is not None and workers > 1:
+            self._hash_funcs_in_pool(funcs, groups, hashes, workers)
+
+        remaining = [idx for indices in groups.values() for idx in indices if hashes[idx] is None]
+        if remaining:
+            self.project_store.initialize_materialized()
+        for idx in remaining:
+            hashes[idx] = self.hash_func(funcs[idx])
+
+    def _hash_funcs_in_pool(
+        self, funcs: list[FunctionType], groups: dict[str, list[int]], hashes: list[str | None], workers: int
+    ) -> None:
+        """Hash groups of functions in worker processes and merge the results into this hasher.
+
+        Functions that cannot be passed to another process (lambdas and local functions) are skipped.
+        """
+        # chunk the groups, so that a single large package is distributed over all workers
+        chunks: list[list[int]] = []
+        for indices in groups.values():
+            picklable = [idx for idx in indices if get_func_key(funcs[idx]) is not None]
+            size = max(1, -(-len(picklable) // workers))
+            chunks.extend(picklable[start : start + size] for start in range(0, len(picklable), size))
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_initialize_worker, initargs=(self,)) as executor:
+            futures = {executor.submit(_hash_funcs_in_worker, [funcs[idx] for idx in chunk]): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                chunk_hashes, keys, func_store, func_ir_store, func_calls = future.result()
+                self.func_store.store.update(func_store)
+                self.func_ir_store.store.update(func_ir_store)
+                self.func_call_store.update_keys(func_calls)
+                for idx, function_hash, key in zip(futures[future], chunk_hashes, keys):
+                    hashes[idx] = function_hash
+                    self._store_in_cache(funcs[idx], location_from_key(key))
+
+    def get_func_ir(self, func: FunctionType) -> str:
+        """Get the intermediate representation of a Python function, from which its hash is computed.
+
+        On a cache hit, the representation is read from the cache without analyzing any project.
+
+        Args:
+            func: the Python function
+
+        Raises:
+            TypeError: when `func` is a `BuiltinFunctionType` as these do not have accessible source code
+            ValueError: when the source code for `func` cannot be found but it is not a `BuiltinFunctionType`
+
+        Returns:
+            The intermediate representation of the function
+        """
+        entry = self._lookup_cache_entry(func)
+        if entry is not None:
+            return entry.ir
+
+        with self._stores_lock.read():
+            location, project = self._get_location_and_project(func)
+            if location not in self.func_ir_store:
+                self.hash_location(location, project)
+                self._store_in_cache(func, location)
+            return self.func_ir_store[location]
 
     def get_func_location(self, func: FunctionType) -> Location | None:
         """Get the rope.Location of a function.
@@ -207,9 +665,130 @@ class FunctionHasher:
         location, _ = self._get_location_and_project(func)
         return location
 
+    def invalidate(self, paths: Iterable[str | Path]) -> set[tuple[str, int, int, int]]:
+        """Forget the hashes that depend on changed source files, e.g. after editing a module.
+
+        The changed modules are prepared and analyzed again. The functions in these modules and in the modules
+        that (transitively) import them are evicted from the function, IR and call stores, together with all
+        functions that (transitively) call them. Hashing again after a small edit only traces the evicted functions.
+
+        Args:
+            paths: the original source files that were added, modified or removed
+
+        Returns:
+            the keys of the evicted functions
+        """
+        with self._stores_lock.write(), self._rope_lock:
+            changed = {str(path) for path in self.project_store.refresh(paths)}
+            if not changed:
+                return set()
+
+            for path in changed:
+                self._imports.pop(path, None)
+            roots = list(self.project_store.source_roots)
+            modules = {path for path, *_ in self.func_store.store}
+            affected = {path for path in modules if self._get_imports(path, roots) & changed} | changed
+            evicted = self.func_call_store.get_calling_keys(key for key in self.func_store.store if key[0] in affected)
+            for key in evicted:
+                self.func_store.store.pop(key, None)
+                self.func_ir_store.store.pop(key, None)
+            self.func_call_store.remove_keys(evicted)
+            self.module_store.invalidate({Path(path) for path in changed | {key[0] for key in evicted}})
+        return evicted
+
+    def _get_imports(self, path: str, roots: list[Path]) -> set[str]:
+        """The module and the first-party modules it (transitively) imports, memoized per module"""
+        imports = {path}
+        todo = [path]
+        while todo:
+            module = todo.pop()
+            if module not in self._imports:
+                self._imports[module] = {str(imported) for imported in _imported_modules(Path(module), roots)}
+            todo.extend(self._imports[module] - imports)
+            imports.update(self._imports[module])
+        return imports
+
+    def watch(self, interval: float = 1.0) -> SourceWatcher:
+        """Watch the sources of the traced packages, and invalidate the hashes that depend on changed files.
+
+        Args:
+            interval: time between polls, in seconds
+
+        Returns:
+            the started watcher, stop it with `stop` or use it as a context manager
+        """
+        return SourceWatcher(self, interval).start()
+
     def __enter__(self):
         pass
 
     def __exit__(self, _: Any, __: Any, ___: Any) -> None:
-        if self._data_path is not None:
+        if self._temp_dir is not None:
             self._temp_dir.cleanup()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # a pickled hasher shares the configuration and the prepared package sources (e.g. with worker processes),
+        # the analysis and stores are not transferred and the temporary directory remains owned by this hasher
+        state = self.__dict__.copy()
+        state.update(
+            func_store=FunctionStore(),
+            func_ir_store=FunctionStore(),
+            func_call_store=FunctionCallStore(),
+            module_store=ModuleStore(),
+            cache=None,
+            _temp_dir=None,
+        )
+        # locks and per-thread state are recreated, see `__setstate__`
+        for name in ("_local", "_rope_lock", "_stores_lock", "_in_flight", "_in_flight_lock"):
+            del state[name]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._local = threading.local()
+        self._rope_lock = _new_rope_lock(self.thread_safe)
+        self._stores_lock = _ReadWriteLock()
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+
+
+# the hasher of a worker process in `FunctionHasher.hash_funcs`
+_worker_hasher: FunctionHasher | None = None
+
+
+def _initialize_worker(hasher: FunctionHasher) -> None:
+    """Analyze the prepared projects once per worker process."""
+    global _worker_hasher  # noqa: PLW0603
+    # the prepared sources are shared by the workers, which should not write rope data concurrently
+    hasher.project_store.ropefolder = None
+    hasher.project_store.initialize_materialized()
+    _worker_hasher = hasher
+
+
+def _hash_funcs_in_worker(funcs: list[FunctionType]) -> tuple[list[str], list[Any], Any, Any, Any]:
+    """Hash functions in a worker process.
+
+    Returns:
+        the hashes, the keys of the function locations and the entries that were added to the function, IR and
+        call stores while hashing these functions
+    """
+    hasher = _worker_hasher
+    if hasher is None:
+        msg = "Worker is not initialized"
+        raise RuntimeError(msg)
+
+    # the stores of a worker accumulate over its chunks, only the new entries are sent back
+    known = set(hasher.func_store.store)
+    known_ir = set(hasher.func_ir_store.store)
+    known_calls = set(hasher.func_call_store.store)
+
+    hashes, keys = [], []
+    for func in funcs:
+        location, project = hasher._get_location_and_project(func)  # noqa: SLF001
+        hashes.append(hasher.hash_location(location, project))
+        keys.append(_item_to_key(location))
+
+    func_store = {key: value for key, value in hasher.func_store.store.items() if key not in known}
+    func_ir_store = {key: value for key, value in hasher.func_ir_store.store.items() if key not in known_ir}
+    func_calls = hasher.func_call_store.get_keys(exclude=known_calls)
+    return hashes, keys, func_store, func_ir_store, func_calls
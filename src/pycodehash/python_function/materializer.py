@@ -0,0 +1,234 @@
+"""Incremental preparation of package sources in the working directory."""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Sequence
+
+from pycodehash.cache import fingerprint
+from pycodehash.hashing import hash_file_full
+
+if TYPE_CHECKING:
+    from pycodehash.python_function.source_processor import ProjectSourceProcessor
+
+
+@lru_cache(maxsize=None)
+def glob_to_regex(pattern: str) -> re.Pattern:
+    """Translate a glob pattern on posix paths to a regular expression.
+
+    `**` matches any number of directories, `*` and `?` do not match the path separator.
+    """
+    regex = ""
+    idx = 0
+    while idx < len(pattern):
+        if pattern.startswith("**/", idx):
+            regex += "(?:.*/)?"
+            idx += 3
+        elif pattern.startswith("**", idx):
+            regex += ".*"
+            idx += 2
+        elif pattern[idx] == "*":
+            regex += "[^/]*"
+            idx += 1
+        elif pattern[idx] == "?":
+            regex += "[^/]"
+            idx += 1
+        else:
+            regex += re.escape(pattern[idx])
+            idx += 1
+    return re.compile(regex + r"\Z")
+
+
+class GitIgnore:
+    """Subset of the `.gitignore` semantics: (negated) patterns, anchored patterns and directory patterns.
+
+    The `.gitignore` files from the repository root down to the matched path are taken into account.
+    """
+
+    def __init__(self, root: Path):
+        """Initialise the matcher.
+
+        Args:
+            root: the directory whose contents are matched
+        """
+        self.root = root
+        self._rules: dict[Path, list[tuple[re.Pattern, bool, bool]]] = {}
+
+        # .gitignore files above the root apply as well, when the root is part of a git repository
+        self._parents: list[Path] = []
+        for parent in root.parents:
+            self._parents.insert(0, parent)
+            if (parent / ".git").exists():
+                break
+        else:
+            self._parents = []
+
+    def _get_rules(self, directory: Path) -> list[tuple[re.Pattern, bool, bool]]:
+        if directory not in self._rules:
+            rules = []
+            path = directory / ".gitignore"
+            if path.is_file():
+                for raw_line in path.read_text(encoding="utf-8", errors="ignore").splitlines():
+                    line = raw_line.strip()
+                    if not line or line.startswith("#"):
+                        continue
+                    negate = line.startswith("!")
+                    line = line.lstrip("!")
+                    directory_only = line.endswith("/")
+                    line = line.rstrip("/")
+                    pattern = line.lstrip("/") if "/" in line else f"**/{line}"
+                    rules.append((glob_to_regex(pattern), negate, directory_only))
+            self._rules[directory] = rules
+        return self._rules[directory]
+
+    def is_ignored(self, path: Path, is_dir: bool) -> bool:
+        """Check if a path in the root is ignored.
+
+        Note that the parent directories are not checked, ignored directories should not be traversed.
+        """
+        directories = [
+            *self._parents,
+            *(parent for parent in reversed(path.parents) if parent == self.root or self.root in parent.parents),
+        ]
+        ignored = False
+        for directory in directories:
+            relative = path.relative_to(directory).as_posix()
+            for regex, negate, directory_only in self._get_rules(directory):
+                if directory_only and not is_dir:
+                    continue
+                if regex.match(relative):
+                    ignored = not negate
+        return ignored
+
+
+class ProjectMaterializer:
+    """Prepare the source of a package file-by-file, rather than copying the whole directory tree.
+
+    Only files matching the include patterns are materialized. Files are hard-linked when no source
+    processors modify them, and copied otherwise. A manifest keeps track of the content hashes of the
+    materialized files, so that when the source is materialized again into the same directory only
+    new and changed files are copied and passed to the source processors.
+    """
+
+    def __init__(
+        self,
+        include: Sequence[str] = ("**/*.py",),
+        exclude: Sequence[str] = ("**/.*/**", "**/venv/**"),
+        respect_gitignore: bool = True,
+    ):
+        """Initialise the materializer.
+
+        Args:
+            include: glob patterns, relative to the package root, of the files to materialize
+            exclude: glob patterns of the files and directories to skip, by default hidden directories
+                (e.g. `.venv`, `.git`) and `venv`
+            respect_gitignore: skip the files that are ignored by git
+        """
+        self.include = list(include)
+        self.exclude = list(exclude)
+        self.respect_gitignore = respect_gitignore
+
+    def _is_excluded(self, relative: str) -> bool:
+        return any(glob_to_regex(pattern).match(relative) for pattern in self.exclude)
+
+    def collect_files(self, source_root: Path) -> list[str]:
+        """Collect the files to materialize.
+
+        Args:
+            source_root: root of the original package source
+
+        Returns:
+            sorted posix paths relative to the source root
+        """
+        gitignore = GitIgnore(source_root) if self.respect_gitignore else None
+        files = []
+        for directory, dir_names, file_names in os.walk(source_root):
+            current = Path(directory)
+            dir_names[:] = [
+                name
+                for name in dir_names
+                if not self._is_excluded(f"{(current / name).relative_to(source_root).as_posix()}/")
+                and not (gitignore is not None and gitignore.is_ignored(current / name, is_dir=True))
+            ]
+            for name in file_names:
+                relative = (current / name).relative_to(source_root).as_posix()
+                if not any(glob_to_regex(pattern).match(relative) for pattern in self.include):
+                    continue
+                if self._is_excluded(relative):
+                    continue
+                if gitignore is not None and gitignore.is_ignored(current / name, is_dir=False):
+                    continue
+                files.append(relative)
+        return sorted(files)
+
+    @staticmethod
+    def get_manifest_path(target_root: Path) -> Path:
+        return target_root.parent / f".{target_root.name}.manifest.json"
+
+    def materialize(
+        self, source_root: Path, target_root: Path, source_processors: list[ProjectSourceProcessor] | None = None
+    ) -> list[Path]:
+        """Materialize the package source and apply the source processors to the changed files.
+
+        Args:
+            source_root: root of the original package source
+            target_root: root of the materialized package source
+            source_processors: transformations to apply to the materialized files
+
+        Returns:
+            paths of the files that were (re)materialized
+        """
+        source_processors = source_processors or []
+        manifest_path = self.get_manifest_path(target_root)
+        config = fingerprint(self, source_processors)
+
+        manifest: dict[str, list] = {}
+        if manifest_path.is_file():
+            data = json.loads(manifest_path.read_text(encoding="utf-8"))
+            if data.get("config") == config:
+                manifest = data["files"]
+
+        files = self.collect_files(source_root)
+        new_manifest: dict[str, list] = {}
+        changed = []
+        for relative in files:
+            source = source_root / relative
+            target = target_root / relative
+            stat = source.stat()
+            entry = manifest.get(relative)
+            if entry is not None and entry[1:] == [stat.st_mtime_ns, stat.st_size] and target.exists():
+                new_manifest[relative] = entry
+                continue
+
+            digest = hash_file_full(source)
+            new_manifest[relative] = [digest, stat.st_mtime_ns, stat.st_size]
+            if entry is not None and entry[0] == digest and target.exists():
+                continue
+
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # never write through an existing (hard-linked) file
+            target.unlink(missing_ok=True)
+            if source_processors:
+                shutil.copy2(source, target)
+            else:
+                try:
+                    os.link(source, target)
+                except OSError:
+                    shutil.copy2(source, target)
+            changed.append(target)
+
+        for relative in manifest.keys() - new_manifest.keys():
+            (target_root / relative).unlink(missing_ok=True)
+
+        if changed:
+            for source_processor in source_processors:
+                source_processor.transform_files(changed)
+
+        target_root.mkdir(parents=True, exist_ok=True)
+        manifest_path.write_text(json.dumps({"config": config, "files": new_manifest}), encoding="utf-8")
+        return changed
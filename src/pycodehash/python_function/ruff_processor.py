@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from tempfile import NamedTemporaryFile
+from pathlib import Path
+from tempfile import NamedTemporaryFile, TemporaryDirectory
 
 from pycodehash.python_function.ruff_project_processor import RuffProjectProcessor
 from pycodehash.python_function.source_processor import SourceProcessor
@@ -18,3 +19,14 @@ class RuffProcessor(SourceProcessor):
             self.ruff_path_processor.transform(fp.name)
 
             return fp.read().strip()
+
+    def transform_batch(self, sources: list[str]) -> list[str]:
+        """Apply ruff to multiple sources with a single invocation, using a file per source."""
+        with TemporaryDirectory() as temp_dir:
+            paths = [Path(temp_dir) / f"source_{idx}.py" for idx in range(len(sources))]
+            for path, source in zip(paths, sources):
+                path.write_text(source, encoding="utf-8")
+
+            self.ruff_path_processor.transform(temp_dir)
+
+            return [path.read_text(encoding="utf-8").strip() for path in paths]
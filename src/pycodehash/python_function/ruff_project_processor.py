@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import subprocess
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Sequence
 
 from pycodehash.python_function.source_processor import ProjectSourceProcessor
 
@@ -9,11 +9,11 @@ if TYPE_CHECKING:
     from pathlib import Path
 
 
-def _ruff_check(path: str, select: list[str], unsafe: bool, preview: bool) -> None:
+def _ruff_check(paths: list[str], select: list[str], unsafe: bool, preview: bool) -> None:
     """Apply ruff check autofixes for a list of rules.
 
     Args:
-        path: path to pass to ruff check
+        paths: paths to pass to ruff check
         select: list of lint codes
         unsafe: if True, also apply autofixes marked as "unsafe"
         preview: if True, also apply autofixes marked as "preview"
@@ -34,7 +34,7 @@ def _ruff_check(path: str, select: list[str], unsafe: bool, preview: bool) -> No
         cmd.append("--unsafe-fixes")
     if preview:
         cmd.append("--preview")
-    cmd.append(path)
+    cmd.extend(paths)
 
     result = subprocess.run(cmd, check=False)
     if result.returncode != 0:
@@ -42,13 +42,13 @@ def _ruff_check(path: str, select: list[str], unsafe: bool, preview: bool) -> No
         raise RuntimeError(msg)
 
 
-def _ruff_fmt(path: str) -> None:
-    """Apply ruff formatting to a path
+def _ruff_fmt(paths: list[str]) -> None:
+    """Apply ruff formatting to paths
 
     Args:
-        path: path to pass to ruff format
+        paths: paths to pass to ruff format
     """
-    cmd = ["ruff", "format", "--isolated", "--no-cache", "--quiet", path]
+    cmd = ["ruff", "format", "--isolated", "--no-cache", "--quiet", *paths]
 
     result = subprocess.run(cmd, check=False)
     if result.returncode != 0:
@@ -65,5 +65,9 @@ class RuffProjectProcessor(ProjectSourceProcessor):
         self.preview = preview
 
     def transform(self, path: str | Path) -> None:
-        _ruff_check(str(path), self.select, self.unsafe, self.preview)
-        _ruff_fmt(str(path))
+        self.transform_files([path])
+
+    def transform_files(self, paths: Sequence[str | Path]) -> None:
+        """Apply ruff to multiple files with a single invocation per command."""
+        _ruff_check([str(path) for path in paths], self.select, self.unsafe, self.preview)
+        _ruff_fmt([str(path) for path in paths])
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Sequence
 
 if TYPE_CHECKING:
     from pathlib import Path
@@ -14,6 +14,13 @@ class SourceProcessor(ABC):
     def transform(self, src: str) -> str:
         pass
 
+    def transform_batch(self, sources: list[str]) -> list[str]:
+        """Transform multiple sources at once.
+
+        Override when processing sources together is more efficient than one-by-one.
+        """
+        return [self.transform(src) for src in sources]
+
 
 class ProjectSourceProcessor(ABC):
     """Base class for inplace transforming operating on a project"""
@@ -21,3 +28,11 @@ class ProjectSourceProcessor(ABC):
     @abstractmethod
     def transform(self, path: str | Path) -> None:
         pass
+
+    def transform_files(self, paths: Sequence[str | Path]) -> None:
+        """Transform a selection of files in a project.
+
+        Override when processing files together is more efficient than one-by-one.
+        """
+        for path in paths:
+            self.transform(path)
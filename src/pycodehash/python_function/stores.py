@@ -2,29 +2,64 @@ from __future__ import annotations
 
 import inspect
 import shutil
+import threading
 from collections import defaultdict
 from dataclasses import dataclass
 from importlib.util import find_spec
 from pathlib import Path
-from typing import TYPE_CHECKING, Callable, Iterator
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator
 
 import asttokens
-from rope.base.libutils import analyze_modules
-from rope.base.project import Project
+from rope.base.libutils import analyze_module, analyze_modules
+from rope.base.project import NoProject, Project
+from rope.base.resources import File
+from rope.contrib.findit import Location
+
+from pycodehash.python_function.tracing import CallResolver, DefinitionIndex
 
 if TYPE_CHECKING:
     import ast
 
+    from asttokens.util import Token
     from rope.base.pyobjectsdef import PyModule
-    from rope.contrib.findit import Location
 
     from pycodehash.python_function import ProjectSourceProcessor
+    from pycodehash.python_function.materializer import ProjectMaterializer
 
 
 def _item_to_key(item: Location):
     return item.resource.path, item.region[0], item.region[1], item.lineno
 
 
+class _KeyOccurrence:
+    """Minimal occurrence to restore a `Location` from a store key"""
+
+    def __init__(self, key: tuple[str, int, int, int]):
+        path, start, end, lineno = key
+        self.resource = File(project=NoProject(), name=path)
+        self.lineno = lineno
+        self._region = (start, end)
+
+    def get_word_range(self) -> tuple[int, int]:
+        return self._region
+
+    @staticmethod
+    def is_unsure() -> bool:
+        return False
+
+
+def location_from_key(key: tuple[str, int, int, int]) -> Location:
+    """Restore a `Location` from a store key, e.g. when merging stores from another process.
+
+    Args:
+        key: tuple of resource path, region start, region end and line number
+
+    Returns:
+        location with the same key
+    """
+    return Location(_KeyOccurrence(key))
+
+
 class FunctionStore:
     def __init__(self):
         self.store: dict[tuple[str, int, int, int], str] = {}
@@ -45,6 +80,8 @@ class FunctionStore:
 class FunctionCallStore:
     def __init__(self):
         self.store: defaultdict[tuple[str, int, int, int], list[Location]] = defaultdict(list)
+        # reverse edges: the keys of the callers by the key of the callee
+        self.callers: defaultdict[tuple[str, int, int, int], set[tuple[str, int, int, int]]] = defaultdict(set)
 
     def __getitem__(self, item: Location) -> list[Location]:
         return self.store[_item_to_key(item)]
@@ -52,11 +89,114 @@ class FunctionCallStore:
     def __setitem__(self, item: Location, value: Location) -> None:
         key = _item_to_key(item)
         self.store[key].append(value)
+        self.callers[_item_to_key(value)].add(key)
 
     def __contains__(self, item: Location) -> bool:
         key = _item_to_key(item)
         return key in self.store
 
+    def get_reachable_keys(self, item: Location) -> set[tuple[str, int, int, int]]:
+        """Keys of the location and of all locations that are (transitively) called from it."""
+        keys = set()
+        todo = [_item_to_key(item)]
+        while todo:
+            key = todo.pop()
+            if key in keys:
+                continue
+            keys.add(key)
+            todo.extend(_item_to_key(callee) for callee in self.store.get(key, []))
+        return keys
+
+    def get_calling_keys(self, keys: Iterable[tuple[str, int, int, int]]) -> set[tuple[str, int, int, int]]:
+        """The keys and the keys of all locations that (transitively) call them, following the reverse edges."""
+        calling = set()
+        todo = list(keys)
+        while todo:
+            key = todo.pop()
+            if key in calling:
+                continue
+            calling.add(key)
+            todo.extend(self.callers.get(key, ()))
+        return calling
+
+    def remove_keys(self, keys: Iterable[tuple[str, int, int, int]]) -> None:
+        """Remove the calls of functions, e.g. before they are hashed again."""
+        for key in keys:
+            for callee in self.store.pop(key, []):
+                callers = self.callers.get(_item_to_key(callee))
+                if callers is not None:
+                    callers.discard(key)
+
+    def get_keys(
+        self, exclude: set[tuple[str, int, int, int]] | None = None
+    ) -> dict[tuple[str, int, int, int], list[tuple[str, int, int, int]]]:
+        """Calls as keys, which unlike `Location` objects can be passed between processes.
+
+        Args:
+            exclude: the keys of the callers of which the calls are left out
+        """
+        exclude = exclude or set()
+        return {
+            key: [_item_to_key(callee) for callee in callees]
+            for key, callees in self.store.items()
+            if key not in exclude
+        }
+
+    def update_keys(self, calls: dict[tuple[str, int, int, int], list[tuple[str, int, int, int]]]) -> None:
+        """Add the calls of functions that are not yet in the store, see `get_keys`."""
+        for key, callees in calls.items():
+            if key not in self.store:
+                self.store[key] = [location_from_key(callee) for callee in callees]
+                for callee in callees:
+                    self.callers[callee].add(key)
+
+
+class OffsetIndex:
+    """Maps the start and end positions of the tokens in a module to character offsets.
+
+    Positions are (lineno, col_offset) pairs as used by the AST, where the column is a UTF-8 byte offset.
+    The index is built once, after which looking up the text range of a node takes constant time.
+    """
+
+    def __init__(self, code: str, tokens: list[Token]):
+        """Initialise the index.
+
+        Args:
+            code: the module source
+            tokens: the tokens of the module, e.g. from `asttokens.ASTTokens`
+        """
+        line_numbers = asttokens.LineNumbers(code)
+        is_ascii = code.isascii()
+
+        def to_position(row: int, col: int) -> tuple[int, int]:
+            if is_ascii:
+                return row, col
+            line_start = line_numbers.line_to_offset(row, 0)
+            return row, len(code[line_start : line_start + col].encode("utf-8"))
+
+        self.starts: dict[tuple[int, int], int] = {}
+        self.ends: dict[tuple[int, int], int] = {}
+        for token in tokens:
+            self.starts[to_position(*token.start)] = token.startpos
+            self.ends[to_position(*token.end)] = token.endpos
+
+    def get_text_range(self, node: ast.expr) -> tuple[int, int]:
+        """Get the character offsets of a node.
+
+        Args:
+            node: ast Node
+
+        Returns:
+            Offset tuple. Returns 0,0 if not found
+        """
+        if node.end_lineno is None or node.end_col_offset is None:
+            return 0, 0
+        start = self.starts.get((node.lineno, node.col_offset))
+        end = self.ends.get((node.end_lineno, node.end_col_offset))
+        if start is None or end is None:
+            return 0, 0
+        return start, end
+
 
 @dataclass
 class ModuleView:
@@ -66,11 +206,14 @@ class ModuleView:
     code: str
     tree: ast.Module
     tree_tokens: asttokens.ASTTokens
+    offsets: OffsetIndex
 
 
 class ModuleStore:
     def __init__(self):
         self.store: dict[str, ModuleView] = {}
+        # resolvers of the calls in a module, by module name and project address
+        self.resolvers: dict[tuple[str, str], CallResolver] = {}
 
     def __getitem__(self, item: PyModule) -> ModuleView:
         """Retrieve ModuleView from module.
@@ -93,8 +236,26 @@ class ModuleStore:
         code = module.resource.read()
         tree = module.get_ast()
         tree_tokens = asttokens.ASTTokens(code, parse=False, tree=tree)
+        offsets = OffsetIndex(code, tree_tokens.tokens)
+
+        self.store[name] = ModuleView(
+            pkg=pkg, name=name, path=path, code=code, tree=tree, tree_tokens=tree_tokens, offsets=offsets
+        )
 
-        self.store[name] = ModuleView(pkg=pkg, name=name, path=path, code=code, tree=tree, tree_tokens=tree_tokens)
+    def invalidate(self, paths: set[Path]) -> None:
+        """Remove the views and call resolvers of the modules at these paths, e.g. after they changed."""
+        names = {name for name, mview in self.store.items() if Path(mview.path) in paths}
+        for name in names:
+            del self.store[name]
+        for key in [key for key in self.resolvers if key[0] in names]:
+            del self.resolvers[key]
+
+    def get_resolver(self, mview: ModuleView, project: Project, index: DefinitionIndex | None = None) -> CallResolver:
+        """Retrieve the call resolver for a module and project, see `CallResolver`."""
+        key = (mview.name, project.address)
+        if key not in self.resolvers:
+            self.resolvers[key] = CallResolver(project, mview.code, index)
+        return self.resolvers[key]
 
 
 class ProjectStore:
@@ -102,18 +263,50 @@ class ProjectStore:
 
     Each package results in a project which is analyzed by Rope.
     Note that analyzing a large package can be fairly slow.
+    Packages are prepared and analyzed at most once, also when requested from multiple threads,
+    while different packages can be prepared concurrently.
     """
 
-    def __init__(self, tempdir: Path | None = None, source_processors: list[ProjectSourceProcessor] | None = None):
+    def __init__(
+        self,
+        tempdir: Path | None = None,
+        source_processors: list[ProjectSourceProcessor] | None = None,
+        materializer: ProjectMaterializer | None = None,
+        incremental: bool = False,
+        lazy: bool = False,
+    ):
         """Initialise the class.
 
         Args:
             tempdir: path to the tempdir, or None if modified inplace
             source_processors: transformations to apply to the entire project source
+            materializer: prepares the source in the tempdir file-by-file, instead of copying the entire tree
+            incremental: if True, rope's object database is saved in the project folder, and when it exists
+                only the modules that were (re)materialized are analyzed. Requires a materializer.
+            lazy: if True, the modules are not analyzed when the project is created, but on demand before
+                the calls in a module are traced, see `analyze`
         """
         self.store: dict[str, Project] = {}
+        # maps the root of each (copied) project to the root of its original source
+        self.source_roots: dict[Path, Path] = {}
+        # maps the package name to the root of its prepared source
+        self.materialized: dict[str, Path] = {}
+        # name of the folder in which rope stores its project data, None to not store any data
+        self.ropefolder: str | None = ".ropeproject"
         self.tempdir = tempdir
         self.source_processors = source_processors or []
+        self.materializer = materializer
+        self.incremental = incremental
+        self.lazy = lazy
+        # paths of the modules that were analyzed on demand
+        self.analyzed: set[str] = set()
+        # definition index per project address
+        self.indexes: dict[str, DefinitionIndex] = {}
+        self._lock = threading.Lock()
+        self._package_locks: dict[str, threading.RLock] = {}
+        if incremental and (tempdir is None or materializer is None):
+            msg = "Incremental analysis requires a tempdir and a materializer."
+            raise ValueError(msg)
         if tempdir is None and source_processors is not None:
             msg = (
                 "It's not supported to modify projects in-place. Either enable `use_tempdir` or remove "
@@ -132,16 +325,32 @@ class ProjectStore:
         """
         return self.store[item]
 
-    def _initialize_project(self, pkg: str):
-        """Create and set a project.
+    def materialize(self, pkg: str) -> Path:
+        """Locate the source of a package and prepare it for analysis.
 
         If the package name is not provided, then assume
         the project root is the current working directory.
+        When a tempdir is used, the source is copied and the source processors are applied to the copy.
 
         Args:
             pkg: package name
 
+        Returns:
+            project_root: root of the prepared source
         """
+        if pkg not in self.materialized:
+            with self._package_lock(pkg):
+                if pkg not in self.materialized:
+                    self._materialize(pkg)
+        return self.materialized[pkg]
+
+    def _package_lock(self, pkg: str) -> threading.RLock:
+        """Lock that guards the preparation and analysis of a package"""
+        with self._lock:
+            return self._package_locks.setdefault(pkg, threading.RLock())
+
+    def _materialize(self, pkg: str) -> None:
+        """Prepare the source of a package, see `materialize`"""
         if pkg == "__main__":
             # See "Known issues" in CONTRIBUTING.md
             msg = (
@@ -159,28 +368,206 @@ class ProjectStore:
         project_root = (
             Path.cwd() if spec.submodule_search_locations is None else Path(spec.submodule_search_locations[0])
         )
-        if self.tempdir is not None:
+        source_root = project_root.absolute()
+        if self.tempdir is not None and self.materializer is not None:
+            new_project_root = (self.tempdir / project_root.name).absolute()
+            changed = self.materializer.materialize(source_root, new_project_root, self.source_processors)
+            if self.incremental and self.ropefolder is not None and changed:
+                self._record_pending(new_project_root, changed)
+            project_root = new_project_root
+        elif self.tempdir is not None:
             new_project_root = self.tempdir / project_root.name
-            # note: this may copy unintended files such as the `venv` folder
+            # note: this may copy unintended files such as the `venv` folder, see `ProjectMaterializer`
             shutil.copytree(project_root, str(new_project_root), dirs_exist_ok=True, symlinks=True)
             project_root = new_project_root.absolute()
 
             for source_processor in self.source_processors:
                 source_processor.transform(project_root)
 
-        project = Project(projectroot=project_root, python_path=[str(self.tempdir)])
-        analyze_modules(project)
+        self.source_roots[Path(project_root)] = source_root
+        self.materialized[pkg] = Path(project_root)
+
+    def _initialize_project(self, pkg: str):
+        """Create and set a project.
+
+        Args:
+            pkg: package name
+
+        """
+        project_root = self.materialize(pkg)
+        incremental = self.incremental and self.ropefolder is not None
+        has_objectdb = incremental and self._rope_path(project_root, "objectdb").is_file()
+        project = Project(
+            projectroot=project_root,
+            ropefolder=self.ropefolder,
+            python_path=[str(self.tempdir)],
+            save_objectdb=incremental,
+            validate_objectdb=incremental,
+        )
+        if self.lazy:
+            # modules are analyzed on demand, see `analyze`, and remain pending until then
+            pass
+        elif has_objectdb:
+            # only analyze the modules that changed since the object database was saved
+            pending = self._rope_path(project_root, "pending")
+            paths = set(pending.read_text(encoding="utf-8").splitlines()) if pending.is_file() else set()
+            for path in sorted(paths):
+                if path.endswith(".py") and (project_root / path).is_file():
+                    analyze_module(project, project.get_file(path))
+        else:
+            analyze_modules(project)
+        if incremental and not self.lazy:
+            project.sync()
+            self._rope_path(project_root, "pending").unlink(missing_ok=True)
         self.store[pkg] = project
 
+    def _rope_path(self, project_root: Path, name: str) -> Path:
+        """Path of a file in the rope folder of a project, only available in incremental mode"""
+        assert self.ropefolder is not None
+        return project_root / self.ropefolder / name
+
+    def _record_pending(self, project_root: Path, paths: Iterable[Path]) -> None:
+        """Record the prepared modules that are not yet analyzed.
+
+        The modules are recorded until they are analyzed and the object database is saved, so that an interrupted
+        (or lazy) run does not leave the object database outdated.
+        """
+        pending = self._rope_path(project_root, "pending")
+        pending.parent.mkdir(parents=True, exist_ok=True)
+        with pending.open("a", encoding="utf-8") as fp:
+            fp.writelines(f"{path.relative_to(project_root).as_posix()}\n" for path in paths)
+
+    def _record_analyzed(self, project: Project, project_root: Path, path: Path) -> None:
+        """Save the object database after a module was analyzed on demand, and remove it from the pending modules"""
+        project.sync()
+        pending = self._rope_path(project_root, "pending")
+        if not pending.is_file():
+            return
+        analyzed = path.relative_to(project_root).as_posix()
+        remaining = [line for line in pending.read_text(encoding="utf-8").splitlines() if line != analyzed]
+        pending.write_text("".join(f"{line}\n" for line in remaining), encoding="utf-8")
+
+    def analyze(self, project: Project, resource: File) -> None:
+        """Analyze a module on demand, in lazy mode.
+
+        Rope's static object analysis infers, for example, the types of parameters from the calls in a module.
+        Modules are analyzed in the order in which they are traced, so callers are analyzed before their callees.
+
+        Args:
+            project: the project that contains the module
+            resource: the module, which may be referred to by its absolute path
+        """
+        if not self.lazy or resource.path in self.analyzed:
+            return
+        self.analyzed.add(resource.path)
+        # the traced locations refer to modules by their absolute path, outside of the project
+        project_root = Path(project.address)
+        path = Path(resource.real_path)
+        if project_root not in path.parents:
+            return
+        analyze_module(project, project.get_file(path.relative_to(project_root).as_posix()))
+        if self.incremental and self.ropefolder is not None:
+            self._record_analyzed(project, project_root, path)
+
+    def refresh(self, paths: Iterable[str | Path]) -> list[Path]:
+        """Prepare changed source files again and let rope pick up the changes.
+
+        Only the given files are prepared and passed to the source processors (the materializer compares the
+        modification times of all files). The changed modules are analyzed again, in lazy mode on demand.
+
+        Args:
+            paths: the original source files that were added, modified or removed
+
+        Returns:
+            the paths of the prepared files that correspond to the source files in one of the packages
+        """
+        sources = [Path(path).absolute() for path in paths]
+        refreshed = []
+        for pkg, project_root in list(self.materialized.items()):
+            source_root = self.source_roots[project_root]
+            changed = [source for source in sources if source_root in source.parents]
+            if not changed:
+                continue
+            with self._package_lock(pkg):
+                targets = self._rematerialize(source_root, project_root, changed)
+                project = self.store.get(pkg)
+                if project is not None:
+                    self._refresh_project(project, project_root, targets)
+            refreshed.extend(targets)
+        return refreshed
+
+    def _rematerialize(self, source_root: Path, project_root: Path, sources: list[Path]) -> list[Path]:
+        targets = [project_root / source.relative_to(source_root) for source in sources]
+        if self.tempdir is None:
+            return targets
+        if self.materializer is not None:
+            self.materializer.materialize(source_root, project_root, self.source_processors)
+            return targets
+
+        copied = []
+        for source, target in zip(sources, targets):
+            if source.is_file():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(source, target)
+                copied.append(target)
+            else:
+                target.unlink(missing_ok=True)
+        if copied:
+            for source_processor in self.source_processors:
+                source_processor.transform_files(copied)
+        return targets
+
+    def _refresh_project(self, project: Project, project_root: Path, targets: list[Path]) -> None:
+        # rope checks the modification times of the modules it cached
+        project.validate()
+        index = self.indexes.get(project.address)
+        for target in targets:
+            # modules are referred to relative to the project and by their absolute path
+            resources = [project.get_file(target.relative_to(project_root).as_posix()), File(NoProject(), str(target))]
+            for resource in resources:
+                self.analyzed.discard(resource.path)
+                if index is not None:
+                    index.invalidate(resource)
+            if not self.lazy and target.suffix == ".py" and target.is_file():
+                analyze_module(project, resources[0])
+        if self.incremental and self.ropefolder is not None:
+            project.sync()
+            if self.lazy:
+                # analyzed again on demand
+                self._record_pending(project_root, targets)
+
+    def get_definition_index(self, project: Project) -> DefinitionIndex:
+        """Retrieve the definition index of a project, see `DefinitionIndex`."""
+        if project.address not in self.indexes:
+            self.indexes[project.address] = DefinitionIndex(project)
+        return self.indexes[project.address]
+
+    def get_source_path(self, path: str | Path) -> Path:
+        """Map a path inside a (copied) project to the corresponding original source file.
+
+        Args:
+            path: path to a file in one of the projects
+
+        Returns:
+            path to the original file, or the path itself if it is not part of a copied project
+        """
+        path = Path(path)
+        for project_root, source_root in list(self.source_roots.items()):
+            if project_root in path.parents:
+                return source_root / path.relative_to(project_root)
+        return path
+
     def add_project(self, pkg: str):
         """Explicitly add a project for tracing.
 
         Args:
             pkg: the name of the package to be analyzed
         """
-        self._initialize_project(pkg)
+        with self._package_lock(pkg):
+            self._initialize_project(pkg)
 
-    def get_or_create_for_func(self, func: Callable) -> Project:
+    @staticmethod
+    def get_package_for_func(func: Callable) -> str:
         # get the module from the function
         module = inspect.getmodule(func)
         if module is None:
@@ -188,9 +575,37 @@ class ProjectStore:
             raise ValueError(msg)
         name = module.__name__
         pkg, _, _ = name.partition(".")
-        if pkg not in self.store:
-            self._initialize_project(pkg)
+        return pkg
+
+    def get_or_create_for_func(self, func: Callable) -> Project:
+        pkg = self.get_package_for_func(func)
+        self._ensure_project(pkg)
         return self[pkg]
 
+    def _ensure_project(self, pkg: str) -> None:
+        if pkg not in self.store:
+            with self._package_lock(pkg):
+                if pkg not in self.store:
+                    self._initialize_project(pkg)
+
+    def initialize_materialized(self) -> None:
+        """Create the projects for all prepared packages, in the order in which they were prepared."""
+        for pkg in list(self.materialized):
+            self._ensure_project(pkg)
+
     def __iter__(self) -> Iterator[Project]:
-        yield from self.store.values()
+        yield from list(self.store.values())
+
+    def __getstate__(self) -> dict[str, Any]:
+        # rope projects cannot be pickled, the prepared sources can be shared
+        state = self.__dict__.copy()
+        state["store"] = {}
+        state["analyzed"] = set()
+        state["indexes"] = {}
+        del state["_lock"], state["_package_locks"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._package_locks = {}
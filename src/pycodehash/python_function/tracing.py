@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import ast
+import re
 from pathlib import Path
 from typing import TYPE_CHECKING, Callable
 
 from rope.base import worder
+from rope.base.exceptions import ModuleSyntaxError
 from rope.base.project import NoProject, Project
 from rope.base.pynamesdef import DefinedName, ImportedModule, ImportedName
 from rope.base.resources import File
@@ -15,37 +17,103 @@ from rope.refactor import occurrences
 from pycodehash.python_function.utils import contains_call
 
 if TYPE_CHECKING:
-    from asttokens.util import Token
+    from rope.base.pynames import PyName
     from rope.refactor.occurrences import Occurrence
 
     from pycodehash.python_function.stores import ModuleView
 
 
-def _get_text_range(node: ast.expr, tokens: list[Token]):
-    """Get string offset from ast Node
-    This is a workaround since `asttoken.get_text_range` needs to be an "EnhancedAST" node...
+def check_func_definition(occurrence: Occurrence):
+    return occurrence.is_defined()
 
-    Args:
-        node: ast Node
-        tokens: asttoken tokens
 
-    Returns:
-        Offset tuple. Returns 0,0 if not found
-    """
-    start = end = None
-    for token in tokens:
-        if token.start == (node.lineno, node.col_offset):
-            start = token.startpos
-        if token.end == (node.end_lineno, node.end_col_offset):
-            end = token.endpos
-    if start is not None and end is not None:
-        return start, end
+# the part of a function or class header before its name
+_DEFINITION_HEADER = re.compile(r"(?:def|class)[ \t]+")
 
-    return 0, 0
 
+class _IndexedOccurrence:
+    """Minimal occurrence of a definition name to create a `Location`"""
 
-def check_func_definition(occurrence: Occurrence):
-    return occurrence.is_defined()
+    def __init__(self, resource: File, start: int, end: int, lineno: int):
+        self.resource = resource
+        self.lineno = lineno
+        self._region = (start, end)
+
+    def get_word_range(self) -> tuple[int, int]:
+        return self._region
+
+    @staticmethod
+    def is_unsure() -> bool:
+        return False
+
+
+class DefinitionIndex:
+    """Locations of the function and class definitions in the modules of a project, by name.
+
+    A module is indexed from its AST on first use, after which finding a definition does not require
+    scanning the module text with `occurrences.Finder`. The definitions of a name are sorted by offset,
+    the first is the same as the first occurrence that `check_func_definition` accepts.
+    Modules that cannot be indexed are marked as such, the tracing functions then fall back to rope.
+    """
+
+    def __init__(self, project: Project):
+        """Initialise the index.
+
+        Args:
+            project: the analysed project
+        """
+        self.project = project
+        self._modules: dict[str, dict[str, list[Location]] | None] = {}
+
+    def get_definitions(self, resource: File, name: str) -> list[Location] | None:
+        """Get the definitions of a name in a module.
+
+        Args:
+            resource: the module
+            name: name of the function or class
+
+        Returns:
+            locations sorted by offset, or None if the module could not be indexed
+        """
+        if resource.path not in self._modules:
+            self._modules[resource.path] = self._index_module(resource)
+        definitions = self._modules[resource.path]
+        if definitions is None:
+            return None
+        return definitions.get(name, [])
+
+    def invalidate(self, resource: File) -> None:
+        """Remove a module from the index, e.g. after it changed."""
+        self._modules.pop(resource.path, None)
+
+    def _index_module(self, resource: File) -> dict[str, list[Location]] | None:
+        try:
+            pymodule = self.project.get_pymodule(resource)
+            code = pymodule.source_code
+            tree = pymodule.get_ast()
+        except ModuleSyntaxError:
+            return None
+
+        lines = pymodule.lines
+        definitions: dict[str, list[Location]] = {}
+        for node in ast.walk(tree):
+            # like `check_func_definition`, only names directly preceded by `def` or `class` on their line
+            if not isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+                continue
+            line_start = lines.get_line_start(node.lineno)
+            col = len(lines.get_line(node.lineno).encode("utf-8")[: node.col_offset].decode("utf-8", errors="ignore"))
+            match = _DEFINITION_HEADER.match(code, line_start + col)
+            if match is None or code[match.end() : match.end() + len(node.name)] != node.name:
+                continue
+            if code[line_start : match.end()].strip() not in {"def", "class"}:
+                continue
+            start, end = match.end(), match.end() + len(node.name)
+            occurrence = _IndexedOccurrence(resource, start, end, node.lineno)
+            definitions.setdefault(node.name, []).append(Location(occurrence))
+
+        for locations in definitions.values():
+            locations.sort(key=lambda location: location.offset)
+        return definitions
 
 
 def robust_extract_name(node: ast.Call, code: str, offset: int) -> str:
@@ -61,13 +129,102 @@ def robust_extract_name(node: ast.Call, code: str, offset: int) -> str:
     return ""
 
 
-def get_func_call_location(node: ast.Call, project: Project, mview: ModuleView) -> Location | None:
+class CallResolver:
+    """Resolves the definitions of the calls in a module for a project.
+
+    The module source is parsed once, and the names at call offsets and their definition locations are memoized,
+    so that a function that is called from many call sites is resolved once.
+    """
+
+    def __init__(self, project: Project, code: str, index: DefinitionIndex | None = None):
+        """Initialise the resolver.
+
+        Args:
+            project: the analysed project
+            code: the source of the module that contains the calls
+            index: index of the definitions in the project, to find definitions without scanning the module text
+        """
+        self.project = project
+        self.code = code
+        self.index = index
+        self.fixer = fixsyntax.FixSyntax(project, code, resource=None)
+        self._pynames: dict[int, PyName | None] = {}
+        self._locations: dict[tuple[PyName, str, str | None], Location | None] = {}
+
+    def pyname_at(self, offset: int) -> PyName | None:
+        if offset not in self._pynames:
+            self._pynames[offset] = self.fixer.pyname_at(offset)
+        return self._pynames[offset]
+
+    def get_definition_location(self, pyname: PyName, name: str, imported_name: str | None) -> Location | None:
+        """Get the location of the definition of a name.
+
+        Args:
+            pyname: the rope name at the call
+            name: the name of the called function
+            imported_name: the name to search for when rope does not trace the import properly
+
+        Returns:
+            location: the rope location object or None if no location could be found
+        """
+        key = (pyname, name, imported_name)
+        if key not in self._locations:
+            self._locations[key] = self._find_definition_location(pyname, name, imported_name)
+        return self._locations[key]
+
+    def _find_definition_location(self, pyname: PyName, name: str, imported_name: str | None) -> Location | None:
+        project = self.project
+        module, lineno = pyname.get_definition_location()
+        # restrict tracing to first party modules
+        project_path = Path(project.address)
+        module_resource = module.get_resource()
+        if module_resource is not None and project_path not in module_resource.pathlib.parents:
+            return None
+
+        # a function or class that is defined at the line of the name
+        if lineno is not None and module_resource is not None and self.index is not None:
+            definitions = self.index.get_definitions(module_resource, name)
+            if definitions is not None:
+                candidates = [location for location in definitions if location.lineno == lineno]
+                if len(candidates) == 1:
+                    return candidates[0]
+
+        # -- default rope tracing block
+        if lineno is not None:
+            start = module.lines.get_line_start(lineno)
+
+            def check_offset(occurrence: Occurrence):
+                if occurrence.offset < start:
+                    return False
+                return None
+
+            pyname_filter = occurrences.PyNameFilter(pyname)
+            finder = occurrences.Finder(project, name, [check_offset, pyname_filter])
+            for occurrence in finder.find_occurrences(pymodule=module):
+                location = Location(occurrence)
+                if location.resource is None or project_path in location.resource.pathlib.parents:
+                    return location
+
+        # handle imports which are not properly traced by rope
+        if imported_name is not None:
+            finder = occurrences.Finder(project, imported_name, [check_func_definition])
+            for occurrence in finder.find_occurrences(pymodule=module):
+                location = Location(occurrence)
+                if location.resource is None or project_path in location.resource.pathlib.parents:
+                    return location
+        return None
+
+
+def get_func_call_location(
+    node: ast.Call, project: Project, mview: ModuleView, resolver: CallResolver | None = None
+) -> Location | None:
     """Get location of function definition of an ast.Call node.
 
     Args:
         node: the call node in the source function
         project: the analysed project
         module: the view on the module that contains the function in which `node` is called.
+        resolver: resolver for the module and project, to reuse the lookups of other calls in the module
 
     Returns:
         location: the rope location object or None if no location could be found
@@ -76,56 +233,26 @@ def get_func_call_location(node: ast.Call, project: Project, mview: ModuleView)
         ValueError: when Call is not found in the AST Tree
     """
     code = mview.code
-    offset_start, offset_end = mview.tree_tokens.get_text_range(node)
-    if offset_end == 0:
-        # TODO(RU): figure out why this needed.
-        # try slower workaround when tree tokens seem to be out of date
-        offset_start, offset_end = _get_text_range(node, mview.tree_tokens.tokens)
+    offset_start, offset_end = mview.offsets.get_text_range(node)
     if offset_end == 0:
         return None
 
-    fixer = fixsyntax.FixSyntax(project, code, resource=None)
-    pyname = fixer.pyname_at(offset_start)
+    resolver = resolver or CallResolver(project, code)
+    pyname = resolver.pyname_at(offset_start)
     if pyname is None or not isinstance(pyname, (DefinedName, ImportedModule, ImportedName)):
         return None
 
-    module, lineno = pyname.get_definition_location()
-    # restrict tracing to first party modules
-    project_path = Path(project.address)
-    module_resource = module.get_resource()
-    if module_resource is not None and project_path not in module_resource.pathlib.parents:
-        return None
-
     # handle name selection when there are chained calls
     name = robust_extract_name(node, code, offset_start)
 
-    # -- default rope tracing block
-    if lineno is not None:
-        start = module.lines.get_line_start(lineno)
-
-        def check_offset(occurrence: Occurrence):
-            if occurrence.offset < start:
-                return False
-            return None
-
-        pyname_filter = occurrences.PyNameFilter(pyname)
-        finder = occurrences.Finder(project, name, [check_offset, pyname_filter])
-        for occurrence in finder.find_occurrences(pymodule=module):
-            location = Location(occurrence)
-            if location.resource is None or project_path in location.resource.pathlib.parents:
-                return location
-
-    # handle imports which are not properly traced by rope
-    if isinstance(pyname, (ImportedName, ImportedModule)):
+    imported_name = None
+    if isinstance(pyname, ImportedModule):
         # we assume that as this is an ImportedModule that the node has an ast.Attribute
         # as func rather than an ast.Name
-        name = node.func.attr if isinstance(pyname, ImportedModule) else pyname.imported_name  # type: ignore[attr-defined]
-        finder = occurrences.Finder(project, name, [check_func_definition])
-        for occurrence in finder.find_occurrences(pymodule=module):
-            location = Location(occurrence)
-            if location.resource is None or project_path in location.resource.pathlib.parents:
-                return location
-    return None
+        imported_name = getattr(node.func, "attr", None)
+    elif isinstance(pyname, ImportedName):
+        imported_name = pyname.imported_name
+    return resolver.get_definition_location(pyname, name, imported_name)
 
 
 def get_func_node_from_location(location: Location, project: Project) -> ast.FunctionDef:
@@ -137,18 +264,25 @@ def get_func_node_from_location(location: Location, project: Project) -> ast.Fun
     return func.ast_node
 
 
-def get_func_def_location(func: Callable, project: Project) -> Location | None:
+def get_func_def_location(func: Callable, project: Project, index: DefinitionIndex | None = None) -> Location | None:
     """Get the location of function definition from a FunctionType.
 
     Args:
         func: the function to obtain the location for
         project: the analysed project
+        index: index of the definitions in the project, to find the definition without scanning the module text
 
     Returns:
         location: the rope location object or None if no location could be found
     """
     module = project.get_module(func.__module__)
 
+    resource = module.get_resource()
+    if index is not None and resource is not None:
+        definitions = index.get_definitions(resource, func.__name__)
+        if definitions is not None:
+            return definitions[0] if definitions and Path(project.address) in resource.pathlib.parents else None
+
     finder = occurrences.Finder(project, func.__name__, [check_func_definition])
     for occurrence in finder.find_occurrences(pymodule=module):
         location = Location(occurrence)
@@ -157,8 +291,10 @@ def get_func_def_location(func: Callable, project: Project) -> Location | None:
     return None
 
 
-def find_call_definition(node: ast.Call, module: ModuleView, project: Project) -> Location | None:
-    loc = get_func_call_location(node, project, module)
+def find_call_definition(
+    node: ast.Call, module: ModuleView, project: Project, resolver: CallResolver | None = None
+) -> Location | None:
+    loc = get_func_call_location(node, project, module, resolver)
     if loc is None:
         return None
 
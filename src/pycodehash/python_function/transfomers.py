@@ -29,6 +29,7 @@ class HashCallNameTransformer(NodeTransformer):
             if module is not None:
                 self.project = project
                 break
+        self.project_store.analyze(self.project, location.resource)
         self.module: ModuleView = self.hasher.module_store[module]
         self.hash_repr: str | None = None
 
@@ -38,7 +39,9 @@ class HashCallNameTransformer(NodeTransformer):
         # the first project is the one to which the module belongs.
         projects = chain([self.project], (project for project in self.project_store if project != self.project))
         for project in projects:
-            location = find_call_definition(node, self.module, project)
+            index = self.project_store.get_definition_index(project)
+            resolver = self.hasher.module_store.get_resolver(self.module, project, index)
+            location = find_call_definition(node, self.module, project, resolver)
 
             if isinstance(location, Location):
                 # store the calls
@@ -0,0 +1,119 @@
+"""Watch the sources of the traced packages for changes."""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pycodehash.python_function.hashing import FunctionHasher
+
+logger = logging.getLogger(__name__)
+
+
+def scan_sources(root: Path) -> dict[str, tuple[int, int]]:
+    """Modification time and size of the Python sources in a directory, recursively
+
+    Args:
+        root: the directory
+
+    Returns:
+        the modification time (in nanoseconds) and size by path
+    """
+    sources = {}
+    todo = [str(root)]
+    while todo:
+        with os.scandir(todo.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    todo.append(entry.path)
+                elif entry.name.endswith(".py"):
+                    stat = entry.stat()
+                    sources[entry.path] = (stat.st_mtime_ns, stat.st_size)
+    return sources
+
+
+class SourceWatcher:
+    """Polls the sources of the packages of a `FunctionHasher`, and invalidates the hashes that depend on changes.
+
+    The sources of a package are watched from the first poll (or `snapshot`) after the package was initialized.
+    Polling only uses the standard library: a poll lists the directories and compares the modification times and
+    sizes of the Python files with those of the previous poll.
+    """
+
+    def __init__(self, hasher: FunctionHasher, interval: float = 1.0):
+        """Initialise the watcher.
+
+        Args:
+            hasher: the hasher of which the hashes are invalidated, see `FunctionHasher.invalidate`
+            interval: time between polls in the background, in seconds
+        """
+        self.hasher = hasher
+        self.interval = interval
+        # the sources when they were last polled, by source root
+        self._snapshots: dict[Path, dict[str, tuple[int, int]]] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def snapshot(self) -> None:
+        """Start watching the packages that were initialized since the last poll."""
+        with self._lock:
+            for root in list(self.hasher.project_store.source_roots.values()):
+                if root not in self._snapshots:
+                    self._snapshots[root] = scan_sources(root)
+
+    def poll(self) -> list[str]:
+        """Invalidate the hashes that depend on the source files that changed since the last poll.
+
+        Returns:
+            the paths of the source files that were added, removed or modified
+        """
+        with self._lock:
+            changed: list[str] = []
+            for root, previous in self._snapshots.items():
+                current = scan_sources(root)
+                changed.extend(
+                    path for path in previous.keys() | current.keys() if previous.get(path) != current.get(path)
+                )
+                self._snapshots[root] = current
+            if changed:
+                evicted = self.hasher.invalidate(changed)
+                logger.info("%d source file(s) changed, evicted %d function(s)", len(changed), len(evicted))
+        self.snapshot()
+        return sorted(changed)
+
+    def start(self) -> SourceWatcher:
+        """Poll in a background thread."""
+        self.snapshot()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="pycodehash-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self._try_poll()
+
+    def _try_poll(self) -> None:
+        try:
+            self.poll()
+        except Exception:  # noqa: BLE001
+            logger.warning("Could not poll the sources", exc_info=True)
+
+    def stop(self) -> None:
+        """Stop polling in the background."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> SourceWatcher:
+        return self
+
+    def __exit__(self, _: Any, __: Any, ___: Any) -> None:
+        self.stop()
@@ -1,19 +1,40 @@
 from __future__ import annotations
 
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, as_completed, wait
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
 
+import sqlfluff
 from sqlfluff import parse
+from sqlfluff.api.simple import get_simple_config
+from sqlfluff.core.parser import Lexer
 
+from pycodehash.cache import fingerprint
 from pycodehash.datasets.approximate_hasher import inline_metadata
-from pycodehash.hashing import hash_string
+from pycodehash.hashing import hash_file_full, hash_string
 from pycodehash.sql.comment_filter import CommentFilter
 from pycodehash.sql.default_database_filter import DefaultDatabaseFilter
 from pycodehash.sql.whitespace_filter import WhitespaceFilter
 
 if TYPE_CHECKING:
+    from pycodehash.cache import SQLiteCache
     from pycodehash.sql.ast_transformer import ASTTransformer
 
+_WHITESPACE_TYPES = {"whitespace", "newline"}
+
+# hasher of the worker processes of `SQLHasher.hash_files`
+_worker_hasher: SQLHasher | None = None
+
+
+def _init_worker(hasher: SQLHasher) -> None:
+    global _worker_hasher  # noqa: PLW0603
+    _worker_hasher = hasher
+
+
+def _hash_file_in_worker(file_path: str) -> tuple[str | None, str | None]:
+    assert _worker_hasher is not None
+    return _worker_hasher.try_hash_file(file_path)
+
 
 class SQLHasher:
     """Hash an SQL file or query using `SQLFluff <https://docs.sqlfluff.com/en/stable/index.html>`_."""
@@ -24,6 +45,7 @@ class SQLHasher:
         dialect: str = "ansi",
         config_path: str | None = None,
         default_db: str | None = None,
+        cache: SQLiteCache | None = None,
     ):
         """Initialize the SQLHasher object
 
@@ -32,6 +54,10 @@ class SQLHasher:
             dialect: SQLFluff `dialect <https://docs.sqlfluff.com/en/stable/dialects.html>`_
             config_path: SQLFLuff `config path <https://docs.sqlfluff.com/en/stable/configuration.html>`_
             default_db: default database
+            cache: persistent cache of query hashes, keyed by the hash of the query and by the hash of the lexed
+                tokens of the query. `hash_query` only lexes queries that were not hashed before, and only parses
+                queries of which the tokens (ignoring whitespace and comments that are filtered anyway) were not
+                hashed before. The hashes are identical. Use a `LRUSQLiteCache` to bound its size.
         """
         self.dialect = dialect
         self.config_path = config_path
@@ -41,6 +67,10 @@ class SQLHasher:
                 ast_transformers.append(DefaultDatabaseFilter(default_db))
 
         self.ast_transformers = ast_transformers
+        self.cache = cache
+        # recent SQLFluff versions select the `Lexer` class at runtime, which is not a valid annotation
+        self._lexer: Any = None
+        self._config: str | None = None
 
     def hash_file(self, file_path: Path | str):
         """Hash the query in a file
@@ -56,6 +86,109 @@ class SQLHasher:
         query = file_path.read_text()
         return self.hash_query(query)
 
+    def try_hash_file(self, file_path: Path | str) -> tuple[str | None, str | None]:
+        """Hash the query in a file, returning the error rather than raising it
+
+        Returns:
+            the hash and None, or None and the error message if the file could not be read or parsed
+        """
+        try:
+            return self.hash_file(file_path), None
+        except Exception as e:  # noqa: BLE001
+            return None, f"{type(e).__name__}: {e}"
+
+    def hash_files(
+        self, file_paths: Iterable[Path | str], workers: int | None = None
+    ) -> tuple[dict[str, str], dict[str, str]]:
+        """Hash the queries in multiple files
+
+        Parsing is CPU-bound, with `workers` the files are parsed in parallel in a pool of processes.
+        A file that cannot be hashed does not abort the others.
+
+        Args:
+            file_paths: locations of the files
+            workers: number of processes, by default the files are hashed in the current process
+
+        Returns:
+            the hash per file, and the error message per file that could not be hashed
+        """
+        paths = [str(file_path) for file_path in file_paths]
+        results: list[tuple[str | None, str | None]]
+        if workers is None:
+            results = [self.try_hash_file(path) for path in paths]
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,))
+            chunksize = max(1, min(32, len(paths) // (workers * 4)))
+            with executor:
+                results = list(executor.map(_hash_file_in_worker, paths, chunksize=chunksize))
+
+        hashes: dict[str, str] = {}
+        errors: dict[str, str] = {}
+        for path, (query_hash, error) in zip(paths, results):
+            if error is not None:
+                errors[path] = error
+            elif query_hash is not None:
+                hashes[path] = query_hash
+        return hashes, errors
+
+    def iter_hash_files(
+        self, file_paths: Iterable[Path | str], workers: int | None = None
+    ) -> Iterator[tuple[str, str | None, str | None]]:
+        """Hash the queries in multiple files, yielding the result of each file as soon as it is hashed
+
+        The file paths are read as they are needed, at most `2 * workers` files are pending at a time.
+
+        Args:
+            file_paths: locations of the files
+            workers: number of processes, by default the files are hashed in the current process, in order
+
+        Yields:
+            the file path, and the hash or the error message if the file could not be hashed
+        """
+        if workers is None:
+            for file_path in file_paths:
+                yield (str(file_path), *self.try_hash_file(file_path))
+            return
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,)) as executor:
+            pending: dict[Future[tuple[str | None, str | None]], str] = {}
+            for file_path in file_paths:
+                path = str(file_path)
+                pending[executor.submit(_hash_file_in_worker, path)] = path
+                # only block on the pool when it is full, otherwise yield the results that are ready
+                done, _ = wait(pending, timeout=None if len(pending) >= 2 * workers else 0, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield (pending.pop(future), *future.result())
+            for future in as_completed(pending):
+                yield (pending[future], *future.result())
+
+    def hash_directory(
+        self, root: Path | str, glob: str = "**/*.sql", workers: int | None = None
+    ) -> tuple[dict[str, str], dict[str, str]]:
+        """Hash the queries in all files in a directory, see `hash_files`
+
+        Args:
+            root: the directory
+            glob: pattern of the files to hash, relative to `root`
+            workers: number of processes, by default the files are hashed in the current process
+
+        Returns:
+            the hash per file, and the error message per file that could not be hashed, by path relative to `root`
+        """
+        root = Path(root)
+        file_paths = sorted(path for path in root.glob(glob) if path.is_file())
+        hashes, errors = self.hash_files(file_paths, workers=workers)
+        return (
+            {Path(path).relative_to(root).as_posix(): query_hash for path, query_hash in hashes.items()},
+            {Path(path).relative_to(root).as_posix(): error for path, error in errors.items()},
+        )
+
+    def __getstate__(self) -> dict[str, Any]:
+        # the lexer is created again when needed
+        state = self.__dict__.copy()
+        state["_lexer"] = None
+        return state
+
     def hash_query(self, query: str):
         """Hash an SQL query
 
@@ -65,6 +198,78 @@ class SQLHasher:
         Returns:
             String hash of the query
         """
+        if self.cache is None:
+            return self._hash_ast(query)
+
+        # unchanged queries are found without lexing, reformatted queries without parsing
+        config = self._get_config()
+        query_key = f"{config}:query:{hash_string(query)}"
+        query_hash = self.cache.get(query_key)
+        if query_hash is not None:
+            return query_hash
+
+        tokens_key = f"{config}:tokens:{self.hash_tokens(query)}"
+        query_hash = self.cache.get(tokens_key)
+        if query_hash is None:
+            query_hash = self._hash_ast(query)
+            if self._get_config() != config:
+                # the query changed the state of a transformer (e.g. the default database of a `USE` statement),
+                # which a cache hit would not do
+                return query_hash
+            self.cache[tokens_key] = query_hash
+        self.cache[query_key] = query_hash
+        return query_hash
+
+    def _get_config(self) -> str:
+        """Fingerprint of everything that influences the parse and the transformations, part of the cache key
+
+        The state of the transformers is included, as it can change between queries.
+        """
+        if self._config is None:
+            config_digest = None
+            if self.config_path is not None and Path(self.config_path).is_file():
+                config_digest = hash_file_full(self.config_path)
+            self._config = fingerprint(sqlfluff.__version__, self.dialect, config_digest)
+        return fingerprint(self._config, self.ast_transformers)
+
+    def hash_tokens(self, query: str) -> str:
+        """Hash of the query after lexing, which is much faster than parsing
+
+        Queries with the same tokens have the same parse tree. When the `WhitespaceFilter` or `CommentFilter`
+        are used, whitespace and comments only contribute whether there is a gap between two tokens, and
+        whether that gap contains a newline. Comments with inline SQLFluff configuration are always included.
+
+        Args:
+            query: query
+
+        Returns:
+            String hash of the tokens
+        """
+        if self._lexer is None:
+            self._lexer = Lexer(config=get_simple_config(dialect=self.dialect, config_path=self.config_path))
+        segments, _ = self._lexer.lex(query)
+
+        collapsed_types = set()
+        if any(isinstance(transformer, WhitespaceFilter) for transformer in self.ast_transformers):
+            collapsed_types |= _WHITESPACE_TYPES
+        if any(isinstance(transformer, CommentFilter) for transformer in self.ast_transformers):
+            collapsed_types.add("comment")
+
+        tokens = []
+        gap = None
+        for segment in segments:
+            if segment.type in collapsed_types and not (segment.type == "comment" and "sqlfluff:" in segment.raw):
+                gap = "\n" if gap == "\n" or "\n" in segment.raw else " "
+                continue
+            if gap is not None:
+                tokens.append(gap)
+                gap = None
+            tokens.append(f"{segment.type}:{segment.raw}")
+        if gap is not None:
+            tokens.append(gap)
+        return hash_string("\0".join(tokens))
+
+    def _hash_ast(self, query: str) -> str:
         ast = parse(query, dialect=self.dialect, config_path=self.config_path)
         for transformer in self.ast_transformers:
             ast = transformer.generic_transform(ast)
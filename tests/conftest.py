@@ -1,4 +1,7 @@
 import ast
+import importlib
+import sys
+import uuid
 from pathlib import Path
 
 import pytest
@@ -29,3 +32,20 @@ def resource_node(resource_file: Path) -> ast.AST:
     """
     source_code = resource_file.read_text()
     return ast.parse(source_code)
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    """Temporary first-party package: `main` calls `helper` through a re-export in `__init__`"""
+    name = f"tpkg_{uuid.uuid4().hex[:8]}"
+    root = tmp_path / "src" / name
+    root.mkdir(parents=True)
+    (root / "__init__.py").write_text(f"from {name}.helpers import helper\n")
+    (root / "helpers.py").write_text("def helper(x):\n    return x + 1\n")
+    (root / "alternative.py").write_text("def helper(x):\n    return x + 3\n")
+    (root / "main.py").write_text(f"from {name} import helper\n\n\ndef main(x):\n    return helper(x) * 2\n")
+    (root / "other.py").write_text("def other():\n    return 1\n")
+    monkeypatch.syspath_prepend(str(root.parent))
+    yield root, importlib.import_module(f"{name}.main")
+    for module in [module for module in sys.modules if module.startswith(name)]:
+        del sys.modules[module]
@@ -1,7 +1,46 @@
-from pycodehash.datasets.approximate_hasher import inline_metadata
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from pycodehash.datasets.approximate_hasher import ApproximateHasher, PartitionedApproximateHasher, inline_metadata
 
 
 def test_inline_metadata_invariant():
     d1 = {"k1": "v1", "k2": "v2"}
     d2 = {"k2": "v2", "k1": "v1"}
     assert inline_metadata(d1) == inline_metadata(d2)
+
+
+class _LengthHash(ApproximateHasher):
+    @staticmethod
+    def collect_metadata(value: str) -> dict[str, Any]:
+        return {"length": len(value)}
+
+
+class _NestedHash(PartitionedApproximateHasher):
+    @staticmethod
+    def collect_partitions(partitions: dict[str, Any]) -> dict[str, Any]:
+        return partitions
+
+
+def test_partitioned_hasher_concurrent():
+    partitions = {"a": "x", "b": {"c": "yy", "d": {"e": "zzz"}}, "f": "w"}
+    expected = _NestedHash(_LengthHash()).collect_metadata(partitions)
+    result = _NestedHash(_LengthHash(), max_workers=3).collect_metadata(partitions)
+    assert result == expected
+    assert list(result) == ["a", "b", "f"]
+    assert list(result["b"]) == ["c", "d"]
+
+
+def test_partitioned_hasher_async():
+    partitions = {"a": "x", "b": {"c": "yy", "d": {"e": "zzz"}}, "f": "w"}
+    hasher = _NestedHash(_LengthHash(), max_workers=2)
+
+    async def gather():
+        return await asyncio.gather(hasher.acollect_metadata(partitions), hasher.acompute_hash(partitions))
+
+    metadata, digest = asyncio.run(gather())
+    assert metadata == hasher.collect_metadata(partitions)
+    assert list(metadata["b"]) == ["c", "d"]
+    assert digest == hasher.compute_hash(partitions)
@@ -1,7 +1,10 @@
+from types import SimpleNamespace
+
 import pytest
 
 try:
-    from pycodehash.datasets.hive import HiveTableHash
+    from py4j.protocol import Py4JJavaError
+    from pycodehash.datasets.hive import HivePartition, HiveTableHash, HiveTablesHash, PartitionedHiveTableHash
     from pyspark.sql import SparkSession
 
     spark_found = True
@@ -55,3 +58,108 @@ def test_approximate_hasher_hive(spark, employee_dataset):
     assert initial_hash != third_hash
     third_metadata = hasher.collect_metadata(table_name)
     assert third_metadata["Statistics"] == "12361 bytes"
+
+
+@pytest.fixture(scope="function")
+def sales_dataset(spark, tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp("sales")
+    table_name = "sales"
+    sales = spark.sparkContext.parallelize(
+        [
+            (1, 10.0, "2024-01-01", "NL"),
+            (2, 20.0, "2024-01-01", "BE"),
+            (3, 30.0, "2024-01-02", "NL"),
+            (4, 40.0, "2024-01-03", "NL"),
+        ]
+    ).toDF(["id", "amount", "date", "country"])
+    sales.write.mode("overwrite").partitionBy("date", "country").option("path", str(tmp_path)).saveAsTable(table_name)
+    return sales, table_name
+
+
+@pytest.mark.skipif(not spark_found, reason="spark not found - install spark")
+def test_approximate_hasher_hive_partitions(spark, sales_dataset):
+    sales_df, table_name = sales_dataset
+
+    hasher = PartitionedHiveTableHash(spark)
+    partitions = hasher.collect_partitions(table_name)
+    assert list(partitions) == [
+        "date=2024-01-01/country=BE",
+        "date=2024-01-01/country=NL",
+        "date=2024-01-02/country=NL",
+        "date=2024-01-03/country=NL",
+    ]
+    assert list(hasher.collect_partitions(table_name, partial_spec={"country": "NL"}, start="date=2024-01-02")) == [
+        "date=2024-01-02/country=NL",
+        "date=2024-01-03/country=NL",
+    ]
+    assert list(hasher.collect_partitions(table_name, end="date=2024-01-02")) == [
+        "date=2024-01-01/country=BE",
+        "date=2024-01-01/country=NL",
+    ]
+
+    # the catalog and `DESCRIBE FORMATTED` report the same metadata
+    initial_metadata = hasher.collect_metadata(table_name)
+    for name, partition in partitions.items():
+        described_partition = HivePartition(partition.table_name, partition.spec)
+        assert hasher.hasher.compute_hash(described_partition) == initial_metadata[name]
+
+    sales_df.filter("date = '2024-01-03'").write.mode("append").insertInto(table_name)
+    metadata = hasher.collect_metadata(table_name)
+    assert metadata["date=2024-01-03/country=NL"] != initial_metadata["date=2024-01-03/country=NL"]
+    assert metadata["date=2024-01-01/country=NL"] == initial_metadata["date=2024-01-01/country=NL"]
+
+
+@pytest.mark.skipif(not spark_found, reason="spark not found - install spark")
+def test_approximate_hasher_hive_tables(spark, employee_dataset, sales_dataset):
+    _, _, employee_table = employee_dataset
+    _, sales_table = sales_dataset
+
+    hasher = HiveTablesHash(spark)
+    metadata = hasher.collect_metadata([employee_table, sales_table, "missing_table"])
+    table_hasher = HiveTableHash(spark)
+    assert metadata == {
+        table_name: table_hasher.compute_hash(table_name)
+        for table_name in (employee_table, sales_table, "missing_table")
+    }
+
+
+class _Rows:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def collect(self):
+        return self.rows
+
+
+class _SessionWithoutCatalog:
+    """Spark session of which the JVM catalog cannot be accessed, as with Spark Connect"""
+
+    def __init__(self):
+        self.queries = []
+
+    def sql(self, query):
+        self.queries.append(query)
+        return _Rows([("date=2024-01-01",), ("date=2024-01-02",)])
+
+
+@pytest.mark.skipif(not spark_found, reason="spark not found - install spark")
+def test_partitioned_hive_table_hash_catalog_fallback(caplog):
+    spark = _SessionWithoutCatalog()
+    partitions = PartitionedHiveTableHash(spark).collect_partitions("sales")
+    assert list(partitions) == ["date=2024-01-01", "date=2024-01-02"]
+    assert spark.queries == ["SHOW PARTITIONS sales"]
+    assert "Catalog of the Spark session is not available" in caplog.text
+
+
+@pytest.mark.skipif(not spark_found, reason="spark not found - install spark")
+def test_partitioned_hive_table_hash_catalog_error(monkeypatch):
+    def list_catalog_partitions(*_):
+        msg = "An error occurred while calling getTableMetadata"
+        raise Py4JJavaError(msg, SimpleNamespace(_target_id="o1"))
+
+    spark = _SessionWithoutCatalog()
+    hasher = PartitionedHiveTableHash(spark)
+    monkeypatch.setattr(hasher, "_list_catalog_partitions", list_catalog_partitions)
+    with pytest.raises(Py4JJavaError):
+        hasher.collect_partitions("missing_table")
+    assert spark.queries == []
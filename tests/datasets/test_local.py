@@ -1,5 +1,16 @@
+import asyncio
+import os
+
 import pytest
-from pycodehash.datasets.local import LocalDirectoryHash, LocalFileHash
+from pycodehash.datasets.local import (
+    IncrementalDirectoryHash,
+    LocalDirectoryContentHash,
+    LocalDirectoryHash,
+    LocalFileContentHash,
+    LocalFileHash,
+    LocalFilesHash,
+)
+from pycodehash.hashing import hash_file_full
 
 
 @pytest.fixture(scope="function")
@@ -74,3 +85,88 @@ def test_approximate_hasher_local_directory(local_dataset_directory):
 
     third_metadata = hasher.collect_metadata(local_dataset_directory)
     assert len(third_metadata.keys()) == 5
+
+
+def test_approximate_hasher_local_directory_concurrent(local_dataset_directory):
+    expected = LocalDirectoryHash().compute_hash(local_dataset_directory)
+    hasher = LocalDirectoryHash(max_workers=4)
+    assert hasher.compute_hash(local_dataset_directory) == expected
+    assert hasher.collect_metadata(local_dataset_directory) == LocalDirectoryHash().collect_metadata(
+        local_dataset_directory
+    )
+
+
+def test_approximate_hasher_local_files_concurrent(local_dataset_directory):
+    files = {"a": str(local_dataset_directory / "my_file1.txt"), "b": str(local_dataset_directory / "my_file2.txt")}
+    assert LocalFilesHash(max_workers=2).compute_hash(files) == LocalFilesHash().compute_hash(files)
+
+
+def test_approximate_hasher_local_file_dir_entry(local_dataset_directory):
+    hasher = LocalFileHash()
+    entries = {entry.name: entry for entry in os.scandir(local_dataset_directory)}
+    assert hasher.collect_metadata(entries["my_file1.txt"]) == hasher.collect_metadata(
+        local_dataset_directory / "my_file1.txt"
+    )
+    with pytest.raises(TypeError):
+        hasher.collect_metadata(entries["subdir"])
+
+
+def test_local_directory_content_hash(local_dataset_directory):
+    hasher = LocalDirectoryContentHash(max_workers=2)
+    metadata = hasher.collect_metadata(local_dataset_directory)
+    assert metadata["subdir"] == {"my_file4.txt": hash_file_full(local_dataset_directory / "subdir" / "my_file4.txt")}
+    assert metadata == LocalDirectoryContentHash(max_workers=None).collect_metadata(local_dataset_directory)
+
+    initial_tree = hasher.collect_tree(local_dataset_directory)
+    assert hasher.compute_hash(local_dataset_directory) == initial_tree.digest
+
+    # touching a file without changing its contents does not change the hash
+    os.utime(local_dataset_directory / "my_file1.txt", (0, 0))
+    assert hasher.compute_hash(local_dataset_directory) == initial_tree.digest
+
+    (local_dataset_directory / "subdir" / "my_file4.txt").write_text("Hello Uranus!")
+    (local_dataset_directory / "my_file2.txt").unlink()
+    (local_dataset_directory / "newdir").mkdir()
+    tree = hasher.collect_tree(local_dataset_directory)
+    assert tree.digest != initial_tree.digest
+    assert tree.children["my_file1.txt"] == initial_tree.children["my_file1.txt"]
+    assert tree.children["subdir"].digest != initial_tree.children["subdir"].digest
+    assert initial_tree.diff(tree) == ["my_file2.txt", "newdir", "subdir/my_file4.txt"]
+
+
+@pytest.mark.parametrize("content", [False, True])
+def test_incremental_directory_hash(local_dataset_directory, tmp_path_factory, content):
+    manifest_path = tmp_path_factory.mktemp("manifest") / "manifest.bin"
+    # files modified right before the scan are never trusted, pretend the dataset is older
+    for file_path in local_dataset_directory.rglob("*.txt"):
+        os.utime(file_path, ns=(10**18, 10**18))
+
+    hasher = IncrementalDirectoryHash(manifest_path, content=content, max_workers=2)
+    full_hasher = IncrementalDirectoryHash(tmp_path_factory.mktemp("empty") / "manifest.bin", content=content)
+    initial_hash = hasher.compute_hash(local_dataset_directory)
+    assert manifest_path.exists()
+    if not content:
+        assert initial_hash == LocalDirectoryHash().compute_hash(local_dataset_directory)
+
+    hashed = []
+    compute_hash = hasher.hasher.compute_hash
+    hasher.hasher.compute_hash = lambda entry: hashed.append(entry.name) or compute_hash(entry)
+    assert hasher.compute_hash(local_dataset_directory) == initial_hash
+    assert hashed == []
+
+    # `LocalFileHash` only takes the size into account
+    (local_dataset_directory / "subdir" / "my_file4.txt").write_text("Hello Neptune!")
+    second_hash = hasher.compute_hash(local_dataset_directory)
+    assert hashed == ["my_file4.txt"]
+    assert second_hash != initial_hash
+    assert second_hash == full_hasher.compute_hash(local_dataset_directory)
+
+
+def test_local_hashers_async(local_dataset_directory):
+    hashers = [LocalDirectoryHash(max_workers=2), LocalDirectoryContentHash(max_workers=2), LocalFileContentHash()]
+    paths = [local_dataset_directory, local_dataset_directory, local_dataset_directory / "my_file1.txt"]
+
+    async def gather():
+        return await asyncio.gather(*(hasher.acompute_hash(path) for hasher, path in zip(hashers, paths)))
+
+    assert asyncio.run(gather()) == [hasher.compute_hash(path) for hasher, path in zip(hashers, paths)]
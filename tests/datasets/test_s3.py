@@ -1,6 +1,9 @@
+import asyncio
+
 import boto3
+import pytest
 from moto import mock_aws
-from pycodehash.datasets.s3 import S3Hash, s3path_to_bucket_key
+from pycodehash.datasets.s3 import S3DirectoryHash, S3FilesHash, S3Hash, s3path_to_bucket_key
 
 
 def test_s3path_to_bucket_key():
@@ -27,3 +30,73 @@ def test_s3_hash():
     assert result["__file0__ETag"] == "5eb63bbbe01eeed093cb22bb8f5acdc3"
 
     assert s3h.compute_hash(s3_file_path) == "06922e5e834ad51fb456c1fd787cd494bc6f71b2f4184e40d3dd95f5727149fb"
+
+
+@mock_aws
+def test_s3_hash_pagination():
+    bucket_name = "bucket_name"
+    client = boto3.client("s3", region_name="us-east-1")
+    client.create_bucket(Bucket=bucket_name)
+    # more than the 1000 objects that are returned per request
+    for idx in range(1001):
+        client.put_object(Bucket=bucket_name, Key=f"folder/file{idx:04d}.txt", Body=str(idx))
+
+    s3h = S3Hash(s3_client=client)
+    result = s3h.collect_metadata(f"s3://{bucket_name}/folder/")
+    assert len(result) == 1001
+    assert result["__file1000__ETag"] == client.head_object(Bucket=bucket_name, Key="folder/file1000.txt")[
+        "ETag"
+    ].strip('"')
+
+    with pytest.raises(FileNotFoundError):
+        s3h.collect_metadata(f"s3://{bucket_name}/missing/")
+
+
+@mock_aws
+def test_s3_directory_hash():
+    bucket_name = "bucket_name"
+    client = boto3.client("s3", region_name="us-east-1")
+    client.create_bucket(Bucket=bucket_name)
+    client.put_object(Bucket=bucket_name, Key="table/", Body="")
+    client.put_object(Bucket=bucket_name, Key="table/_SUCCESS", Body="")
+    for date in ("2024-01-01", "2024-01-02"):
+        for idx in range(2):
+            client.put_object(Bucket=bucket_name, Key=f"table/date={date}/part{idx}.parquet", Body=f"{date}{idx}")
+
+    hasher = S3DirectoryHash(s3_client=client, max_workers=4)
+    partitions = hasher.collect_partitions(f"s3://{bucket_name}/table")
+    assert partitions == {
+        "_SUCCESS": f"s3://{bucket_name}/table/_SUCCESS",
+        "date=2024-01-01": f"s3://{bucket_name}/table/date=2024-01-01/",
+        "date=2024-01-02": f"s3://{bucket_name}/table/date=2024-01-02/",
+    }
+
+    s3h = S3Hash(s3_client=client)
+    metadata = hasher.collect_metadata(f"s3://{bucket_name}/table/")
+    assert metadata["date=2024-01-01"] == s3h.compute_hash(partitions["date=2024-01-01"])
+    assert metadata == S3DirectoryHash(s3_client=client, max_workers=None).collect_metadata(
+        f"s3://{bucket_name}/table/"
+    )
+
+    initial_hash = hasher.compute_hash(f"s3://{bucket_name}/table/")
+    client.put_object(Bucket=bucket_name, Key="table/date=2024-01-02/part0.parquet", Body="changed")
+    assert hasher.compute_hash(f"s3://{bucket_name}/table/") != initial_hash
+    assert hasher.collect_metadata(f"s3://{bucket_name}/table/")["date=2024-01-01"] == metadata["date=2024-01-01"]
+
+    files = S3FilesHash(s3_client=client, max_workers=2)
+    assert files.compute_hash(list(partitions.values())) == S3FilesHash(
+        s3_client=client, max_workers=None
+    ).compute_hash(list(partitions.values()))
+
+
+@mock_aws
+def test_s3_hash_async():
+    bucket_name = "bucket_name"
+    client = boto3.client("s3", region_name="us-east-1")
+    client.create_bucket(Bucket=bucket_name)
+    for idx in range(3):
+        client.put_object(Bucket=bucket_name, Key=f"table/part{idx}/file.txt", Body=str(idx))
+
+    hasher = S3DirectoryHash(s3_client=client, max_workers=2)
+    digest = asyncio.run(hasher.acompute_hash(f"s3://{bucket_name}/table/"))
+    assert digest == hasher.compute_hash(f"s3://{bucket_name}/table/")
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import pickle
+
+import pytest
+import tliba
+from pycodehash import FunctionHashCache, FunctionHasher
+from pycodehash.python_function.stores import ProjectStore
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return FunctionHashCache(tmp_path / "cache.sqlite")
+
+
+def _disable_projects(monkeypatch):
+    def _fail(*_):
+        msg = "project should not be initialized on a cache hit"
+        raise AssertionError(msg)
+
+    monkeypatch.setattr(ProjectStore, "get_or_create_for_func", _fail)
+
+
+def test_cache_hit_skips_project(cache, monkeypatch):
+    tfunc = tliba.etl.combine_random_samples
+    expected = FunctionHasher().hash_func(tfunc)
+
+    assert FunctionHasher(cache=cache).hash_func(tfunc) == expected
+    assert len(cache) == 1
+
+    _disable_projects(monkeypatch)
+    assert FunctionHasher(cache=cache).hash_func(tfunc) == expected
+
+
+def test_cache_hit_ir(cache, monkeypatch):
+    tfunc = tliba.etl.combine_random_samples
+    fh = FunctionHasher()
+    fh.hash_func(tfunc)
+    expected = fh.func_ir_store[fh.get_func_location(tfunc)]
+
+    assert FunctionHasher(cache=cache).get_func_ir(tfunc) == expected
+    assert len(cache) == 1
+
+    _disable_projects(monkeypatch)
+    assert FunctionHasher(cache=cache).get_func_ir(tfunc) == expected
+
+
+def test_cache_config_in_key(cache):
+    tfunc = tliba.etl.combine_random_samples
+    FunctionHasher(cache=cache).hash_func(tfunc)
+    FunctionHasher(cache=cache, packages=["tliba", "tlibb"]).hash_func(tfunc)
+    assert len(cache) == 2
+
+
+def test_cache_invalidation(cache, package, monkeypatch):
+    root, module = package
+    initial = FunctionHasher(cache=cache).hash_func(module.main)
+
+    # unrelated module in the same package
+    (root / "other.py").write_text("def other():\n    return 2\n")
+    with monkeypatch.context() as m:
+        _disable_projects(m)
+        assert FunctionHasher(cache=cache).hash_func(module.main) == initial
+
+    # callee module changed
+    (root / "helpers.py").write_text("def helper(x):\n    return x + 2\n")
+    changed = FunctionHasher(cache=cache).hash_func(module.main)
+    assert changed != initial
+    assert changed == FunctionHasher().hash_func(module.main)
+
+    # only the re-export changed
+    (root / "__init__.py").write_text(f"from {root.name}.alternative import helper\n")
+    reexported = FunctionHasher(cache=cache).hash_func(module.main)
+    assert reexported != changed
+    assert reexported == FunctionHasher().hash_func(module.main)
+
+
+def test_cache_pickle(cache):
+    cache["key"] = "value"
+    restored = pickle.loads(pickle.dumps(cache))
+    assert restored.table == "functions"
+    assert restored["key"] == "value"
@@ -0,0 +1,15 @@
+from pycodehash.python_function.call_graph import strongly_connected_components
+
+
+def test_strongly_connected_components():
+    graph = {"a": ["b"], "b": ["c", "x"], "c": ["a", "d"], "d": [], "e": ["e", "a"]}
+    # callees come before their callers, edges to unknown nodes are ignored
+    assert strongly_connected_components(graph) == [["d"], ["a", "b", "c"], ["e"]]
+
+
+def test_strongly_connected_components_deep():
+    n_nodes = 100_000
+    graph = {idx: [idx + 1] for idx in range(n_nodes)}
+    assert len(strongly_connected_components(graph)) == n_nodes
+    graph[n_nodes - 1] = [0]
+    assert strongly_connected_components(graph) == [list(range(n_nodes))]
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+import importlib
+import random
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import TYPE_CHECKING
 
 import pytest
 import tliba
 from pycodehash import FunctionHasher
+from pycodehash.python_function import stores
+from rope.base.libutils import analyze_module as rope_analyze_module
 from tlibb.etl import combine_random_samples as tlibb_etl_combine_random_samples
 
 from tests.python_function.standalone import standalone_func, wrapper_func
@@ -146,3 +152,151 @@ def test_call_collection():
     tfunc = tliba.random.draw_bernoulli_samples
     calls = tuple(_get_fname(loc) for loc in fh.func_call_store[fh.get_func_location(tfunc)])
     assert calls == _REFERNCE_CALLS[tfunc]
+
+
+def test_hash_funcs():
+    """Test that batch hashing in worker processes is identical to sequential hashing."""
+    tfuncs = [
+        tliba.summary.add_bernoulli_samples,
+        tliba.random.draw_beta_samples,
+        tlibb_etl_combine_random_samples,
+        standalone_func,
+        wrapper_func,
+        tliba.etl.combine_random_samples,
+    ]
+    # a fresh hasher per function, such that the expected hashes do not come from the stores of `hash_funcs`
+    expected = [FunctionHasher(packages=["tliba", "tlibb"]).hash_func(tfunc) for tfunc in tfuncs]
+    sequential = FunctionHasher(packages=["tliba", "tlibb"])
+    assert sequential.hash_funcs(tfuncs) == expected
+
+    fh = FunctionHasher(packages=["tliba", "tlibb"])
+    assert fh.hash_funcs(tfuncs, workers=2) == expected
+
+    # the stores are merged, up to the location of the temporary directory
+    def _relative(store, hasher):
+        return {(str(Path(path).relative_to(hasher._data_path)), *key): value for (path, *key), value in store.items()}
+
+    assert _relative(fh.func_store.store, fh) == _relative(sequential.func_store.store, sequential)
+    assert _relative(fh.func_ir_store.store, fh) == _relative(sequential.func_ir_store.store, sequential)
+    assert len(fh.func_call_store.store) == len(sequential.func_call_store.store)
+    assert fh.hash_func(tliba.summary.add_bernoulli_samples) == expected[0]
+
+
+def test_batch_postprocessing():
+    """Test that batch post-processing results in the same hashes and intermediate representations."""
+    fh = FunctionHasher(packages=["tliba", "tlibb"])
+    batch_fh = FunctionHasher(packages=["tliba", "tlibb"], batch_postprocessing=True)
+    for tfunc in [tliba.summary.compute_conditional_moments, tlibb_etl_combine_random_samples, wrapper_func]:
+        assert batch_fh.hash_func(tfunc) == fh.hash_func(tfunc)
+        location = fh.get_func_location(tfunc)
+        assert batch_fh.func_ir_store[batch_fh.get_func_location(tfunc)] == fh.func_ir_store[location]
+    assert len(batch_fh.func_store.store) == len(fh.func_store.store)
+
+
+def test_thread_safe():
+    """Test that hashing from many threads results in the same hashes as hashing sequentially."""
+    tfuncs = [
+        tliba.summary.compute_conditional_moments,
+        tliba.summary.add_bernoulli_samples,
+        tliba.etl.combine_random_samples,
+        tliba.random.draw_bernoulli_samples,
+        tliba.random.draw_beta_samples,
+        tlibb_etl_combine_random_samples,
+        standalone_func,
+        wrapper_func,
+    ]
+    sequential = FunctionHasher(packages=["tliba", "tlibb"])
+    expected = {tfunc: sequential.hash_func(tfunc) for tfunc in tfuncs}
+
+    # the package of the standalone functions is initialized by the threads
+    fh = FunctionHasher(packages=["tliba", "tlibb"], thread_safe=True)
+    requests = tfuncs * 10
+    random.Random(42).shuffle(requests)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        hashes = list(executor.map(fh.hash_func, requests))
+    assert hashes == [expected[tfunc] for tfunc in requests]
+    assert len(fh.func_store.store) == len(sequential.func_store.store)
+    assert fh._in_flight == {}
+
+
+def _record_analyzed_modules(monkeypatch) -> list[str]:
+    analyzed = []
+
+    def analyze_module(project, resource):
+        analyzed.append(Path(resource.real_path).name)
+        rope_analyze_module(project, resource)
+
+    monkeypatch.setattr(stores, "analyze_module", analyze_module)
+    return analyzed
+
+
+def test_lazy_analysis(monkeypatch):
+    """Test that lazy analysis results in the same hashes, while only analyzing the traced modules."""
+    analyzed = _record_analyzed_modules(monkeypatch)
+    lazy_fh = FunctionHasher(lazy_analysis=True)
+    assert lazy_fh.hash_func(tliba.etl.combine_random_samples) == _REFERNCE_HASHES[tliba.etl.combine_random_samples]
+    assert {Path(path).name for path in lazy_fh.project_store.analyzed} == {"etl.py", "rng.py"}
+    assert sorted(analyzed) == ["etl.py", "rng.py"]
+
+    fh = FunctionHasher()
+    for tfunc in [tliba.summary.compute_conditional_moments, tliba.random.draw_bernoulli_samples]:
+        assert lazy_fh.hash_func(tfunc) == fh.hash_func(tfunc)
+
+
+def test_lazy_then_eager_analysis(monkeypatch, tmp_path):
+    """Test that the modules that were not analyzed lazily are analyzed by a later eager run on the same work_dir."""
+    analyzed = _record_analyzed_modules(monkeypatch)
+    tfunc = tliba.etl.combine_random_samples
+    lazy_fh = FunctionHasher(work_dir=tmp_path, lazy_analysis=True)
+    assert lazy_fh.hash_func(tfunc) == _REFERNCE_HASHES[tfunc]
+    assert sorted(analyzed) == ["etl.py", "rng.py"]
+
+    analyzed.clear()
+    eager_fh = FunctionHasher(work_dir=tmp_path)
+    eager_fh.hash_func(tfunc)
+    modules = {path.name for path in (tmp_path / "tliba").rglob("*.py")}
+    assert set(analyzed) == modules - {"etl.py", "rng.py"}
+
+    # nothing is pending anymore
+    analyzed.clear()
+    FunctionHasher(work_dir=tmp_path).hash_func(tfunc)
+    assert analyzed == []
+
+
+def test_recursive_functions(package):
+    root, _ = package
+    (root / "recursive.py").write_text(
+        "def is_even(n):\n    return True if n == 0 else is_odd(n - 1)\n\n\n"
+        "def is_odd(n):\n    return False if n == 0 else is_even(n - 1)\n\n\n"
+        "def factorial(n):\n    return 1 if n <= 1 else n * factorial(n - 1)\n\n\n"
+        "def parity(n):\n    return is_even(n), factorial(n)\n"
+    )
+    recursive = importlib.import_module(f"{root.name}.recursive")
+
+    fh = FunctionHasher(lazy_analysis=True)
+    hashes = {func.__name__: fh.hash_func(func) for func in (recursive.parity, recursive.is_odd)}
+    assert hashes["is_odd"] != fh.hash_func(recursive.is_even)
+
+    # the hashes do not depend on the function of a cycle that is hashed first, or on batch post-processing
+    for kwargs in ({}, {"batch_postprocessing": True}):
+        other_fh = FunctionHasher(lazy_analysis=True, **kwargs)
+        other_fh.hash_func(recursive.is_odd)
+        assert {func.__name__: other_fh.hash_func(func) for func in (recursive.parity, recursive.is_odd)} == hashes
+
+    (root / "recursive.py").write_text((root / "recursive.py").read_text().replace("is_even(n - 1)", "is_even(n + 1)"))
+    changed_fh = FunctionHasher(lazy_analysis=True)
+    assert changed_fh.hash_func(recursive.parity) != hashes["parity"]
+
+
+def test_deep_call_chain(package):
+    root, _ = package
+    n_funcs = 300
+    (root / "chain.py").write_text(
+        "".join(f"def f{idx}(x):\n    return f{idx + 1}(x) + 1\n\n\n" for idx in range(n_funcs))
+        + f"def f{n_funcs}(x):\n    return x\n"
+    )
+    chain = importlib.import_module(f"{root.name}.chain")
+
+    fh = FunctionHasher(lazy_analysis=True)
+    fh.hash_func(chain.f0)
+    assert len(fh.func_store.store) == n_funcs + 1
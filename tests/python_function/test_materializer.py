@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+import tliba
+from pycodehash import FunctionHasher, ProjectMaterializer
+from pycodehash.python_function.materializer import glob_to_regex
+from pycodehash.python_function.source_processor import ProjectSourceProcessor
+
+
+class RecordingProcessor(ProjectSourceProcessor):
+    def __init__(self):
+        self._calls = []
+
+    def transform(self, path):
+        self._calls.append(path)
+
+
+@pytest.fixture
+def source(tmp_path):
+    root = tmp_path / "repo" / "pkg"
+    (root / "sub").mkdir(parents=True)
+    (root / "venv" / "lib").mkdir(parents=True)
+    (root / "generated").mkdir()
+    (tmp_path / "repo" / ".git").mkdir()
+    (tmp_path / "repo" / ".gitignore").write_text("generated/\n*_local.py\n!keep_local.py\n")
+    (root / "__init__.py").write_text("")
+    (root / "a.py").write_text("def a():\n    return 1\n")
+    (root / "sub" / "b.py").write_text("def b():\n    return 2\n")
+    (root / "data.csv").write_text("x,y\n")
+    (root / "venv" / "lib" / "site.py").write_text("")
+    (root / "generated" / "c.py").write_text("")
+    (root / "config_local.py").write_text("")
+    (root / "keep_local.py").write_text("")
+    return root
+
+
+@pytest.mark.parametrize(
+    ("pattern", "path", "expected"),
+    [
+        ("**/*.py", "a.py", True),
+        ("**/*.py", "sub/b.py", True),
+        ("*.py", "sub/b.py", False),
+        ("**/venv/**", "venv/lib/site.py", True),
+        ("**/.*/**", "sub/.venv/", True),
+        ("sub/?.py", "sub/b.py", True),
+    ],
+)
+def test_glob_to_regex(pattern, path, expected):
+    assert bool(glob_to_regex(pattern).match(path)) == expected
+
+
+def test_collect_files(source):
+    assert ProjectMaterializer().collect_files(source) == ["__init__.py", "a.py", "keep_local.py", "sub/b.py"]
+    assert ProjectMaterializer(exclude=["sub/**"], respect_gitignore=False).collect_files(source) == [
+        "__init__.py",
+        "a.py",
+        "config_local.py",
+        "generated/c.py",
+        "keep_local.py",
+        "venv/lib/site.py",
+    ]
+
+
+def test_materialize_links_without_processors(source, tmp_path):
+    target = tmp_path / "work" / "pkg"
+    changed = ProjectMaterializer().materialize(source, target)
+    assert len(changed) == 4
+    assert (source / "a.py").samefile(target / "a.py")
+    assert not (target / "data.csv").exists()
+
+
+def test_materialize_incremental(source, tmp_path):
+    target = tmp_path / "work" / "pkg"
+    processor = RecordingProcessor()
+    materializer = ProjectMaterializer()
+
+    materializer.materialize(source, target, [processor])
+    assert len(processor._calls) == 4
+    assert not (source / "a.py").samefile(target / "a.py")
+
+    # nothing changed
+    processor._calls.clear()
+    assert materializer.materialize(source, target, [processor]) == []
+    assert processor._calls == []
+
+    # only the changed content is processed again, a touched file is not
+    (source / "sub" / "b.py").write_text("def b():\n    return 3\n")
+    os.utime(source / "a.py")
+    (source / "sub" / "b.py").with_name("d.py").write_text("")
+    (source / "keep_local.py").unlink()
+    assert materializer.materialize(source, target, [processor]) == [target / "sub" / "b.py", target / "sub" / "d.py"]
+    assert processor._calls == [target / "sub" / "b.py", target / "sub" / "d.py"]
+    assert (target / "sub" / "b.py").read_text() == "def b():\n    return 3\n"
+    assert not (target / "keep_local.py").exists()
+
+
+def test_hash_with_materializer():
+    tfunc = tliba.etl.combine_random_samples
+    assert FunctionHasher(materializer=ProjectMaterializer()).hash_func(tfunc) == FunctionHasher().hash_func(tfunc)
@@ -0,0 +1,71 @@
+import ast
+import importlib
+
+import asttokens
+from pycodehash import FunctionHasher
+from pycodehash.python_function import tracing
+from pycodehash.python_function.stores import FunctionCallStore, OffsetIndex, location_from_key
+from rope.contrib.fixsyntax import FixSyntax
+
+
+def test_offset_index():
+    code = 'x = "é" + f(1)\nprint(g(h(2)), "ü")\n'
+    tree = ast.parse(code)
+    offsets = OffsetIndex(code, asttokens.ASTTokens(code, parse=False, tree=tree).tokens)
+
+    calls = [node for node in ast.walk(tree) if isinstance(node, ast.Call)]
+    assert sorted(code[slice(*offsets.get_text_range(node))] for node in calls) == [
+        "f(1)",
+        "g(h(2))",
+        "h(2)",
+        'print(g(h(2)), "ü")',
+    ]
+
+    node = ast.Call(func=ast.Name(id="f"), args=[], keywords=[], lineno=1, col_offset=1, end_lineno=1, end_col_offset=2)
+    assert offsets.get_text_range(node) == (0, 0)
+
+
+def test_call_resolver_memoization(package, monkeypatch):
+    root, module = package
+    (root / "main.py").write_text(
+        f"from {root.name} import helper\n\n\ndef main(x):\n    return helper(x) + helper(x + 1) * helper(2)\n"
+    )
+    module = importlib.reload(module)
+
+    constructed = []
+
+    class RecordingFixSyntax(FixSyntax):
+        def __init__(self, *args, **kwargs):
+            constructed.append(self)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(tracing.fixsyntax, "FixSyntax", RecordingFixSyntax)
+
+    fh = FunctionHasher()
+    fh.hash_func(module.main)
+    main_resolvers = [resolver for (name, _), resolver in fh.module_store.resolvers.items() if name.endswith(".main")]
+    assert len(main_resolvers) == 1
+    # three call sites of the same function resolve to a single definition lookup
+    assert len(main_resolvers[0]._pynames) == 3
+    assert len(main_resolvers[0]._locations) == 1
+    assert len(constructed) == len(fh.module_store.resolvers)
+    assert fh.hash_func(module.main) == FunctionHasher().hash_func(module.main)
+
+
+def test_function_call_store_reverse_edges():
+    keys = {name: (f"{name}.py", 0, 1, 1) for name in ["main", "helper", "util", "other"]}
+    store = FunctionCallStore()
+    store[location_from_key(keys["main"])] = location_from_key(keys["helper"])
+    store[location_from_key(keys["helper"])] = location_from_key(keys["util"])
+    store[location_from_key(keys["other"])] = location_from_key(keys["main"])
+
+    assert store.get_calling_keys([keys["util"]]) == set(keys.values())
+    assert store.get_calling_keys([keys["main"]]) == {keys["main"], keys["other"]}
+
+    store.remove_keys([keys["main"]])
+    assert store.get_calling_keys([keys["util"]]) == {keys["util"], keys["helper"]}
+    assert keys["main"] not in store.store
+
+    restored = FunctionCallStore()
+    restored.update_keys(store.get_keys())
+    assert restored.get_calling_keys([keys["main"]]) == {keys["main"], keys["other"]}
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import inspect
+
+import tliba
+from pycodehash import FunctionHasher
+from pycodehash.python_function.stores import _item_to_key
+from pycodehash.python_function.tracing import DefinitionIndex, get_func_def_location
+
+
+def test_definition_index():
+    """Test that the definition index finds the same locations as rope."""
+    fh = FunctionHasher(lazy_analysis=True)
+    project = fh.project_store.get_or_create_for_func(tliba.etl.combine_random_samples)
+    index = DefinitionIndex(project)
+
+    tfuncs = [
+        func
+        for module in (tliba.etl, tliba.summary, tliba.random.rng)
+        for func in vars(module).values()
+        if inspect.isfunction(func) and func.__module__ == module.__name__
+    ]
+    assert len(tfuncs) > 5
+    for tfunc in tfuncs:
+        expected = get_func_def_location(tfunc, project)
+        assert _item_to_key(get_func_def_location(tfunc, project, index)) == _item_to_key(expected)
+
+
+def test_definition_index_headers(package):
+    root, module = package
+    (root / "other.py").write_text(
+        "class Other:\n    def other(self):\n        return 1\n\n\n"
+        "async def run():\n    pass\n\n\n"
+        "def other():\n    return 2\n"
+    )
+    fh = FunctionHasher(lazy_analysis=True)
+    project = fh.project_store.get_or_create_for_func(module.main)
+    index = DefinitionIndex(project)
+    resource = project.get_resource("other.py")
+
+    # ordered by offset, the method comes first
+    assert [location.lineno for location in index.get_definitions(resource, "other")] == [2, 10]
+    assert len(index.get_definitions(resource, "Other")) == 1
+    # like `check_func_definition`, `async def` is not a definition header
+    assert index.get_definitions(resource, "run") == []
@@ -0,0 +1,54 @@
+import time
+
+import pytest
+from pycodehash import FunctionHasher, ProjectMaterializer
+from pycodehash.python_function.watcher import SourceWatcher
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"lazy_analysis": True}, {"materializer": ProjectMaterializer()}],
+    ids=["copy", "lazy", "materializer"],
+)
+def test_source_watcher(package, kwargs):
+    root, module = package
+    other = __import__(f"{root.name}.other", fromlist=["other"]).other
+
+    fh = FunctionHasher(**kwargs)
+    initial = fh.hash_func(module.main)
+    fh.hash_func(other)
+    other_location = fh.get_func_location(other)
+    watcher = SourceWatcher(fh)
+    watcher.snapshot()
+    assert watcher.poll() == []
+
+    # the callee and its (transitive) callers are evicted, other functions are not
+    (root / "helpers.py").write_text("def helper(x):\n    return x + 10\n")
+    assert watcher.poll() == [str(root / "helpers.py")]
+    assert len(fh.func_store.store) == 1
+    assert other_location in fh.func_store
+    changed = fh.hash_func(module.main)
+    assert changed != initial
+    assert changed == FunctionHasher(**kwargs).hash_func(module.main)
+
+    # the functions in modules that import a changed module are evicted as well
+    (root / "__init__.py").write_text(f"from {root.name}.alternative import helper\n")
+    assert watcher.poll() == [str(root / "__init__.py")]
+    reexported = fh.hash_func(module.main)
+    assert reexported not in {initial, changed}
+    assert reexported == FunctionHasher(**kwargs).hash_func(module.main)
+
+
+def test_watch_in_background(package):
+    root, module = package
+    fh = FunctionHasher()
+    fh.hash_func(module.main)
+    location = fh.get_func_location(module.main)
+
+    with fh.watch(interval=0.01):
+        (root / "helpers.py").write_text("def helper(x):\n    return x + 10\n")
+        deadline = time.monotonic() + 10
+        while location in fh.func_store and time.monotonic() < deadline:
+            time.sleep(0.01)
+    assert location not in fh.func_store
+    assert fh.hash_func(module.main) == FunctionHasher().hash_func(module.main)
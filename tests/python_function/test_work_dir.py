@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import pytest
+from pycodehash import FunctionHasher
+from pycodehash.python_function import stores
+
+
+@pytest.fixture
+def analyzed(monkeypatch):
+    """Records the modules that are analyzed individually"""
+    paths = []
+
+    def _analyze_module(project, resource):
+        paths.append(resource.path)
+        project.pycore.analyze_module(resource)
+
+    monkeypatch.setattr(stores, "analyze_module", _analyze_module)
+    return paths
+
+
+def test_work_dir_incremental(package, tmp_path, analyzed):
+    root, module = package
+    work_dir = tmp_path / "work"
+
+    cold = FunctionHasher(work_dir=work_dir).hash_func(module.main)
+    assert (work_dir / root.name / ".ropeproject" / "objectdb").is_file()
+    assert not (work_dir / root.name / ".ropeproject" / "pending").exists()
+    assert analyzed == []
+
+    # nothing changed
+    assert FunctionHasher(work_dir=work_dir).hash_func(module.main) == cold
+    assert analyzed == []
+
+    # only the changed module is analyzed again
+    (root / "helpers.py").write_text("def helper(x):\n    return x + 2\n")
+    changed = FunctionHasher(work_dir=work_dir).hash_func(module.main)
+    assert analyzed == ["helpers.py"]
+    assert changed != cold
+    assert changed == FunctionHasher().hash_func(module.main)
+
+
+def test_work_dir_interrupted(package, tmp_path, analyzed):
+    root, module = package
+    work_dir = tmp_path / "work"
+    FunctionHasher(work_dir=work_dir).hash_func(module.main)
+
+    # the sources are prepared, but the process stops before the analysis
+    (root / "other.py").write_text("def other():\n    return 2\n")
+    FunctionHasher(work_dir=work_dir).project_store.materialize(root.name)
+    assert analyzed == []
+
+    FunctionHasher(work_dir=work_dir).hash_func(module.main)
+    assert analyzed == ["other.py"]
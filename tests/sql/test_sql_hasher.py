@@ -1,6 +1,7 @@
 from pathlib import Path
 
 import pytest
+from pycodehash.cache import LRUSQLiteCache, SQLiteCache
 from pycodehash.hashing import hash_string
 from pycodehash.sql.comment_filter import CommentFilter
 from pycodehash.sql.default_database_filter import DefaultDatabaseFilter
@@ -73,3 +74,105 @@ def test_sql_transform_empty():
         # ensure ast remains None
         ast = transform.generic_transform(ast)
         assert ast is None
+
+
+def test_sql_hasher_cache(tmp_path):
+    cache = SQLiteCache(tmp_path / "sql.sqlite")
+    sh = SQLHasher(dialect="tsql", default_db="my_database", cache=cache)
+    reference = SQLHasher(dialect="tsql", default_db="my_database")
+
+    queries = [
+        "SELECT * FROM hello_world",
+        "SELECT   *  FROM /* comment */   hello_world",
+        "SELECT * FROM my_database.hello_world",
+        "SELECT 'a  b' FROM hello_world",
+        "SELECT 'a b' FROM hello_world",
+    ]
+    for query in queries:
+        assert sh.hash_query(query) == reference.hash_query(query)
+    # the first two queries only differ in whitespace and comments (newlines are retained)
+    assert sh.hash_tokens(queries[0]) == sh.hash_tokens(queries[1])
+    assert sh.hash_tokens(queries[3]) != sh.hash_tokens(queries[4])
+    # per query and per distinct token sequence
+    assert len(cache) == 9
+
+    # a cache hit does not parse the query
+    sh._hash_ast = None
+    assert sh.hash_query("SELECT   *  FROM hello_world") == reference.hash_query(queries[0])
+
+    # the configuration is part of the key
+    assert SQLHasher(dialect="tsql", cache=cache).hash_query(queries[2]) == SQLHasher(dialect="tsql").hash_query(
+        queries[2]
+    )
+    # without the whitespace filter, whitespace is part of the hash
+    no_filter = SQLHasher(ast_transformers=[CommentFilter()], cache=cache)
+    assert no_filter.hash_tokens(queries[0]) != no_filter.hash_tokens("SELECT  * FROM hello_world")
+
+
+def test_sql_hasher_cache_use_statement(tmp_path):
+    cache = SQLiteCache(tmp_path / "sql.sqlite")
+    queries = ["USE other_db;\nSELECT * FROM t", "SELECT * FROM t"]
+    reference = SQLHasher(dialect="tsql", default_db="my_db")
+    expected = [reference.hash_query(query) for query in queries]
+
+    # a query that changes the default database is not cached, the next query resolves to the new database
+    for _ in range(2):
+        sh = SQLHasher(dialect="tsql", default_db="my_db", cache=cache)
+        assert [sh.hash_query(query) for query in queries] == expected
+    assert SQLHasher(dialect="tsql", default_db="my_db", cache=cache).hash_query(queries[1]) == SQLHasher(
+        dialect="tsql", default_db="my_db"
+    ).hash_query(queries[1])
+    assert expected[1] != SQLHasher(dialect="tsql", default_db="my_db").hash_query(queries[1])
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_sql_hasher_directory(tmp_path, workers):
+    root = tmp_path / "queries"
+    (root / "nested").mkdir(parents=True)
+    (root / "a.sql").write_text("SELECT * FROM table")
+    (root / "nested" / "b.sql").write_text("SELECT a, b FROM other")
+    (root / "nested" / "invalid.sql").write_text("SELECT FROM WHERE")
+    (root / "readme.md").write_text("SELECT * FROM table")
+
+    cache = SQLiteCache(tmp_path / "sql.sqlite")
+    sh = SQLHasher(cache=cache)
+    hashes, errors = sh.hash_directory(root, workers=workers)
+    assert hashes == {
+        "a.sql": "ba46f6c7ebf45fb57da743ef050869e1e45d32defe9da56e4593ba82c3305d8a",
+        "nested/b.sql": SQLHasher().hash_query("SELECT a, b FROM other"),
+    }
+    assert list(errors) == ["nested/invalid.sql"]
+    assert errors["nested/invalid.sql"].startswith("APIParsingError")
+    # the worker processes share the cache
+    assert len(cache) == 4
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_sql_hasher_iter_files(tmp_path, workers):
+    read = []
+
+    def file_paths():
+        for idx in range(10):
+            path = tmp_path / f"query{idx}.sql"
+            path.write_text(f"SELECT {idx} FROM table")
+            read.append(path)
+            yield path
+
+    sh = SQLHasher()
+    results = sh.iter_hash_files(file_paths(), workers=workers)
+    first = next(results)
+    # the files are read as they are needed
+    assert len(read) <= 4
+    assert sorted([first, *results]) == sorted((str(path), sh.hash_file(path), None) for path in read)
+    assert len(read) == 10
+
+
+def test_sql_hasher_query_cache(tmp_path):
+    cache = LRUSQLiteCache(tmp_path / "sql.sqlite", max_entries=100)
+    sh = SQLHasher(cache=cache)
+    query = "SELECT * FROM table"
+    assert sh.hash_query(query) == "ba46f6c7ebf45fb57da743ef050869e1e45d32defe9da56e4593ba82c3305d8a"
+
+    # an unchanged query is neither lexed nor parsed
+    sh.hash_tokens = sh._hash_ast = None
+    assert sh.hash_query(query) == "ba46f6c7ebf45fb57da743ef050869e1e45d32defe9da56e4593ba82c3305d8a"
@@ -0,0 +1,25 @@
+import pickle
+
+from pycodehash.cache import LRUSQLiteCache
+
+
+def test_lru_sqlite_cache(tmp_path):
+    cache = LRUSQLiteCache(tmp_path / "cache.sqlite", max_entries=20)
+    for idx in range(20):
+        cache[str(idx)] = str(idx)
+    assert len(cache) == 20
+
+    # recently used entries are retained
+    assert cache["0"] == "0"
+    for idx in range(20, 30):
+        cache[str(idx)] = str(idx)
+    assert len(cache) <= 22
+    assert "0" in cache
+    assert "1" not in cache
+    assert "29" in cache
+
+    restored = pickle.loads(pickle.dumps(cache))
+    assert restored.max_entries == 20
+    assert restored["29"] == "29"
+    cache.close()
+    restored.close()
@@ -0,0 +1,85 @@
+import io
+import json
+import operator
+
+import pytest
+import tliba
+from pycodehash import FunctionHasher
+from pycodehash.cli import _hash_targets, get_parser, main
+from pycodehash.datasets import LocalDirectoryHash, LocalFileContentHash
+from pycodehash.dependency import PythonDependencyHash
+from pycodehash.sql import SQLHasher
+
+
+def _results(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+@pytest.fixture
+def sql_files(tmp_path):
+    paths = []
+    for idx in range(3):
+        path = tmp_path / f"query{idx}.sql"
+        path.write_text(f"SELECT {idx} FROM hello_world")
+        paths.append(str(path))
+    return paths
+
+
+def test_cli_func(capsys):
+    targets = ["tliba.etl:combine_random_samples", "tliba.summary:compute_conditional_moments", "tliba:missing"]
+    assert main(["func", "--jobs", "2", *targets]) == 1
+
+    results = {result["target"]: result for result in _results(capsys)}
+    fh = FunctionHasher()
+    assert results[targets[0]]["hash"] == fh.hash_func(tliba.etl.combine_random_samples)
+    assert results[targets[1]]["hash"] == fh.hash_func(tliba.summary.compute_conditional_moments)
+    assert results[targets[2]]["error"].startswith("AttributeError")
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_cli_sql_stdin(capsys, monkeypatch, sql_files, jobs):
+    monkeypatch.setattr("sys.stdin", io.StringIO("\n".join(sql_files) + "\n\n"))
+    assert main(["sql", "--jobs", str(jobs)]) == 0
+
+    sh = SQLHasher()
+    assert sorted(_results(capsys), key=operator.itemgetter("target")) == [
+        {"target": path, "hash": sh.hash_file(path)} for path in sql_files
+    ]
+
+
+def test_cli_func_path():
+    parser = get_parser()
+    assert parser.parse_args(["func", "--path", "src", "tliba:missing"]).path == ["src"]
+    assert parser.parse_args(["func", "tliba:missing"]).path is None
+
+
+def test_cli_hash_targets_stream():
+    read = []
+
+    def targets():
+        for idx in range(10):
+            read.append(str(idx))
+            yield str(idx)
+
+    results = _hash_targets(str.upper, targets(), jobs=2)
+    first = next(results)
+    # the targets are read as they are needed
+    assert len(read) <= 4
+    assert sorted([first, *results], key=operator.itemgetter("target")) == [
+        {"target": target, "hash": target} for target in read
+    ]
+
+
+def test_cli_datasets(capsys, sql_files, tmp_path):
+    assert main(["file", "--content", *sql_files[:2]]) == 0
+    assert _results(capsys) == [
+        {"target": path, "hash": LocalFileContentHash().compute_hash(path)} for path in sql_files[:2]
+    ]
+
+    assert main(["dir", str(tmp_path), str(tmp_path / "missing")]) == 1
+    results = _results(capsys)
+    assert results[0] == {"target": str(tmp_path), "hash": LocalDirectoryHash().compute_hash(tmp_path)}
+    assert "error" in results[1]
+
+    assert main(["deps", "pytest"]) == 0
+    assert _results(capsys) == [{"target": "pytest", "hash": PythonDependencyHash().compute_hash(["pytest"])}]
@@ -0,0 +1,128 @@
+import json
+import socket
+import threading
+
+import pytest
+from pycodehash import FunctionHasher
+from pycodehash.cli import main
+from pycodehash.daemon import HashingClient, HashingServer, HashingService
+from pycodehash.datasets import LocalDirectoryContentHash, LocalFileHash
+from pycodehash.sql import SQLHasher
+
+
+@pytest.fixture
+def server(tmp_path):
+    with HashingServer(tmp_path / "pycodehash.sock", HashingService(lazy_analysis=True)) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server
+        server.shutdown()
+        thread.join()
+    assert not server.socket_path.exists()
+
+
+def test_daemon_socket_in_use(server, tmp_path):
+    with pytest.raises(OSError, match="already serving"):
+        HashingServer(server.socket_path, HashingService())
+
+    # the socket of a server that is gone is replaced
+    stale_path = tmp_path / "stale.sock"
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(stale_path))
+    stale.close()
+    with HashingServer(stale_path, HashingService()) as replacement:
+        assert replacement.socket_path.is_socket()
+
+
+def test_daemon(server, package, tmp_path):
+    root, module = package
+    sql_file = tmp_path / "query.sql"
+    sql_file.write_text("SELECT * FROM hello_world")
+    requests = [
+        {"kind": "func", "target": f"{module.__name__}:main"},
+        {"kind": "sql", "target": str(sql_file)},
+        {"kind": "file", "target": str(sql_file)},
+        {"kind": "dir", "target": str(root), "content": True},
+        {"kind": "func", "target": f"{module.__name__}:missing"},
+        {"kind": "table", "target": "hello_world"},
+    ]
+
+    with HashingClient(server.socket_path) as client:
+        results = client.hash(requests)
+        assert results[:4] == [
+            {"hash": FunctionHasher(lazy_analysis=True).hash_func(module.main)},
+            {"hash": SQLHasher().hash_file(sql_file)},
+            {"hash": LocalFileHash().compute_hash(sql_file)},
+            {"hash": LocalDirectoryContentHash().compute_hash(root)},
+        ]
+        assert results[4]["error"].startswith("AttributeError")
+        assert results[5]["error"].startswith("ValueError")
+
+        # the analysis is reused
+        function_hasher = server.service.function_hasher
+        assert client.hash_funcs([f"{module.__name__}:main"]) == results[:1]
+        assert server.service.function_hasher is function_hasher
+
+        # a change in a callee is detected
+        (root / "helpers.py").write_text("def helper(x):\n    return x + 10\n")
+        changed = client.hash_funcs([f"{module.__name__}:main"])
+        assert server.service.function_hasher is function_hasher
+        assert changed != results[:1]
+        assert changed == [{"hash": FunctionHasher(lazy_analysis=True).hash_func(module.main)}]
+
+
+def test_daemon_concurrent_edit(package, monkeypatch):
+    root, module = package
+    service = HashingService(lazy_analysis=True)
+    hasher = service.function_hasher
+    # initialize and watch the package
+    assert "hash" in service.handle([{"kind": "func", "target": f"{module.__name__.rsplit('.', 1)[0]}.other:other"}])[0]
+
+    resolving = threading.Event()
+    release = threading.Event()
+    resolve_pending = hasher._resolve_pending
+
+    def paused_resolve_pending():
+        resolving.set()
+        release.wait()
+        resolve_pending()
+
+    monkeypatch.setattr(hasher, "_resolve_pending", paused_resolve_pending)
+    request = {"kind": "func", "target": f"{module.__name__}:main"}
+    hashing = threading.Thread(target=service.handle, args=([request],))
+    hashing.start()
+    assert resolving.wait(timeout=60)
+
+    # the sources of `main` and `helper` are collected, the edit is detected while they are hashed
+    (root / "helpers.py").write_text("def helper(x):\n    return x + 10\n")
+    checking = threading.Thread(target=service.check_sources)
+    checking.start()
+    checking.join(timeout=0.5)
+    invalidation_waited = checking.is_alive()
+    release.set()
+    hashing.join()
+    checking.join()
+    # the invalidation waits for the hashing to finish
+    assert invalidation_waited
+
+    monkeypatch.setattr(hasher, "_resolve_pending", resolve_pending)
+    assert service.handle([request]) == [{"hash": FunctionHasher(lazy_analysis=True).hash_func(module.main)}]
+
+
+def test_daemon_invalid_message(server):
+    with HashingClient(server.socket_path) as client:
+        client._file.write(b"not json\n")
+        client._file.flush()
+        assert client._file.readline().startswith(b'{"error": "Invalid message')
+        # the connection remains usable
+        assert client.hash([]) == []
+
+
+def test_cli_daemon(server, capsys, tmp_path, monkeypatch):
+    (tmp_path / "data.txt").write_text("Hello World!")
+    monkeypatch.chdir(tmp_path)
+    assert main(["file", "--socket", str(server.socket_path), "data.txt"]) == 0
+    assert json.loads(capsys.readouterr().out) == {
+        "target": "data.txt",
+        "hash": LocalFileHash().compute_hash(tmp_path / "data.txt"),
+    }
@@ -1,4 +1,8 @@
+import hashlib
+import os
+
 import pytest
+from pycodehash import hashing
 from pycodehash.hashing import hash_file_full
 
 
@@ -12,3 +16,24 @@ def local_dataset(tmp_path):
 
 def test_hash_file_full(local_dataset):
     assert hash_file_full(local_dataset) == "7f83b1657ff1fc53b92dc18148a1d65dfc2d4b1fa3d677284addd200126d9069"
+
+
+@pytest.mark.parametrize("size", [0, 1, 100_000, 3_000_000])
+@pytest.mark.parametrize("block_size", [None, 8192])
+def test_hash_file_full_strategies(tmp_path, monkeypatch, size, block_size):
+    # memory-map the larger files
+    monkeypatch.setattr(hashing, "MMAP_THRESHOLD", 1_000_000)
+    data = os.urandom(size)
+    file_name = tmp_path / "data.bin"
+    file_name.write_bytes(data)
+
+    assert hash_file_full(file_name, block_size=block_size) == hashlib.sha256(data).hexdigest()
+
+
+def test_hash_file_full_without_file_digest(tmp_path, monkeypatch):
+    monkeypatch.delattr(hashlib, "file_digest", raising=False)
+    data = os.urandom(100_000)
+    file_name = tmp_path / "data.bin"
+    file_name.write_bytes(data)
+
+    assert hash_file_full(file_name) == hashlib.sha256(data).hexdigest()